@@ -16,6 +16,8 @@ migrate = Migrate()
 
 # Import cache after initialization
 from app.utils.cache import cache
+# Registers the ORM query cache on every session
+from app.utils import query_cache
 
 
 def create_app(config_name="default"):
@@ -66,6 +68,20 @@ def create_app(config_name="default"):
     app.register_blueprint(admin_bp, url_prefix="/api/admin")
     app.register_blueprint(relations_bp, url_prefix="/api/relations")
 
+    # Refill hot endpoints after cache resets
+    from app.utils.cache_warmer import warmer
+
+    warmer.init_app(app)
+
+    # Maintenance commands
+    from app.utils.browse_cli import browse_cli
+    from app.utils.cache_cli import cache_cli
+    from app.utils.ratings_cli import ratings_cli
+
+    app.cli.add_command(browse_cli)
+    app.cli.add_command(cache_cli)
+    app.cli.add_command(ratings_cli)
+
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -8,9 +8,11 @@ from app.models.telecast import Telecast
 from app.models.series_contract import SeriesContract
 from app.models.viewer_account import ViewerAccount
 from app.models.feedback import Feedback
+from app.models.series_rating_summary import SeriesRatingSummary
 from app.models.dubbing_language import DubbingLanguage
 from app.models.subtitle_language import SubtitleLanguage
 from app.models.web_series_release import WebSeriesRelease
+from app.models.series_browse import SeriesBrowse
 
 __all__ = [
     "Country",
@@ -23,7 +25,9 @@ __all__ = [
     "SeriesContract",
     "ViewerAccount",
     "Feedback",
+    "SeriesRatingSummary",
     "DubbingLanguage",
     "SubtitleLanguage",
     "WebSeriesRelease",
+    "SeriesBrowse",
 ]
@@ -1,5 +1,7 @@
 from app import db
+from app.models.viewer_account import ViewerAccount
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 
 
 class Feedback(db.Model):
@@ -26,6 +28,21 @@ class Feedback(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
 
+    @staticmethod
+    def with_viewer():
+        """
+        Loader option joining each feedback's viewer into the same SELECT
+
+        Only the columns to_dict() shows are read, so listings run one
+        query per page instead of one more per feedback.
+        """
+        return joinedload(Feedback.viewer, innerjoin=True).load_only(
+            ViewerAccount.account_id,
+            ViewerAccount.first_name,
+            ViewerAccount.last_name,
+            ViewerAccount.email,
+        )
+
     def to_dict(self, include_viewer=True):
         result = {
             "feedback_id": self.feedback_id,
@@ -1,4 +1,5 @@
 from app import db
+from app.models.web_series import WebSeries
 from datetime import datetime
 
 
@@ -41,7 +42,9 @@ class ProductionHouse(db.Model):
         }
 
         if include_series:
-            data["web_series"] = [series.to_dict() for series in self.web_series]
+            series = self.web_series.all()
+            stats = WebSeries.list_stats(s.webseries_id for s in series)
+            data["web_series"] = [s.to_dict(stats=stats[s.webseries_id]) for s in series]
 
         return data
 
@@ -0,0 +1,349 @@
+from app import db
+from app.models.episode import Episode
+from app.models.feedback import Feedback
+from app.models.production_house import ProductionHouse
+from app.models.series_rating_summary import SeriesRatingSummary, _committed
+from app.models.subtitle_language import SubtitleLanguage
+from app.models.web_series import WebSeries
+from app.models.web_series_release import WebSeriesRelease
+from app.utils.cache import defer_invalidation
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, func, inspect, or_, select
+from sqlalchemy.orm import Session
+
+# Cache namespace of the browse listing, bumped when rows are added or removed.
+# Updated rows invalidate the tags "series_browse:<webseries_id>" (pages
+# showing the row) and "series_browse_by:<column>" (pages filtering or
+# sorting on a changed column) instead.
+BROWSE_NAMESPACE = "series_browse"
+
+# Columns compared by rebuild() and drift()
+COLUMNS = (
+    "title",
+    "type",
+    "house_id",
+    "house_name",
+    "num_episodes",
+    "review_count",
+    "average_rating",
+    "subtitle_languages",
+    "release_countries",
+    "created_at",
+)
+
+
+def _joined(values):
+    """Sorted values wrapped in commas (",English,French,"), "" when empty"""
+    values = sorted(set(values))
+    return f",{','.join(values)}," if values else ""
+
+
+def _split(value):
+    return [item for item in (value or "").split(",") if item]
+
+
+class SeriesBrowse(db.Model):
+    """
+    One row per series with everything the browse and search views show
+
+    Title, type, house name, episode count, rating and the subtitle and
+    release lists come from six tables; this table holds them side by side
+    so a catalog page is one indexed scan. Rows are rewritten by
+    _refresh_browse_rows in the transaction of every write to those tables
+    and can be recomputed in bulk with rebuild().
+    """
+
+    __tablename__ = "series_browse"
+
+    webseries_id = db.Column(
+        db.String(10),
+        db.ForeignKey("web_series.webseries_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    title = db.Column(db.String(64), nullable=False, index=True)
+    type = db.Column(db.String(15), nullable=False, index=True)
+    house_id = db.Column(db.String(10), nullable=False, index=True)
+    house_name = db.Column(db.String(64), nullable=False, index=True)
+    num_episodes = db.Column(db.Integer, nullable=False, default=0, index=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+    average_rating = db.Column(db.Float, index=True)
+    # Comma-wrapped lists (",English,French,"), matched with LIKE '%,English,%'
+    subtitle_languages = db.Column(db.Text, nullable=False, default="")
+    release_countries = db.Column(db.Text, nullable=False, default="")
+    created_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def to_dict(self):
+        return {
+            "webseries_id": self.webseries_id,
+            "title": self.title,
+            "type": self.type,
+            "house_id": self.house_id,
+            "house_name": self.house_name,
+            "num_episodes": self.num_episodes,
+            "review_count": self.review_count,
+            "rating": self.average_rating,
+            "subtitle_languages": _split(self.subtitle_languages),
+            "release_countries": _split(self.release_countries),
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+    @staticmethod
+    def computed(series_ids=None, house_ids=None, session=None, columns=None):
+        """
+        Browse rows computed from the source tables, {webseries_id: values}
+
+        Covers every series, or those in series_ids or made by house_ids.
+        Ratings come from the rating summaries, falling back to feedback for
+        series without one. columns limits the episode, rating and list
+        columns computed (all by default); the web_series and house columns
+        are always included.
+        """
+        wanted = set(COLUMNS if columns is None else columns)
+        session = session or db.session
+        query = session.query(
+            WebSeries.webseries_id,
+            WebSeries.title,
+            WebSeries.type,
+            WebSeries.house_id,
+            ProductionHouse.name,
+            WebSeries.created_at,
+        ).join(ProductionHouse, ProductionHouse.house_id == WebSeries.house_id)
+        if series_ids is not None or house_ids is not None:
+            query = query.filter(or_(
+                WebSeries.webseries_id.in_(list(series_ids or ())),
+                WebSeries.house_id.in_(list(house_ids or ())),
+            ))
+        rows = {
+            row[0]: {
+                "title": row[1],
+                "type": row[2],
+                "house_id": row[3],
+                "house_name": row[4],
+                "created_at": row[5],
+            }
+            for row in query
+        }
+        if not rows:
+            return rows
+        defaults = {
+            "num_episodes": 0,
+            "review_count": 0,
+            "average_rating": None,
+            "subtitle_languages": "",
+            "release_countries": "",
+        }
+        for values in rows.values():
+            values.update((column, value) for column, value in defaults.items() if column in wanted)
+
+        def scoped(query, column):
+            # A full rebuild reads each table once instead of filtering by ID
+            if series_ids is None and house_ids is None:
+                return query
+            return query.filter(column.in_(list(rows)))
+
+        if "num_episodes" in wanted:
+            episodes = scoped(
+                session.query(Episode.webseries_id, func.count(Episode.episode_id)),
+                Episode.webseries_id,
+            ).group_by(Episode.webseries_id)
+            for series_id, count in episodes:
+                if series_id in rows:
+                    rows[series_id]["num_episodes"] = count
+
+        if not wanted.isdisjoint(("review_count", "average_rating")):
+            ratings = {
+                series_id: (review_count, rating_sum)
+                for series_id, review_count, rating_sum in scoped(
+                    session.query(
+                        SeriesRatingSummary.webseries_id,
+                        SeriesRatingSummary.review_count,
+                        SeriesRatingSummary.rating_sum,
+                    ),
+                    SeriesRatingSummary.webseries_id,
+                )
+            }
+            unsummarized = [series_id for series_id in rows if series_id not in ratings]
+            if unsummarized:
+                ratings.update(
+                    (series_id, (count, total))
+                    for series_id, count, total in session.query(
+                        Feedback.webseries_id,
+                        func.count(Feedback.feedback_id),
+                        func.sum(Feedback.rating),
+                    )
+                    .filter(Feedback.webseries_id.in_(unsummarized))
+                    .group_by(Feedback.webseries_id)
+                )
+            for series_id, (review_count, rating_sum) in ratings.items():
+                if series_id in rows and review_count:
+                    rows[series_id]["review_count"] = int(review_count)
+                    rows[series_id]["average_rating"] = round(
+                        int(rating_sum) / int(review_count), 1
+                    )
+
+        for model, field, column in (
+            (SubtitleLanguage, "subtitle_languages", SubtitleLanguage.language_name),
+            (WebSeriesRelease, "release_countries", WebSeriesRelease.country_name),
+        ):
+            if field not in wanted:
+                continue
+            values = defaultdict(list)
+            for series_id, value in scoped(
+                session.query(model.webseries_id, column), model.webseries_id
+            ):
+                values[series_id].append(value)
+            for series_id, items in values.items():
+                if series_id in rows:
+                    rows[series_id][field] = _joined(items)
+        return rows
+
+    @classmethod
+    def refresh(cls, series_ids=(), house_ids=(), session=None, columns=None):
+        """
+        Update the rows of series_ids and of the series of house_ids
+
+        Rows of series that no longer exist are removed. columns limits the
+        derived columns recomputed, see computed(). Runs in the caller's
+        transaction, which commits.
+        """
+        session = session or db.session
+        values = cls.computed(series_ids, house_ids, session=session, columns=columns)
+        cls._store(session, values, set(series_ids) | set(values))
+        return list(values)
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Recompute every row from the source tables and store the differences
+
+        Returns the IDs whose row was missing, wrong or stale. The caller
+        commits. Writes made while it runs are refreshed by their own
+        transactions, so run drift() afterwards if it overlapped with any.
+        """
+        drifted = cls.drift()
+        expected = {row["webseries_id"]: row["expected"] for row in drifted if row["expected"]}
+        cls._store(db.session, expected, [row["webseries_id"] for row in drifted])
+        return [row["webseries_id"] for row in drifted]
+
+    @classmethod
+    def drift(cls):
+        """
+        Series whose stored row differs from the source tables
+
+        Returns a list of {webseries_id, stored, expected}, with stored None
+        when the row is missing and expected None when the series is gone.
+        """
+        expected = cls.computed()
+        stored = {
+            row.webseries_id: {column: getattr(row, column) for column in COLUMNS}
+            for row in cls.query
+        }
+        return [
+            {
+                "webseries_id": series_id,
+                "stored": stored.get(series_id),
+                "expected": expected.get(series_id),
+            }
+            for series_id in sorted(expected.keys() | stored.keys())
+            if stored.get(series_id) != expected.get(series_id)
+        ]
+
+    @classmethod
+    def _store(cls, session, values, replaced_ids):
+        """
+        Bring the rows of replaced_ids in line with values, {webseries_id: columns}
+
+        Changed columns are updated in place, one UPDATE per distinct change.
+        Series missing from values lose their row; series without a row get
+        one, computed in full if values only holds some columns. Additions
+        and removals bump BROWSE_NAMESPACE, since they shift every page;
+        updates only drop the pages tagged with the row or a changed column.
+        """
+        if not replaced_ids:
+            return
+        table = cls.__table__
+        stored = {
+            row.webseries_id: row
+            for row in session.execute(
+                select(table).where(table.c.webseries_id.in_(list(replaced_ids)))
+            )
+        }
+        removed = [series_id for series_id in stored if series_id not in values]
+        added = [series_id for series_id in values if series_id not in stored]
+        partial = [series_id for series_id in added if len(values[series_id]) < len(COLUMNS)]
+        if partial:
+            values = {**values, **cls.computed(partial, session=session)}
+
+        now = datetime.now()
+        changes = defaultdict(list)
+        tags = set()
+        for series_id, row in stored.items():
+            if series_id not in values:
+                continue
+            changed = {
+                column: value
+                for column, value in values[series_id].items()
+                if getattr(row, column) != value
+            }
+            if changed:
+                changes[tuple(sorted(changed.items()))].append(series_id)
+                tags.add(f"series_browse:{series_id}")
+                tags.update(f"series_browse_by:{column}" for column in changed)
+        for changed, series_ids in changes.items():
+            session.execute(
+                table.update()
+                .where(table.c.webseries_id.in_(series_ids))
+                .values(dict(changed, updated_at=now))
+            )
+        if removed:
+            session.execute(table.delete().where(table.c.webseries_id.in_(removed)))
+        if added:
+            session.execute(table.insert(), [
+                dict(values[series_id], webseries_id=series_id, updated_at=now)
+                for series_id in added
+            ])
+        if removed or added:
+            defer_invalidation(namespaces=[BROWSE_NAMESPACE], session=session)
+        elif tags:
+            defer_invalidation(tags=tags, session=session)
+
+    def __repr__(self):
+        return f"<SeriesBrowse {self.webseries_id}>"
+
+
+# Rows of these models belong to the series named by their webseries_id,
+# with the browse columns derived from them
+_SERIES_CHILDREN = {
+    Episode: ("num_episodes",),
+    Feedback: ("review_count", "average_rating"),
+    SeriesRatingSummary: ("review_count", "average_rating"),
+    SubtitleLanguage: ("subtitle_languages",),
+    WebSeriesRelease: ("release_countries",),
+}
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_browse_rows(session, flush_context):
+    """Update the browse rows of every series the flush touched"""
+    series_ids = set()
+    house_ids = set()
+    columns = set()
+    dirty = session.dirty
+    for instance in (*session.new, *dirty, *session.deleted):
+        if instance in dirty and not session.is_modified(instance):
+            continue
+        if isinstance(instance, WebSeries):
+            series_ids.add(instance.webseries_id)
+        elif type(instance) in _SERIES_CHILDREN:
+            series_ids.update(
+                {instance.webseries_id, _committed(inspect(instance), "webseries_id")}
+            )
+            columns.update(_SERIES_CHILDREN[type(instance)])
+        elif isinstance(instance, ProductionHouse) and instance in dirty:
+            if inspect(instance).attrs.name.history.has_changes():
+                house_ids.add(instance.house_id)
+    series_ids.discard(None)
+    if series_ids or house_ids:
+        SeriesBrowse.refresh(series_ids, house_ids, session=session, columns=columns)
@@ -0,0 +1,223 @@
+from app import db
+from app.models.feedback import Feedback
+from app.models.web_series import WebSeries
+from app.utils.cache import defer_invalidation
+from collections import Counter, defaultdict
+from datetime import datetime
+from sqlalchemy import case, event, func, inspect
+from sqlalchemy.orm import Session
+
+STARS = (1, 2, 3, 4, 5)
+
+
+class SeriesRatingSummary(db.Model):
+    """
+    Review count, rating sum and per-star histogram of a series
+
+    Kept in step with the feedback table by _apply_feedback_changes in the
+    transaction of every feedback insert, rating change and delete, so
+    reads of a series' rating are a primary key lookup.
+    """
+
+    __tablename__ = "series_rating_summary"
+
+    webseries_id = db.Column(
+        db.String(10),
+        db.ForeignKey("web_series.webseries_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    series = db.relationship(
+        WebSeries,
+        backref=db.backref(
+            "rating_summary", uselist=False, cascade="all, delete-orphan"
+        ),
+    )
+
+    @property
+    def average(self):
+        """Average rating rounded to one decimal, None without reviews"""
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 1)
+
+    def to_dict(self):
+        return {
+            "webseries_id": self.webseries_id,
+            "review_count": self.review_count,
+            "rating_sum": self.rating_sum,
+            "average_rating": self.average,
+            "histogram": {star: getattr(self, f"stars_{star}") for star in STARS},
+        }
+
+    @staticmethod
+    def computed(series_ids=None):
+        """
+        Summaries computed from the feedback table, {webseries_id: values}
+
+        Every series (or each of series_ids) is included, those without
+        feedback with zero counts.
+        """
+        counts = (
+            db.session.query(
+                Feedback.webseries_id.label("webseries_id"),
+                func.count(Feedback.feedback_id).label("review_count"),
+                func.sum(Feedback.rating).label("rating_sum"),
+                *[
+                    func.sum(case((Feedback.rating == star, 1), else_=0)).label(f"stars_{star}")
+                    for star in STARS
+                ],
+            )
+            .group_by(Feedback.webseries_id)
+            .subquery()
+        )
+        columns = ["review_count", "rating_sum"] + [f"stars_{star}" for star in STARS]
+        query = db.session.query(
+            WebSeries.webseries_id, *[counts.c[column] for column in columns]
+        ).outerjoin(counts, counts.c.webseries_id == WebSeries.webseries_id)
+        if series_ids is not None:
+            query = query.filter(WebSeries.webseries_id.in_(list(series_ids)))
+        return {
+            row[0]: dict(zip(columns, (int(value or 0) for value in row[1:])))
+            for row in query
+        }
+
+    @classmethod
+    def rebuild(cls, series_ids=None):
+        """
+        Recompute summaries from feedback and store them
+
+        Returns the IDs whose stored summary was missing or wrong. The caller
+        commits. Feedback written while a full rebuild runs can be missed, so
+        run it when writes are quiet and follow with drift().
+        """
+        expected = cls.computed(series_ids)
+        stored = {row.webseries_id: row for row in cls.query.filter(
+            cls.webseries_id.in_(list(expected))
+        )}
+        changed = []
+        for series_id, values in expected.items():
+            row = stored.get(series_id)
+            if row is None:
+                db.session.add(cls(webseries_id=series_id, **values))
+                changed.append(series_id)
+            elif any(getattr(row, column) != value for column, value in values.items()):
+                for column, value in values.items():
+                    setattr(row, column, value)
+                changed.append(series_id)
+        defer_invalidation(tags=[f"series:{series_id}" for series_id in changed])
+        return changed
+
+    @classmethod
+    def drift(cls, series_ids=None):
+        """
+        Series whose stored summary differs from their feedback
+
+        Returns a list of {webseries_id, stored, expected}, with stored None
+        when the summary row is missing.
+        """
+        expected = cls.computed(series_ids)
+        stored = {row.webseries_id: row for row in cls.query.filter(
+            cls.webseries_id.in_(list(expected))
+        )}
+        drifted = []
+        for series_id, values in sorted(expected.items()):
+            row = stored.get(series_id)
+            actual = (
+                {column: getattr(row, column) for column in values} if row else None
+            )
+            if actual != values:
+                drifted.append(
+                    {"webseries_id": series_id, "stored": actual, "expected": values}
+                )
+        return drifted
+
+    def __repr__(self):
+        return f"<SeriesRatingSummary {self.webseries_id}>"
+
+
+def _committed(state, attribute):
+    """The value an attribute had in the database before this flush"""
+    history = state.attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(state.obj(), attribute)
+
+
+@event.listens_for(Session, "before_flush")
+def _apply_feedback_changes(session, flush_context, instances):
+    """Fold the flush's feedback inserts, rating changes and deletes into summaries"""
+    deltas = defaultdict(Counter)
+    new_series = []
+    deleted_series = set()
+    for instance in session.new:
+        if isinstance(instance, Feedback):
+            deltas[instance.webseries_id][instance.rating] += 1
+        elif isinstance(instance, WebSeries) and instance.rating_summary is None:
+            new_series.append(instance)
+    for instance in session.deleted:
+        if isinstance(instance, Feedback):
+            state = inspect(instance)
+            deltas[_committed(state, "webseries_id")][_committed(state, "rating")] -= 1
+        elif isinstance(instance, WebSeries):
+            deleted_series.add(instance.webseries_id)
+    for instance in session.dirty:
+        if isinstance(instance, Feedback) and session.is_modified(instance):
+            state = inspect(instance)
+            old = (_committed(state, "webseries_id"), _committed(state, "rating"))
+            new = (instance.webseries_id, instance.rating)
+            if old != new:
+                deltas[old[0]][old[1]] -= 1
+                deltas[new[0]][new[1]] += 1
+
+    # New series start with a summary of the feedback flushed with them
+    for series in new_series:
+        stars = deltas.pop(series.webseries_id, Counter())
+        series.rating_summary = SeriesRatingSummary(
+            webseries_id=series.webseries_id,
+            review_count=sum(stars.values()),
+            rating_sum=sum(star * n for star, n in stars.items()),
+            **{f"stars_{star}": stars[star] for star in STARS},
+        )
+
+    table = SeriesRatingSummary.__table__
+    for series_id, stars in deltas.items():
+        stars = {star: change for star, change in stars.items() if change}
+        # The summary goes with a deleted series
+        if not stars or series_id in deleted_series:
+            continue
+        changes = {
+            "review_count": table.c.review_count + sum(stars.values()),
+            "rating_sum": table.c.rating_sum + sum(star * n for star, n in stars.items()),
+            "updated_at": datetime.now(),
+        }
+        for star, change in stars.items():
+            column = table.c[f"stars_{star}"]
+            changes[column.name] = column + change
+        # Increments in SQL, so concurrent reviews of a series cannot
+        # overwrite each other's counts
+        updated = session.execute(
+            table.update().where(table.c.webseries_id == series_id).values(**changes)
+        )
+        if not updated.rowcount:
+            # No summary yet (series predating the table): the database
+            # still holds the feedback as before this flush
+            values = SeriesRatingSummary.computed([series_id]).get(series_id)
+            if values is None:
+                continue
+            values["review_count"] += sum(stars.values())
+            values["rating_sum"] += sum(star * n for star, n in stars.items())
+            for star, change in stars.items():
+                values[f"stars_{star}"] += change
+            session.execute(table.insert().values(webseries_id=series_id, **values))
+        defer_invalidation(tags=[f"series:{series_id}"], session=session)
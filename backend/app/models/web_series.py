@@ -1,5 +1,8 @@
 from app import db
+from app.models.episode import Episode
+from app.models.feedback import Feedback
 from datetime import datetime
+from sqlalchemy import func
 
 
 class WebSeries(db.Model):
@@ -52,11 +55,73 @@ class WebSeries(db.Model):
         cascade="all, delete-orphan",
     )
 
-    def to_dict(self, include_episodes=False):
+    @staticmethod
+    def list_stats(series_ids):
+        """
+        Episode counts and average ratings of several series
+
+        Returns {webseries_id: (num_episodes, rating)} from one grouped query
+        for the episode counts and one primary key lookup of the series'
+        rating summaries, so a list page costs two queries rather than two per
+        series. Series without a summary row yet are averaged from a grouped
+        query on idx_feedback_series_rating, without reading feedback rows.
+        """
+        from app.models.series_rating_summary import SeriesRatingSummary
+
+        series_ids = list(series_ids)
+        if not series_ids:
+            return {}
+        episode_counts = dict(
+            db.session.query(Episode.webseries_id, func.count(Episode.episode_id))
+            .filter(Episode.webseries_id.in_(series_ids))
+            .group_by(Episode.webseries_id)
+            .all()
+        )
+        totals = {
+            series_id: (total, count)
+            for series_id, total, count in db.session.query(
+                SeriesRatingSummary.webseries_id,
+                SeriesRatingSummary.rating_sum,
+                SeriesRatingSummary.review_count,
+            ).filter(SeriesRatingSummary.webseries_id.in_(series_ids))
+        }
+        unsummarized = [series_id for series_id in series_ids if series_id not in totals]
+        if unsummarized:
+            totals.update(
+                (series_id, (total, count))
+                for series_id, total, count in (
+                    db.session.query(
+                        Feedback.webseries_id,
+                        func.sum(Feedback.rating),
+                        func.count(Feedback.rating),
+                    )
+                    .filter(Feedback.webseries_id.in_(unsummarized))
+                    .group_by(Feedback.webseries_id)
+                )
+            )
+        ratings = {
+            series_id: round(total / count, 1)
+            for series_id, (total, count) in totals.items()
+            if count
+        }
+        return {
+            series_id: (episode_counts.get(series_id, 0), ratings.get(series_id))
+            for series_id in series_ids
+        }
+
+    def to_dict(self, include_episodes=False, stats=None):
+        """
+        stats is this series' (num_episodes, rating) from list_stats, which
+        list pages compute for all their series at once
+        """
+        if stats is None:
+            stats = WebSeries.list_stats([self.webseries_id])[self.webseries_id]
+        num_episodes, rating = stats
+
         data = {
             "webseries_id": self.webseries_id,
             "title": self.title,
-            "num_episodes": self.episodes.count(),  # Count actual episodes
+            "num_episodes": num_episodes,  # Count actual episodes
             "type": self.type,
             "house_id": self.house_id,
             "created_at": self.created_at.isoformat() if self.created_at else None,
@@ -65,13 +130,8 @@ class WebSeries(db.Model):
         if include_episodes:
             data["episodes"] = [ep.to_dict() for ep in self.episodes]
 
-        # Calculate average rating from feedback
-        feedbacks = self.feedbacks.all()
-        if feedbacks:
-            avg_rating = sum(f.rating for f in feedbacks) / len(feedbacks)
-            data["rating"] = round(avg_rating, 1)
-        else:
-            data["rating"] = None
+        # Average rating from feedback
+        data["rating"] = rating
 
         return data
 
@@ -1,12 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, g, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.viewer_account import ViewerAccount
 from app.models.web_series import WebSeries
 from app.models.episode import Episode
 from app.models.feedback import Feedback
+from app.models.series_rating_summary import SeriesRatingSummary
 from app.models.country import Country
-from app.utils.cache import cache_response, invalidate_cache
+from app.utils.cache import cache_response, invalidate_cache, page_size
 from sqlalchemy import func, extract
 from datetime import datetime, date
 from functools import wraps
@@ -27,6 +28,8 @@ def admin_required(f):
         if not user or user.account_type != "Admin":
             return jsonify({"error": "Admin access required"}), 403
 
+        # Lets cache_response(vary_on_role=True) key responses by role
+        g.current_role = user.account_type
         return f(*args, **kwargs)
 
     return wrapper
@@ -35,13 +38,23 @@ def admin_required(f):
 # ==================== User Management ====================
 
 
+# Views that show accounts; changed by the user management endpoints below
+ACCOUNT_VIEWS = ['admin_users', 'admin_logs', 'admin_history', 'admin_stats']
+
+
 @admin_bp.route("/users", methods=["GET"])
 @admin_required
+@cache_response(
+    timeout=120,
+    key_prefix='admin_users',
+    vary_on_role=True,
+    query_args={"page": 1, "per_page": 20, "search": "", "account_type": "", "is_active": ""},
+)
 def get_all_users():
-    """Get all users with filtering and pagination"""
+    """Get all users with filtering and pagination (cached per role for 2 minutes)"""
     try:
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
+        per_page = request.args.get("per_page", 20, type=page_size)
         search = request.args.get("search", "")
         account_type = request.args.get("account_type", "")
         is_active = request.args.get("is_active", "")
@@ -101,6 +114,7 @@ def get_user(account_id):
 
 @admin_bp.route("/users/<account_id>/role", methods=["PUT"])
 @admin_required
+@invalidate_cache(ACCOUNT_VIEWS)
 def change_user_role(account_id):
     """Change user account type"""
     try:
@@ -134,6 +148,7 @@ def change_user_role(account_id):
 
 @admin_bp.route("/users/<account_id>/status", methods=["PUT"])
 @admin_required
+@invalidate_cache(ACCOUNT_VIEWS)
 def toggle_user_status(account_id):
     """Activate or deactivate user account"""
     try:
@@ -168,6 +183,7 @@ def toggle_user_status(account_id):
 
 @admin_bp.route("/users/<account_id>", methods=["DELETE"])
 @admin_required
+@invalidate_cache(ACCOUNT_VIEWS)
 def delete_user(account_id):
     """Delete user account"""
     try:
@@ -191,6 +207,7 @@ def delete_user(account_id):
 
 @admin_bp.route("/users/<account_id>/reset-password", methods=["POST"])
 @admin_required
+@invalidate_cache(['admin_history'])
 def reset_user_password(account_id):
     """Reset user password"""
     try:
@@ -245,7 +262,7 @@ def reset_user_password(account_id):
 
 @admin_bp.route("/stats", methods=["GET"])
 @admin_required
-@cache_response(timeout=120, key_prefix='admin_stats')
+@cache_response(timeout=120, key_prefix='admin_stats', query_args={}, adaptive=False)
 def get_system_stats():
     """Get system-wide statistics (cached for 2 minutes)"""
     try:
@@ -259,7 +276,6 @@ def get_system_stats():
         # Series statistics
         total_series = WebSeries.query.count()
         total_episodes = Episode.query.count()
-        total_feedback = Feedback.query.count()
 
         # Get current month series count
         current_month = datetime.now().month
@@ -273,9 +289,14 @@ def get_system_stats():
             else 0
         )
 
-        # Average rating
-        avg_rating_result = db.session.query(func.avg(Feedback.rating)).scalar()
-        avg_rating = round(float(avg_rating_result), 2) if avg_rating_result else 0
+        # Feedback count and average rating, from the per-series summaries
+        # rather than the feedback rows
+        rating_sum, review_count = db.session.query(
+            func.sum(SeriesRatingSummary.rating_sum),
+            func.sum(SeriesRatingSummary.review_count),
+        ).one()
+        total_feedback = int(review_count or 0)
+        avg_rating = round(int(rating_sum) / total_feedback, 2) if total_feedback else 0
 
         return (
             jsonify(
@@ -310,7 +331,7 @@ def get_system_stats():
 
 @admin_bp.route("/countries", methods=["GET"])
 @admin_required
-@cache_response(timeout=3600, key_prefix='country')
+@cache_response(timeout=3600, key_prefix='country', query_args={})
 def get_all_countries():
     """Get all countries (cached for 60 minutes)"""
     try:
@@ -326,6 +347,7 @@ def get_all_countries():
 
 @admin_bp.route("/countries", methods=["POST"])
 @admin_required
+@invalidate_cache(['country'])
 def create_country():
     """Create a new country"""
     try:
@@ -361,6 +383,7 @@ def create_country():
 
 @admin_bp.route("/countries/<country_name>", methods=["DELETE"])
 @admin_required
+@invalidate_cache(['country'])
 def delete_country(country_name):
     """Delete a country"""
     try:
@@ -395,8 +418,11 @@ def delete_country(country_name):
 
 @admin_bp.route("/logs", methods=["GET"])
 @admin_required
+@cache_response(
+    timeout=60, key_prefix='admin_logs', vary_on_role=True, query_args={}, adaptive=False
+)
 def get_system_logs():
-    """Get recent system activity logs"""
+    """Get recent system activity logs (cached per role for 1 minute)"""
     try:
         # Get recent user registrations
         recent_users = (
@@ -500,8 +526,15 @@ def backup_database():
 
 @admin_bp.route("/history/recent", methods=["GET"])
 @admin_required
+@cache_response(
+    timeout=60,
+    key_prefix='admin_history',
+    vary_on_role=True,
+    query_args={"limit": 50},
+    adaptive=False,
+)
 def get_recent_history():
-    """Get recent changes from all history tables"""
+    """Get recent changes from all history tables (cached per role for 1 minute)"""
     try:
         limit = request.args.get("limit", 50, type=int)
 
@@ -607,8 +640,11 @@ def get_recent_history():
 
 @admin_bp.route("/history/stats", methods=["GET"])
 @admin_required
+@cache_response(
+    timeout=60, key_prefix='admin_history', vary_on_role=True, query_args={}, adaptive=False
+)
 def get_history_stats():
-    """Get history statistics"""
+    """Get history statistics (cached per role for 1 minute)"""
     try:
         # Count records in each history table
         account_count = db.session.execute(
@@ -688,6 +724,8 @@ def clear_cache_pattern(pattern):
     from app.utils.cache import cache
     
     try:
+        # Bumping the generation invalidates instantly; the scan reclaims memory
+        cache.invalidate(pattern)
         cache.delete_pattern(f"{pattern}:*")
         return (
             jsonify({"message": f"Cache pattern '{pattern}:*' cleared successfully"}),
@@ -700,32 +738,59 @@ def clear_cache_pattern(pattern):
 @admin_bp.route("/cache/stats", methods=["GET"])
 @admin_required
 def cache_stats():
-    """Get cache statistics"""
-    from app.utils.cache import cache
-    
+    """
+    Get cache statistics per key prefix
+
+    Counters are gathered by cache_response in every worker and flushed to
+    Redis periodically, so figures may lag by CACHE_METRICS_FLUSH_INTERVAL.
+    ttls lists the TTL each prefix currently gets in the answering worker,
+    next to the timeout its views declare (see AdaptiveTTL).
+    """
+    from app.utils.cache import cache, cached_namespaces
+
     try:
-        if not cache.redis_client:
-            return jsonify({"error": "Redis not connected"}), 503
-        
-        info = cache.redis_client.info('stats')
-        keyspace = cache.redis_client.info('keyspace')
-        
-        # Get sample keys for each pattern
-        patterns = ['series', 'series_detail', 'episode', 'feedback']
-        keys_by_pattern = {}
-        
-        for pattern in patterns:
-            keys = cache.redis_client.keys(f"{pattern}:*")
-            keys_by_pattern[pattern] = len(keys)
-        
+        if not cache.available():
+            return jsonify({"error": "Redis not connected", "breaker": cache.health()}), 503
+
+        cache.flush_metrics()
+
         return jsonify({
             "status": "connected",
-            "total_keys": info.get('keyspace_hits', 0) + info.get('keyspace_misses', 0),
-            "hits": info.get('keyspace_hits', 0),
-            "misses": info.get('keyspace_misses', 0),
-            "keys_by_pattern": keys_by_pattern,
-            "keyspace_info": keyspace
+            "backend": cache.name,
+            **cache.stats(),
+            "prefixes": cache.metrics_report(sorted(cached_namespaces)),
+            "breaker": cache.health(),
+            "invalidation_queue": cache.invalidations.stats(),
+            "ttls": {
+                "adaptive": current_app.config.get("CACHE_ADAPTIVE_TTL", False),
+                "prefixes": cache.ttls.report(),
+            },
         }), 200
-        
+
     except Exception as e:
         return jsonify({"error": "Failed to get cache stats", "message": str(e)}), 500
+
+
+@admin_bp.route("/cache/memory", methods=["GET"])
+@admin_required
+def cache_memory():
+    """
+    Estimate Redis memory use per key prefix
+
+    Samples up to `sample` keys (default CACHE_MEMORY_SAMPLE_SIZE) with SCAN
+    and MEMORY USAGE, and reports bytes, key counts, TTL distribution and
+    the `largest` biggest entries of each prefix.
+    """
+    from app.utils.cache import cache
+
+    try:
+        sample = request.args.get("sample", None, type=int)
+        largest = request.args.get("largest", 10, type=int)
+        report = cache.memory_report(sample, max(0, min(largest, 100)))
+        if report is None:
+            return jsonify({"error": "Redis not connected", "breaker": cache.health()}), 503
+
+        return jsonify(report), 200
+
+    except Exception as e:
+        return jsonify({"error": "Failed to analyze cache memory", "message": str(e)}), 500
@@ -8,6 +8,7 @@ from flask_jwt_extended import (
 from app import db
 from app.models.viewer_account import ViewerAccount
 from app.models.country import Country
+from app.utils.cache import invalidate_namespaces
 from app.utils.security import generate_id, sanitize_input
 from datetime import date
 import re
@@ -95,6 +96,8 @@ def register():
         new_user.set_password(data["password"])
 
         db.session.add(new_user)
+        # New accounts show up in the admin user list and activity logs
+        invalidate_namespaces('admin_users', 'admin_logs', 'admin_stats')
         db.session.commit()
 
         # Generate tokens
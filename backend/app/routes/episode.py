@@ -4,19 +4,43 @@ from app import db
 from app.models.episode import Episode
 from app.models.viewer_account import ViewerAccount
 from app.utils.security import generate_id, sanitize_input
-from app.utils.cache import cache_response, invalidate_cache
+from app.utils.cache import cache_response, invalidate_entities, page_size
 from sqlalchemy import or_
 
 episode_bp = Blueprint("episode", __name__)
 
 
+def episode_list_tags(data):
+    """
+    Cache tags for a page of episodes: one per episode shown, plus the
+    series whose episode list it is (new episodes change its membership),
+    or episodes:all for unfiltered and search pages
+    """
+    tags = [f"episode:{ep['episode_id']}" for ep in data["episodes"]]
+    webseries_id = request.args.get("webseries_id")
+    if webseries_id and not request.args.get("search"):
+        tags.append(f"episodes_of:{webseries_id}")
+    else:
+        tags.append("episodes:all")
+    return tags
+
+
+def episode_detail_tags(data):
+    return [f"episode:{data['episode']['episode_id']}"]
+
+
 @episode_bp.route("", methods=["GET"])
-@cache_response(timeout=300, key_prefix='episode')
+@cache_response(
+    timeout=300,
+    key_prefix='episode',
+    tags=episode_list_tags,
+    query_args={"page": 1, "per_page": 20, "webseries_id": "", "search": ""},
+)
 def get_all_episodes():
     """Get all episodes with search functionality (cached for 5 minutes)"""
     try:
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
+        per_page = request.args.get("per_page", 20, type=page_size)
         webseries_id = request.args.get("webseries_id")
         search = request.args.get("search", "")
 
@@ -53,9 +77,16 @@ def get_all_episodes():
 
 
 @episode_bp.route("/<episode_id>", methods=["GET"])
-@cache_response(timeout=600, key_prefix='episode_detail')
+@cache_response(
+    timeout=600,
+    key_prefix='episode_detail',
+    tags=episode_detail_tags,
+    query_args={},
+    negative_timeout=60,
+    negative_tag="episode:{episode_id}",
+)
 def get_episode(episode_id):
-    """Get single episode (cached for 10 minutes)"""
+    """Get single episode (cached for 10 minutes, not-found for 1 minute)"""
     try:
         episode = Episode.query.get(episode_id)
 
@@ -70,7 +101,6 @@ def get_episode(episode_id):
 
 @episode_bp.route("", methods=["POST"])
 @jwt_required()
-@invalidate_cache(['episode:*', 'episode_detail:*', 'series:*', 'series_detail:*'])
 def create_episode():
     """Create new episode (Employee/Admin only) - invalidates cache"""
     try:
@@ -102,6 +132,16 @@ def create_episode():
         )
 
         db.session.add(new_episode)
+
+        # The series' episode count and episode lists change
+        webseries_id = new_episode.webseries_id
+        invalidate_entities(
+            f"episode:{episode_id}",
+            f"series:{webseries_id}",
+            f"episodes_of:{webseries_id}",
+            "episodes:all",
+        )
+
         db.session.commit()
 
         return (
@@ -121,7 +161,6 @@ def create_episode():
 
 @episode_bp.route("/<episode_id>", methods=["PUT"])
 @jwt_required()
-@invalidate_cache(['episode:*', 'episode_detail:*', 'series:*', 'series_detail:*'])
 def update_episode(episode_id):
     """Update episode (Employee/Admin only) - invalidates cache"""
     try:
@@ -145,6 +184,12 @@ def update_episode(episode_id):
         if "release_date" in data:
             episode.release_date = data["release_date"]
 
+        tags = [f"episode:{episode_id}", f"series_episodes:{episode.webseries_id}"]
+        if "title" in data:
+            # Title changes which search pages list the episode
+            tags += ["episodes:all", f"episode_title:{episode_id}"]
+        invalidate_entities(*tags)
+
         db.session.commit()
 
         return (
@@ -164,7 +209,6 @@ def update_episode(episode_id):
 
 @episode_bp.route("/<episode_id>", methods=["DELETE"])
 @jwt_required()
-@invalidate_cache(['episode:*', 'episode_detail:*', 'series:*', 'series_detail:*'])
 def delete_episode(episode_id):
     """Delete episode (Admin only) - invalidates cache"""
     try:
@@ -178,7 +222,17 @@ def delete_episode(episode_id):
         if not episode:
             return jsonify({"error": "Episode not found"}), 404
 
+        webseries_id = episode.webseries_id
         db.session.delete(episode)
+
+        invalidate_entities(
+            f"episode:{episode_id}",
+            f"episode_title:{episode_id}",
+            f"series:{webseries_id}",
+            f"episodes_of:{webseries_id}",
+            "episodes:all",
+        )
+
         db.session.commit()
 
         return jsonify({"message": "Episode deleted successfully"}), 200
@@ -3,24 +3,48 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.feedback import Feedback
 from app.utils.security import generate_id, sanitize_input
-from app.utils.cache import cache_response, invalidate_cache
+from app.utils.cache import cache_response, invalidate_entities, page_size
 from datetime import date
 from sqlalchemy import or_
 
 feedback_bp = Blueprint("feedback", __name__)
 
 
+def feedback_list_tags(data):
+    """
+    Cache tags for a page of feedback: one per feedback shown, plus the
+    series whose reviews it lists, or feedback:all for unfiltered and
+    search pages
+    """
+    tags = [f"feedback:{f['feedback_id']}" for f in data["feedback"]]
+    webseries_id = request.args.get("webseries_id")
+    if webseries_id and not request.args.get("search"):
+        tags.append(f"feedback_of:{webseries_id}")
+    else:
+        tags.append("feedback:all")
+    return tags
+
+
+def feedback_detail_tags(data):
+    return [f"feedback:{data['feedback']['feedback_id']}"]
+
+
 @feedback_bp.route("", methods=["GET"])
-@cache_response(timeout=180, key_prefix='feedback')
+@cache_response(
+    timeout=180,
+    key_prefix='feedback',
+    tags=feedback_list_tags,
+    query_args={"page": 1, "per_page": 20, "webseries_id": "", "search": ""},
+)
 def get_all_feedback():
     """Get all feedback with search functionality (cached for 3 minutes)"""
     try:
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
+        per_page = request.args.get("per_page", 20, type=page_size)
         webseries_id = request.args.get("webseries_id")
         search = request.args.get("search", "")
 
-        query = Feedback.query
+        query = Feedback.query.options(Feedback.with_viewer())
 
         if webseries_id:
             query = query.filter_by(webseries_id=webseries_id)
@@ -54,11 +78,18 @@ def get_all_feedback():
 
 
 @feedback_bp.route("/<feedback_id>", methods=["GET"])
-@cache_response(timeout=300, key_prefix='feedback_detail')
+@cache_response(
+    timeout=300,
+    key_prefix='feedback_detail',
+    tags=feedback_detail_tags,
+    query_args={},
+    negative_timeout=60,
+    negative_tag="feedback:{feedback_id}",
+)
 def get_feedback(feedback_id):
-    """Get single feedback (cached for 5 minutes)"""
+    """Get single feedback (cached for 5 minutes, not-found for 1 minute)"""
     try:
-        feedback = Feedback.query.get(feedback_id)
+        feedback = Feedback.query.options(Feedback.with_viewer()).get(feedback_id)
 
         if not feedback:
             return jsonify({"error": "Feedback not found"}), 404
@@ -71,7 +102,6 @@ def get_feedback(feedback_id):
 
 @feedback_bp.route("", methods=["POST"])
 @jwt_required()
-@invalidate_cache(['feedback:*', 'feedback_detail:*', 'series:*', 'series_detail:*'])
 def create_feedback():
     """Create new feedback - invalidates cache"""
     try:
@@ -138,6 +168,16 @@ def create_feedback():
         )
 
         db.session.add(new_feedback)
+
+        # The series rating and its review lists change
+        webseries_id = new_feedback.webseries_id
+        invalidate_entities(
+            f"feedback:{feedback_id}",
+            f"series:{webseries_id}",
+            f"feedback_of:{webseries_id}",
+            "feedback:all",
+        )
+
         db.session.commit()
 
         print(f"[DEBUG] Feedback created successfully: {feedback_id}")
@@ -163,7 +203,6 @@ def create_feedback():
 
 @feedback_bp.route("/<feedback_id>", methods=["PUT"])
 @jwt_required()
-@invalidate_cache(['feedback:*', 'feedback_detail:*', 'series:*', 'series_detail:*'])
 def update_feedback(feedback_id):
     """Update feedback (owner only) - invalidates cache"""
     try:
@@ -188,6 +227,14 @@ def update_feedback(feedback_id):
             # Sanitize to prevent XSS attacks
             feedback.feedback_text = sanitize_input(data["feedback_text"])
 
+        tags = [f"feedback:{feedback_id}"]
+        if "rating" in data:
+            tags.append(f"series:{feedback.webseries_id}")
+        if "feedback_text" in data:
+            # Text changes which search pages list the feedback
+            tags.append("feedback:all")
+        invalidate_entities(*tags)
+
         db.session.commit()
 
         return (
@@ -207,7 +254,6 @@ def update_feedback(feedback_id):
 
 @feedback_bp.route("/<feedback_id>", methods=["DELETE"])
 @jwt_required()
-@invalidate_cache(['feedback:*', 'feedback_detail:*', 'series:*', 'series_detail:*'])
 def delete_feedback(feedback_id):
     """Delete feedback (owner or admin) - invalidates cache"""
     try:
@@ -224,7 +270,16 @@ def delete_feedback(feedback_id):
         if feedback.account_id != current_user_id and user.account_type != "Admin":
             return jsonify({"error": "Unauthorized"}), 403
 
+        webseries_id = feedback.webseries_id
         db.session.delete(feedback)
+
+        invalidate_entities(
+            f"feedback:{feedback_id}",
+            f"series:{webseries_id}",
+            f"feedback_of:{webseries_id}",
+            "feedback:all",
+        )
+
         db.session.commit()
 
         return jsonify({"message": "Feedback deleted successfully"}), 200
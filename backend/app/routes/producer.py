@@ -4,20 +4,24 @@ from app import db
 from app.models.producer import Producer
 from app.models.viewer_account import ViewerAccount
 from app.utils.security import generate_id
-from app.utils.cache import cache_response, invalidate_cache
+from app.utils.cache import cache_response, invalidate_cache, invalidate_entities, page_size
 from sqlalchemy import or_
 
 producer_bp = Blueprint("producer", __name__)
 
 
 @producer_bp.route("", methods=["GET"])
-@cache_response(timeout=600, key_prefix='producer')
+@cache_response(
+    timeout=600,
+    key_prefix='producer',
+    query_args={"page": 1, "per_page": 20, "search": ""},
+)
 def get_all_producers():
     """Get all producers with pagination and search"""
     try:
         # Pagination parameters
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
+        per_page = request.args.get("per_page", 20, type=page_size)
 
         # Search parameters
         search = request.args.get("search", "")
@@ -54,9 +58,15 @@ def get_all_producers():
 
 
 @producer_bp.route("<producer_id>", methods=["GET"])
-@cache_response(timeout=600, key_prefix='producer_detail')
+@cache_response(
+    timeout=600,
+    key_prefix='producer_detail',
+    query_args={},
+    negative_timeout=60,
+    negative_tag="producer:{producer_id}",
+)
 def get_producer(producer_id):
-    """Get single producer details (cached for 10 minutes)"""
+    """Get single producer details (cached for 10 minutes, not-found for 1 minute)"""
     try:
         producer = Producer.query.get(producer_id)
 
@@ -71,7 +81,7 @@ def get_producer(producer_id):
 
 @producer_bp.route("", methods=["POST"])
 @jwt_required()
-@invalidate_cache(['producer:*', 'producer_detail:*'])
+@invalidate_cache(['producer'])
 def create_producer():
     """Create new producer (Employee/Admin only)"""
     try:
@@ -120,6 +130,10 @@ def create_producer():
         )
 
         db.session.add(new_producer)
+
+        # Drops a cached not-found for the new ID
+        invalidate_entities(f"producer:{producer_id}")
+
         db.session.commit()
 
         return (
@@ -139,7 +153,7 @@ def create_producer():
 
 @producer_bp.route("/<producer_id>", methods=["PUT"])
 @jwt_required()
-@invalidate_cache(['producer:*', 'producer_detail:*'])
+@invalidate_cache(['producer', 'producer_detail'])
 def update_producer(producer_id):
     """Update producer information (Employee/Admin only)"""
     try:
@@ -179,6 +193,9 @@ def update_producer(producer_id):
         if "nationality" in data:
             producer.nationality = data["nationality"]
 
+        if data.keys() & {"first_name", "last_name"}:
+            invalidate_entities(f"producer_name:{producer_id}")
+
         db.session.commit()
 
         return (
@@ -198,7 +215,7 @@ def update_producer(producer_id):
 
 @producer_bp.route("/<producer_id>", methods=["DELETE"])
 @jwt_required()
-@invalidate_cache(['producer:*', 'producer_detail:*'])
+@invalidate_cache(['producer', 'producer_detail'])
 def delete_producer(producer_id):
     """Delete producer (Admin only)"""
     try:
@@ -213,6 +230,8 @@ def delete_producer(producer_id):
             return jsonify({"error": "Producer not found"}), 404
 
         db.session.delete(producer)
+
+        invalidate_entities(f"producer_name:{producer_id}")
         db.session.commit()
 
         return jsonify({"message": "Producer deleted successfully"}), 200
@@ -4,19 +4,23 @@ from app import db
 from app.models.production_house import ProductionHouse
 from app.models.viewer_account import ViewerAccount
 from app.utils.security import generate_id
-from app.utils.cache import cache_response, invalidate_cache
+from app.utils.cache import cache_response, invalidate_cache, invalidate_entities, page_size
 from sqlalchemy import or_
 
 production_house_bp = Blueprint("production_house", __name__)
 
 
 @production_house_bp.route("", methods=["GET"])
-@cache_response(timeout=600, key_prefix='production_house')
+@cache_response(
+    timeout=600,
+    key_prefix='production_house',
+    query_args={"page": 1, "per_page": 20, "search": ""},
+)
 def get_all_production_houses():
     """Get all production houses with search functionality (cached for 10 minutes)"""
     try:
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
+        per_page = request.args.get("per_page", 20, type=page_size)
         search = request.args.get("search", "")
 
         query = ProductionHouse.query
@@ -53,10 +57,23 @@ def get_all_production_houses():
         )
 
 
+def house_detail_tags(data):
+    """Cache tags for a house page: the house and each series it lists"""
+    house = data["production_house"]
+    return [f"house:{house['house_id']}"] + [
+        f"series:{s['webseries_id']}" for s in house["web_series"]
+    ]
+
+
 @production_house_bp.route("<house_id>", methods=["GET"])
-@cache_response(timeout=900, key_prefix='production_house_detail')
+@cache_response(timeout=900, key_prefix='production_house_detail', stale_timeout=1800,
+                tags=house_detail_tags, query_args={},
+                negative_timeout=60, negative_tag="house:{house_id}")
 def get_production_house(house_id):
-    """Get single production house (cached for 15 minutes)"""
+    """
+    Get single production house (cached for 15 minutes, refreshed in background;
+    not-found for 1 minute)
+    """
     try:
         house = ProductionHouse.query.get(house_id)
 
@@ -74,7 +91,7 @@ def get_production_house(house_id):
 
 @production_house_bp.route("", methods=["POST"])
 @jwt_required()
-@invalidate_cache(['production_house:*', 'production_house_detail:*'])
+@invalidate_cache(['production_house'])
 def create_production_house():
     """Create new production house (Admin only) - invalidates cache"""
     try:
@@ -111,6 +128,10 @@ def create_production_house():
         )
 
         db.session.add(new_house)
+
+        # Drops a cached not-found for the new ID
+        invalidate_entities(f"house:{house_id}")
+
         db.session.commit()
 
         return (
@@ -133,7 +154,7 @@ def create_production_house():
 
 @production_house_bp.route("/<house_id>", methods=["PUT"])
 @jwt_required()
-@invalidate_cache(['production_house:*', 'production_house_detail:*'])
+@invalidate_cache(['production_house'])
 def update_production_house(house_id):
     """Update production house (Admin only) - invalidates cache"""
     try:
@@ -162,6 +183,11 @@ def update_production_house(house_id):
         if "nationality" in data:
             house.nationality = data["nationality"]
 
+        tags = [f"house:{house_id}"]
+        if "name" in data:
+            tags.append(f"house_name:{house_id}")
+        invalidate_entities(*tags)
+
         db.session.commit()
 
         return (
@@ -184,7 +210,7 @@ def update_production_house(house_id):
 
 @production_house_bp.route("/<house_id>", methods=["DELETE"])
 @jwt_required()
-@invalidate_cache(['production_house:*', 'production_house_detail:*', 'series:*'])
+@invalidate_cache(['production_house', 'production_house_detail', 'series'])
 def delete_production_house(house_id):
     """Delete production house (Admin only) - invalidates cache"""
     try:
@@ -199,6 +225,8 @@ def delete_production_house(house_id):
             return jsonify({"error": "Production house not found"}), 404
 
         db.session.delete(house)
+
+        invalidate_entities(f"house_name:{house_id}")
         db.session.commit()
 
         return jsonify({"message": "Production house deleted successfully"}), 200
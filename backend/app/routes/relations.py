@@ -17,30 +17,63 @@ from app.models.series_contract import SeriesContract
 from app.models.subtitle_language import SubtitleLanguage
 from app.models.web_series_release import WebSeriesRelease
 from app.utils.security import generate_id
-from app.utils.cache import cache_response, invalidate_cache
+from app.utils.cache import cache_response, invalidate_cache, page_size
 from datetime import datetime
 
 relations_bp = Blueprint("relations", __name__)
 
 
+# Relation listings embed other entities' display names, so they are tagged
+# with those entities and dropped when one is renamed. Writes to the
+# relations themselves still bump the whole namespace, since they can move
+# rows between filtered pages.
+
+
+def affiliation_tags(data):
+    tags = set()
+    for a in data["affiliations"]:
+        tags.add(f"producer_name:{a['producer_id']}")
+        tags.add(f"house_name:{a['house_id']}")
+    return tags
+
+
+def telecast_tags(data):
+    return {f"episode_title:{t['episode_id']}" for t in data["telecasts"]}
+
+
+def series_title_tags(collection):
+    def tags(data):
+        return {f"series_title:{item['webseries_id']}" for item in data[collection]}
+    return tags
+
+
 # ==================== Producer Affiliation ====================
 
 
 @relations_bp.route("/producer-affiliations", methods=["GET"])
-@cache_response(timeout=600, key_prefix='affiliation')
+@cache_response(timeout=600, key_prefix='affiliation', stale_timeout=1200,
+                tags=affiliation_tags,
+                query_args={"page": 1, "per_page": 100, "producer_id": "",
+                            "house_id": "", "search": ""})
 def get_all_affiliations():
-    """Get all producer affiliations (cached for 10 minutes)"""
+    """Get all producer affiliations (cached for 10 minutes, refreshed in background)"""
     try:
         from app.models.producer import Producer
         from app.models.production_house import ProductionHouse
 
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 100, type=int)
+        per_page = request.args.get("per_page", 100, type=page_size)
         producer_id = request.args.get("producer_id", "", type=str)
         house_id = request.args.get("house_id", "", type=str)
         search = request.args.get("search", "", type=str)
 
-        query = ProducerAffiliation.query
+        # Producer and house names come from the same joined SELECT
+        query = (
+            ProducerAffiliation.query
+            .outerjoin(Producer, Producer.producer_id == ProducerAffiliation.producer_id)
+            .outerjoin(ProductionHouse, ProductionHouse.house_id == ProducerAffiliation.house_id)
+            .add_columns(Producer.first_name, Producer.last_name, ProductionHouse.name)
+        )
 
         # Filter by producer_id
         if producer_id:
@@ -65,20 +98,15 @@ def get_all_affiliations():
 
         # Enrich with producer and house names
         result_list = []
-        for a in pagination.items:
+        for a, first_name, last_name, house_name in pagination.items:
             item_dict = a.to_dict()
-            producer = Producer.query.get(a.producer_id)
-            house = ProductionHouse.query.get(a.house_id)
 
-            if producer:
-                item_dict["producer_name"] = f"{producer.first_name} {producer.last_name}"
+            if first_name is not None:
+                item_dict["producer_name"] = f"{first_name} {last_name}"
             else:
                 item_dict["producer_name"] = None
 
-            if house:
-                item_dict["house_name"] = house.name
-            else:
-                item_dict["house_name"] = None
+            item_dict["house_name"] = house_name
 
             result_list.append(item_dict)
 
@@ -102,7 +130,7 @@ def get_all_affiliations():
 
 @relations_bp.route("/producer-affiliations", methods=["POST"])
 @jwt_required()
-@invalidate_cache(['affiliation:*'])
+@invalidate_cache(['affiliation'])
 def create_affiliation():
     """Create producer affiliation (Employee/Admin only)"""
     try:
@@ -161,7 +189,7 @@ def create_affiliation():
     "/producer-affiliations/<producer_id>/<house_id>", methods=["PUT"]
 )
 @jwt_required()
-@invalidate_cache(['affiliation:*'])
+@invalidate_cache(['affiliation'])
 def update_affiliation(producer_id, house_id):
     """Update producer affiliation (Employee/Admin only)"""
     try:
@@ -216,7 +244,7 @@ def update_affiliation(producer_id, house_id):
     "/producer-affiliations/<producer_id>/<house_id>", methods=["DELETE"]
 )
 @jwt_required()
-@invalidate_cache(['affiliation:*'])
+@invalidate_cache(['affiliation'])
 def delete_affiliation(producer_id, house_id):
     """Delete producer affiliation (Admin only)"""
     try:
@@ -249,23 +277,33 @@ def delete_affiliation(producer_id, house_id):
 
 
 @relations_bp.route("/telecasts", methods=["GET"])
-@cache_response(timeout=300, key_prefix='telecast')
+@cache_response(timeout=300, key_prefix='telecast', stale_timeout=600,
+                tags=telecast_tags,
+                query_args={"page": 1, "per_page": 100, "episode_id": "",
+                            "webseries_id": "", "search": ""})
 def get_all_telecasts():
-    """Get all telecasts (cached for 5 minutes)"""
+    """Get all telecasts (cached for 5 minutes, refreshed in background)"""
     try:
         from app.models.episode import Episode
+        from app.models.web_series import WebSeries
 
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 100, type=int)
+        per_page = request.args.get("per_page", 100, type=page_size)
         episode_id = request.args.get("episode_id", "", type=str)
         webseries_id = request.args.get("webseries_id", "", type=str)
         search = request.args.get("search", "", type=str)
 
-        query = Telecast.query
+        # Episode and series titles come from the same joined SELECT
+        query = (
+            Telecast.query
+            .outerjoin(Episode, Episode.episode_id == Telecast.episode_id)
+            .outerjoin(WebSeries, WebSeries.webseries_id == Episode.webseries_id)
+            .add_columns(Episode.title, WebSeries.title)
+        )
 
         # Filter by webseries_id (via episode join)
         if webseries_id:
-            query = query.join(Episode).filter(Episode.webseries_id == webseries_id)
+            query = query.filter(Episode.webseries_id == webseries_id)
 
         # Filter by episode_id
         if episode_id:
@@ -286,18 +324,10 @@ def get_all_telecasts():
 
         # Enrich with episode and series info
         result_list = []
-        for t in pagination.items:
+        for t, episode_title, series_title in pagination.items:
             item_dict = t.to_dict()
-            episode = Episode.query.get(t.episode_id)
-            if episode:
-                item_dict["episode_title"] = episode.title
-                # Get series title via episode
-                from app.models.web_series import WebSeries
-                series = WebSeries.query.get(episode.webseries_id)
-                item_dict["series_title"] = series.title if series else None
-            else:
-                item_dict["episode_title"] = None
-                item_dict["series_title"] = None
+            item_dict["episode_title"] = episode_title
+            item_dict["series_title"] = series_title
             result_list.append(item_dict)
 
         return (
@@ -317,7 +347,7 @@ def get_all_telecasts():
 
 @relations_bp.route("/telecasts", methods=["POST"])
 @jwt_required()
-@invalidate_cache(['telecast:*'])
+@invalidate_cache(['telecast'])
 def create_telecast():
     """Create telecast (Employee/Admin only)"""
     try:
@@ -364,7 +394,7 @@ def create_telecast():
 
 @relations_bp.route("/telecasts/<telecast_id>", methods=["PUT"])
 @jwt_required()
-@invalidate_cache(['telecast:*'])
+@invalidate_cache(['telecast'])
 def update_telecast(telecast_id):
     """Update telecast (Employee/Admin only)"""
     try:
@@ -407,7 +437,7 @@ def update_telecast(telecast_id):
 
 @relations_bp.route("/telecasts/<telecast_id>", methods=["DELETE"])
 @jwt_required()
-@invalidate_cache(['telecast:*'])
+@invalidate_cache(['telecast'])
 def delete_telecast(telecast_id):
     """Delete telecast (Admin only)"""
     try:
@@ -434,19 +464,27 @@ def delete_telecast(telecast_id):
 
 
 @relations_bp.route("/contracts", methods=["GET"])
-@cache_response(timeout=600, key_prefix='contract')
+@cache_response(timeout=600, key_prefix='contract', stale_timeout=1200,
+                tags=series_title_tags("contracts"),
+                query_args={"page": 1, "per_page": 100, "webseries_id": "",
+                            "status": "", "search": ""})
 def get_all_contracts():
-    """Get all series contracts (cached for 10 minutes)"""
+    """Get all series contracts (cached for 10 minutes, refreshed in background)"""
     try:
         from app.models.web_series import WebSeries
 
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 100, type=int)
+        per_page = request.args.get("per_page", 100, type=page_size)
         webseries_id = request.args.get("webseries_id", "", type=str)
         status = request.args.get("status", "", type=str)
         search = request.args.get("search", "", type=str)
 
-        query = SeriesContract.query
+        # Series titles come from the same joined SELECT
+        query = (
+            SeriesContract.query
+            .outerjoin(WebSeries, WebSeries.webseries_id == SeriesContract.webseries_id)
+            .add_columns(WebSeries.title)
+        )
 
         # Filter by webseries_id
         if webseries_id:
@@ -471,10 +509,9 @@ def get_all_contracts():
 
         # Enrich with series titles
         result_list = []
-        for c in pagination.items:
+        for c, series_title in pagination.items:
             item_dict = c.to_dict()
-            series = WebSeries.query.get(c.webseries_id)
-            item_dict["series_title"] = series.title if series else None
+            item_dict["series_title"] = series_title
             result_list.append(item_dict)
 
         return (
@@ -494,7 +531,7 @@ def get_all_contracts():
 
 @relations_bp.route("/contracts", methods=["POST"])
 @jwt_required()
-@invalidate_cache(['contract:*'])
+@invalidate_cache(['contract'])
 def create_contract():
     """Create series contract (Employee/Admin only)"""
     try:
@@ -547,7 +584,7 @@ def create_contract():
 
 @relations_bp.route("/contracts/<contract_id>", methods=["PUT"])
 @jwt_required()
-@invalidate_cache(['contract:*'])
+@invalidate_cache(['contract'])
 def update_contract(contract_id):
     """Update series contract (Employee/Admin only)"""
     try:
@@ -595,7 +632,7 @@ def update_contract(contract_id):
 
 @relations_bp.route("/contracts/<contract_id>", methods=["DELETE"])
 @jwt_required()
-@invalidate_cache(['contract:*'])
+@invalidate_cache(['contract'])
 def delete_contract(contract_id):
     """Delete series contract (Admin only)"""
     try:
@@ -622,18 +659,26 @@ def delete_contract(contract_id):
 
 
 @relations_bp.route("/subtitle-languages", methods=["GET"])
-@cache_response(timeout=900, key_prefix='subtitle')
+@cache_response(timeout=900, key_prefix='subtitle', stale_timeout=1800,
+                tags=series_title_tags("subtitle_languages"),
+                query_args={"page": 1, "per_page": 100, "webseries_id": "",
+                            "search": ""})
 def get_all_subtitle_languages():
-    """Get all subtitle languages (cached for 15 minutes)"""
+    """Get all subtitle languages (cached for 15 minutes, refreshed in background)"""
     try:
         from app.models.web_series import WebSeries
 
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 100, type=int)
+        per_page = request.args.get("per_page", 100, type=page_size)
         webseries_id = request.args.get("webseries_id", "", type=str)
         search = request.args.get("search", "", type=str)
 
-        query = SubtitleLanguage.query
+        # Series titles come from the same joined SELECT
+        query = (
+            SubtitleLanguage.query
+            .outerjoin(WebSeries, WebSeries.webseries_id == SubtitleLanguage.webseries_id)
+            .add_columns(WebSeries.title)
+        )
 
         # Filter by webseries_id
         if webseries_id:
@@ -654,10 +699,9 @@ def get_all_subtitle_languages():
 
         # Enrich with series titles
         result_list = []
-        for s in pagination.items:
+        for s, series_title in pagination.items:
             item_dict = s.to_dict()
-            series = WebSeries.query.get(s.webseries_id)
-            item_dict["series_title"] = series.title if series else None
+            item_dict["series_title"] = series_title
             result_list.append(item_dict)
 
         return (
@@ -680,7 +724,7 @@ def get_all_subtitle_languages():
 
 @relations_bp.route("/subtitle-languages", methods=["POST"])
 @jwt_required()
-@invalidate_cache(['subtitle:*'])
+@invalidate_cache(['subtitle'])
 def create_subtitle_language():
     """Create subtitle language (Employee/Admin only)"""
     try:
@@ -737,7 +781,7 @@ def create_subtitle_language():
     "/subtitle-languages/<webseries_id>/<language>", methods=["DELETE"]
 )
 @jwt_required()
-@invalidate_cache(['subtitle:*'])
+@invalidate_cache(['subtitle'])
 def delete_subtitle_language(webseries_id, language):
     """Delete subtitle language (Admin only)"""
     try:
@@ -770,19 +814,27 @@ def delete_subtitle_language(webseries_id, language):
 
 
 @relations_bp.route("/releases", methods=["GET"])
-@cache_response(timeout=900, key_prefix='release')
+@cache_response(timeout=900, key_prefix='release', stale_timeout=1800,
+                tags=series_title_tags("releases"),
+                query_args={"page": 1, "per_page": 100, "webseries_id": "",
+                            "country_name": "", "search": ""})
 def get_all_releases():
-    """Get all web series releases (cached for 15 minutes)"""
+    """Get all web series releases (cached for 15 minutes, refreshed in background)"""
     try:
         from app.models.web_series import WebSeries
 
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 100, type=int)
+        per_page = request.args.get("per_page", 100, type=page_size)
         webseries_id = request.args.get("webseries_id", "", type=str)
         country_name = request.args.get("country_name", "", type=str)
         search = request.args.get("search", "", type=str)
 
-        query = WebSeriesRelease.query
+        # Series titles come from the same joined SELECT
+        query = (
+            WebSeriesRelease.query
+            .outerjoin(WebSeries, WebSeries.webseries_id == WebSeriesRelease.webseries_id)
+            .add_columns(WebSeries.title)
+        )
 
         # Filter by webseries_id
         if webseries_id:
@@ -807,10 +859,9 @@ def get_all_releases():
 
         # Enrich with series titles
         result_list = []
-        for r in pagination.items:
+        for r, series_title in pagination.items:
             item_dict = r.to_dict()
-            series = WebSeries.query.get(r.webseries_id)
-            item_dict["series_title"] = series.title if series else None
+            item_dict["series_title"] = series_title
             result_list.append(item_dict)
 
         return (
@@ -830,7 +881,7 @@ def get_all_releases():
 
 @relations_bp.route("/releases", methods=["POST"])
 @jwt_required()
-@invalidate_cache(['release:*'])
+@invalidate_cache(['release'])
 def create_release():
     """Create web series release (Employee/Admin only)"""
     try:
@@ -888,7 +939,7 @@ def create_release():
 
 @relations_bp.route("/releases/<webseries_id>/<country_name>", methods=["PUT"])
 @jwt_required()
-@invalidate_cache(['release:*'])
+@invalidate_cache(['release'])
 def update_release(webseries_id, country_name):
     """Update web series release (Employee/Admin only)"""
     try:
@@ -928,7 +979,7 @@ def update_release(webseries_id, country_name):
 
 @relations_bp.route("/releases/<webseries_id>/<country_name>", methods=["DELETE"])
 @jwt_required()
-@invalidate_cache(['release:*'])
+@invalidate_cache(['release'])
 def delete_release(webseries_id, country_name):
     """Delete web series release (Admin only)"""
     try:
@@ -1,30 +1,71 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
+from app.models.series_browse import SeriesBrowse
 from app.models.web_series import WebSeries
 from app.models.viewer_account import ViewerAccount
 from app.utils.security import role_required, generate_id, sanitize_input
-from app.utils.cache import cache_response, invalidate_cache
+from app.utils.cache import (
+    cache_listing,
+    cache_response,
+    cached_cards,
+    invalidate_cache,
+    invalidate_entities,
+    invalidate_namespaces,
+    page_size,
+)
 from sqlalchemy import or_
 
 series_bp = Blueprint("series", __name__)
 
 
+def load_series_cards(series_ids):
+    """List documents (WebSeries.to_dict() without episodes) for series_ids"""
+    stats = WebSeries.list_stats(series_ids)
+    return {
+        s.webseries_id: s.to_dict(stats=stats[s.webseries_id])
+        for s in WebSeries.query.filter(WebSeries.webseries_id.in_(series_ids))
+    }
+
+
+def series_cards(series_ids):
+    """Cached list documents of series_ids, in order"""
+    return cached_cards("series", series_ids, load_series_cards, timeout=600)
+
+
+def series_list_tags(data):
+    """Tags of a hydrated page of series in the L1 tier: one per series shown"""
+    return [f"series:{s['webseries_id']}" for s in data["series"]]
+
+
+def series_detail_tags(data):
+    series_id = data["series"]["webseries_id"]
+    return [f"series:{series_id}", f"series_episodes:{series_id}"]
+
+
 @series_bp.route("", methods=["GET"])
-@cache_response(timeout=300, key_prefix='series')
+@cache_listing(
+    timeout=300,
+    key_prefix='series',
+    stale_timeout=600,
+    query_args={"page": 1, "per_page": 20, "search": "", "type": ""},
+    field="series",
+    cards=series_cards,
+    tags=series_list_tags,
+)
 def get_all_series():
-    """Get all series with pagination and search (cached for 5 minutes)"""
+    """Get all series with pagination and search (IDs cached for 5 minutes, series as cards, refreshed in background)"""
     try:
         # Pagination parameters
         page = request.args.get("page", 1, type=int)
-        per_page = request.args.get("per_page", 20, type=int)
+        per_page = request.args.get("per_page", 20, type=page_size)
 
         # Search parameters
         search = request.args.get("search", "")
         series_type = request.args.get("type", "")
 
-        # Build query
-        query = WebSeries.query
+        # Build query; only the IDs are read here, see series_cards
+        query = WebSeries.query.with_entities(WebSeries.webseries_id)
 
         if search:
             query = query.filter(
@@ -40,10 +81,135 @@ def get_all_series():
         # Execute paginated query
         pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
+        return {
+            "ids": [row.webseries_id for row in pagination.items],
+            "total": pagination.total,
+            "pages": pagination.pages,
+            "current_page": page,
+        }
+
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch series", "message": str(e)}), 500
+
+
+# Sort keys accepted by /browse
+BROWSE_SORTS = {
+    "title": SeriesBrowse.title,
+    "type": SeriesBrowse.type,
+    "house": SeriesBrowse.house_name,
+    "episodes": SeriesBrowse.num_episodes,
+    "reviews": SeriesBrowse.review_count,
+    "rating": SeriesBrowse.average_rating,
+    "created_at": SeriesBrowse.created_at,
+}
+
+# Browse columns read by each /browse filter
+BROWSE_FILTERS = {
+    "search": "title",
+    "type": "type",
+    "house_id": "house_id",
+    "house": "house_name",
+    "language": "subtitle_languages",
+    "country": "release_countries",
+    "min_rating": "average_rating",
+    "max_rating": "average_rating",
+    "min_episodes": "num_episodes",
+    "max_episodes": "num_episodes",
+}
+
+
+def browse_tags(data):
+    """
+    Cache tags for a browse page: one per series shown, and one per column
+    its filters and sort read, which an update can move rows in or out of
+    the page through (see SeriesBrowse._store)
+    """
+    columns = {BROWSE_SORTS[request.args.get("sort", "title")].key}
+    columns.update(column for arg, column in BROWSE_FILTERS.items() if request.args.get(arg))
+    return [f"series_browse:{s['webseries_id']}" for s in data["series"]] + [
+        f"series_browse_by:{column}" for column in columns
+    ]
+
+
+@series_bp.route("/browse", methods=["GET"])
+@cache_response(
+    timeout=300,
+    key_prefix='series_browse',
+    tags=browse_tags,
+    query_args={
+        "page": 1,
+        "per_page": 20,
+        "search": "",
+        "type": "",
+        "house_id": "",
+        "house": "",
+        "language": "",
+        "country": "",
+        "min_rating": "",
+        "max_rating": "",
+        "min_episodes": "",
+        "max_episodes": "",
+        "sort": "title",
+        "order": "asc",
+    },
+)
+def browse_series():
+    """Filter and sort the catalog from the series_browse table (cached for 5 minutes)"""
+    try:
+        page = request.args.get("page", 1, type=int)
+        per_page = request.args.get("per_page", 20, type=page_size)
+        sort = request.args.get("sort", "title")
+        order = request.args.get("order", "asc")
+
+        if sort not in BROWSE_SORTS:
+            return jsonify({"error": f"sort must be one of {', '.join(BROWSE_SORTS)}"}), 400
+        if order not in ("asc", "desc"):
+            return jsonify({"error": "order must be asc or desc"}), 400
+
+        query = SeriesBrowse.query
+
+        search = request.args.get("search", "")
+        if search:
+            query = query.filter(SeriesBrowse.title.contains(search))
+        for arg, column in (("type", SeriesBrowse.type), ("house_id", SeriesBrowse.house_id)):
+            value = request.args.get(arg, "")
+            if value:
+                query = query.filter(column == value)
+        house = request.args.get("house", "")
+        if house:
+            query = query.filter(SeriesBrowse.house_name.contains(house))
+
+        # List columns hold comma-wrapped names, see SeriesBrowse
+        for arg, column in (
+            ("language", SeriesBrowse.subtitle_languages),
+            ("country", SeriesBrowse.release_countries),
+        ):
+            value = request.args.get(arg, "")
+            if value:
+                query = query.filter(column.contains(f",{value},"))
+
+        for arg, column, cast in (
+            ("min_rating", SeriesBrowse.average_rating, float),
+            ("max_rating", SeriesBrowse.average_rating, float),
+            ("min_episodes", SeriesBrowse.num_episodes, int),
+            ("max_episodes", SeriesBrowse.num_episodes, int),
+        ):
+            value = request.args.get(arg, None, type=cast)
+            if value is not None:
+                query = query.filter(column >= value if arg.startswith("min") else column <= value)
+
+        column = BROWSE_SORTS[sort]
+        query = query.order_by(
+            column.desc() if order == "desc" else column.asc(),
+            SeriesBrowse.webseries_id,
+        )
+
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+
         return (
             jsonify(
                 {
-                    "series": [s.to_dict() for s in pagination.items],
+                    "series": [row.to_dict() for row in pagination.items],
                     "total": pagination.total,
                     "pages": pagination.pages,
                     "current_page": page,
@@ -53,13 +219,20 @@ def get_all_series():
         )
 
     except Exception as e:
-        return jsonify({"error": "Failed to fetch series", "message": str(e)}), 500
+        return jsonify({"error": "Failed to browse series", "message": str(e)}), 500
 
 
 @series_bp.route("/<series_id>", methods=["GET"])
-@cache_response(timeout=600, key_prefix='series_detail')
+@cache_response(
+    timeout=600,
+    key_prefix='series_detail',
+    tags=series_detail_tags,
+    query_args={},
+    negative_timeout=60,
+    negative_tag="series:{series_id}",
+)
 def get_series(series_id):
-    """Get single series details (cached for 10 minutes)"""
+    """Get single series details (cached for 10 minutes, not-found for 1 minute)"""
     try:
         series = WebSeries.query.get(series_id)
 
@@ -74,7 +247,7 @@ def get_series(series_id):
 
 @series_bp.route("", methods=["POST"])
 @jwt_required()
-@invalidate_cache(['series:*', 'series_detail:*'])
+@invalidate_cache(['series'])
 def create_series():
     """Create new series (Employee/Admin only) - invalidates cache"""
     try:
@@ -109,6 +282,8 @@ def create_series():
         )
 
         db.session.add(new_series)
+
+        invalidate_entities(f"series:{series_id}", f"house:{new_series.house_id}")
         db.session.commit()
 
         return (
@@ -128,7 +303,6 @@ def create_series():
 
 @series_bp.route("/<series_id>", methods=["PUT"])
 @jwt_required()
-@invalidate_cache(['series:*', 'series_detail:*'])
 def update_series(series_id):
     """Update series information (Employee/Admin only) - invalidates cache"""
     try:
@@ -152,6 +326,17 @@ def update_series(series_id):
         if "type" in data:
             series.type = sanitize_input(data["type"])
 
+        # Title and type decide which search/filter pages list the series
+        if "title" in data or "type" in data:
+            invalidate_namespaces("series")
+        tags = [f"series:{series_id}"]
+        if "title" in data:
+            # Relation listings show the series title; telecasts reach it
+            # through their episode, so that namespace is bumped instead
+            tags.append(f"series_title:{series_id}")
+            invalidate_namespaces("telecast")
+        invalidate_entities(*tags)
+
         db.session.commit()
 
         return (
@@ -168,7 +353,7 @@ def update_series(series_id):
 
 @series_bp.route("/<series_id>", methods=["DELETE"])
 @jwt_required()
-@invalidate_cache(['series:*', 'series_detail:*'])
+@invalidate_cache(['series'])
 def delete_series(series_id):
     """Delete series (Admin only) - invalidates cache"""
     try:
@@ -182,7 +367,21 @@ def delete_series(series_id):
         if not series:
             return jsonify({"error": "Series not found"}), 404
 
+        house_id = series.house_id
         db.session.delete(series)
+
+        # Episodes, feedback and relation rows of the series go with it
+        invalidate_namespaces("telecast")
+        invalidate_entities(
+            f"series:{series_id}",
+            f"series_title:{series_id}",
+            f"house:{house_id}",
+            f"episodes_of:{series_id}",
+            f"feedback_of:{series_id}",
+            "episodes:all",
+            "feedback:all",
+        )
+
         db.session.commit()
 
         return jsonify({"message": "Series deleted successfully"}), 200
@@ -0,0 +1,35 @@
+"""
+Browse table commands: flask --app run browse <command>
+"""
+import click
+from flask.cli import AppGroup
+from app import db
+from app.models.series_browse import SeriesBrowse
+from app.utils.cache import cache
+
+browse_cli = AppGroup("browse", help="Series browse table maintenance.")
+
+
+@browse_cli.command("rebuild")
+def rebuild_command():
+    """Recompute every browse row from the series tables."""
+    changed = SeriesBrowse.rebuild()
+    db.session.commit()
+    # Cached browse pages are dropped by a background queue
+    cache.invalidations.wait_idle(5)
+    click.echo(f"Rebuilt series browse table: {len(changed)} rows corrected")
+    for series_id in changed:
+        click.echo(f"  {series_id}")
+
+
+@browse_cli.command("check")
+def check_command():
+    """Compare browse rows with the series tables; exits with status 1 on drift."""
+    drifted = SeriesBrowse.drift()
+    if not drifted:
+        click.echo("Series browse table matches the series tables")
+        return
+    click.echo(f"{len(drifted)} browse rows differ from the series tables:")
+    for row in drifted:
+        click.echo(f"  {row['webseries_id']}: stored {row['stored']}, expected {row['expected']}")
+    raise SystemExit(1)
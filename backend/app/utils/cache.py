@@ -1,37 +1,1090 @@
 """
 Redis caching utilities
 """
+import gzip
+import hashlib
+import heapq
 import json
+import time
+import threading
+import uuid
 import redis
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
-from flask import current_app, request
+from urllib.parse import quote
+from flask import Response, current_app, g, jsonify, request, copy_current_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
+# Pub/sub channel used to keep the in-process tiers of all workers coherent
+INVALIDATION_CHANNEL = "cache:invalidate"
 
-class RedisCache:
+# Sorted set of the most requested cached URLs, replayed by the cache warmer
+HOT_REQUESTS_KEY = "cache_hot_requests"
+
+# Counter taken by every tag invalidation, see tags_invalidated_since
+TAG_SEQUENCE_KEY = "cache_tag_sequence"
+
+# TTL histogram buckets of memory_report: (label, upper bound in seconds)
+TTL_BUCKETS = (
+    ("<1m", 60), ("1-5m", 300), ("5-15m", 900), ("15-60m", 3600), (">1h", None)
+)
+TTL_LABELS = ("none",) + tuple(label for label, _ in TTL_BUCKETS)
+
+# Release a fill lock only if it is still held by the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _ttl_bucket(pttl):
+    """Histogram label of a PTTL reply (-1: no expiry)"""
+    if pttl < 0:
+        return "none"
+    for label, bound in TTL_BUCKETS:
+        if bound is None or pttl < bound * 1000:
+            return label
+
+
+def _decode_entry(fields):
+    """Turn the raw hash of a response entry back into a dict"""
+    if not fields:
+        return None
+    return {
+        "body": fields[b"b"],
+        "status": int(fields[b"s"]),
+        "content_type": fields[b"c"].decode(),
+        "encoding": fields[b"e"].decode(),
+        "etag": fields[b"h"].decode(),
+        "tags": json.loads(fields.get(b"g") or "[]"),
+        "filled_at": float(fields[b"t"]),
+    }
+
+
+class LocalLRU:
+    """Bounded, thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        # Bumped on every clear so fills that raced an invalidation are dropped
+        self.generation = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def drain_evictions(self):
+        """Return and reset the number of entries evicted for space"""
+        with self._lock:
+            evictions, self.evictions = self.evictions, 0
+            return evictions
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def drop_tagged(self, tags):
+        """Drop entries indexed under any of the given entity tags"""
+        tags = set(tags)
+        with self._lock:
+            self.generation += 1
+            for key, (entry, _) in list(self._data.items()):
+                if tags.intersection(entry.get("tags", ())):
+                    del self._data[key]
+
+
+class CacheMetrics:
+    """
+    Per-worker counters for each cache namespace
+
+    Updated on the request path without touching Redis; RedisCache flushes
+    them into cache_metrics:<namespace> hashes every
+    CACHE_METRICS_FLUSH_INTERVAL seconds, where all workers' counts add up.
+    """
+
+    def __init__(self):
+        self._counts = defaultdict(Counter)
+        # Requests per cached URL, the raw material of the warm list
+        self._requests = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, namespace, field, amount=1):
+        with self._lock:
+            self._counts[namespace][field] += amount
+
+    def record_request(self, target, limit):
+        """Count a request for target, tracking at most limit distinct URLs"""
+        with self._lock:
+            if target in self._requests or len(self._requests) < limit:
+                self._requests[target] += 1
+
+    def drain_requests(self):
+        with self._lock:
+            requests, self._requests = self._requests, Counter()
+            return requests
+
+    def drain(self):
+        """Take the counts gathered since the last drain"""
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(Counter)
+            return counts
+
+    def merge(self, counts):
+        """Put back counts that could not be flushed"""
+        with self._lock:
+            for namespace, fields in counts.items():
+                self._counts[namespace].update(fields)
+
+
+class AdaptiveTTL:
+    """
+    Per-namespace TTLs chosen from observed read and invalidation rates
+
+    Every metrics flush, update() samples the totals shared by all workers
+    and keeps those of the last CACHE_ADAPTIVE_TTL_WINDOW seconds. Once the
+    samples span half the window and a namespace had CACHE_ADAPTIVE_TTL_MIN_READS
+    reads in it, its target TTL becomes the mean time between generation bumps
+    times CACHE_ADAPTIVE_TTL_FACTOR: entries of a bumped generation are never
+    read again, so a churny namespace should not hold them much longer than
+    its generations last, while one that is rarely bumped can keep entries
+    for longer. A namespace with no bumps in the window targets the upper
+    bound. ttl() clamps the target to CACHE_ADAPTIVE_TTL_BOUNDS, multiples of
+    the timeout the view declares; without a target it returns that timeout.
+
+    Both namespace bumps and tag invalidations that drop a namespace's
+    entries count as invalidations. Only namespaces with a write path that
+    invalidates them (see invalidation_paths) are ever lengthened: the rest
+    are kept fresh by their TTL alone, so few observed invalidations says
+    nothing about how often their data changes. Views opt out entirely with
+    cache_response(adaptive=False).
+    """
+
+    def __init__(self):
+        # namespace -> deque of (time, reads, invalidations) totals
+        self._samples = defaultdict(deque)
+        # namespace -> target seconds (inf when never invalidated)
+        self._targets = {}
+        # namespace -> timeout declared by its views
+        self._declared = {}
+        # Namespaces whose views opted out with adaptive=False
+        self._fixed = set()
+        self._lock = threading.Lock()
+
+    def ttl(self, namespace, timeout, adaptive=True):
+        """TTL to use for an entry of namespace whose view declares timeout"""
+        self._declared[namespace] = timeout
+        if not adaptive:
+            self._fixed.add(namespace)
+        target = self._targets.get(namespace)
+        if (
+            target is None
+            or namespace in self._fixed
+            or not current_app.config.get('CACHE_ADAPTIVE_TTL', False)
+        ):
+            return timeout
+        low, high = current_app.config.get('CACHE_ADAPTIVE_TTL_BOUNDS', (0.25, 4.0))
+        if namespace not in invalidation_paths:
+            high = min(high, 1.0)
+        return int(min(max(target, timeout * low), timeout * high))
+
+    def update(self, totals, now=None):
+        """Add a sample of {namespace: metric totals} and recompute targets"""
+        config = current_app.config
+        window = config.get('CACHE_ADAPTIVE_TTL_WINDOW', 900)
+        min_reads = config.get('CACHE_ADAPTIVE_TTL_MIN_READS', 100)
+        factor = config.get('CACHE_ADAPTIVE_TTL_FACTOR', 1.0)
+        now = time.time() if now is None else now
+        with self._lock:
+            for namespace, counts in totals.items():
+                reads = sum(
+                    float(counts.get(field, 0))
+                    for field in ("hits", "l1_hits", "not_modified", "misses")
+                )
+                invalidations = float(counts.get("invalidations", 0))
+                samples = self._samples[namespace]
+                # Totals went down: the cache was cleared, start over
+                if samples and (reads < samples[-1][1] or invalidations < samples[-1][2]):
+                    samples.clear()
+                samples.append((now, reads, invalidations))
+                # Keep one sample at or before the start of the window
+                while len(samples) > 2 and samples[1][0] <= now - window:
+                    samples.popleft()
+                started, first_reads, first_invalidations = samples[0]
+                span = now - started
+                if span < window / 2 or reads - first_reads < min_reads:
+                    self._targets.pop(namespace, None)
+                    continue
+                invalidations -= first_invalidations
+                self._targets[namespace] = (
+                    factor * span / invalidations if invalidations > 0 else float("inf")
+                )
+
+    def report(self):
+        """Declared and chosen TTL and observed rates of each namespace"""
+        with self._lock:
+            report = {}
+            for namespace, declared in sorted(self._declared.items()):
+                samples = self._samples.get(namespace)
+                span = samples[-1][0] - samples[0][0] if samples else 0
+                report[namespace] = {
+                    "declared_ttl": declared,
+                    "ttl": self.ttl(namespace, declared),
+                    "reads_per_minute": (
+                        round((samples[-1][1] - samples[0][1]) * 60 / span, 2)
+                        if span else None
+                    ),
+                    "invalidations_per_hour": (
+                        round((samples[-1][2] - samples[0][2]) * 3600 / span, 2)
+                        if span else None
+                    ),
+                    "window_seconds": int(span),
+                }
+            return report
+
+
+class InvalidationQueue:
+    """
+    Deduplicating queue of committed invalidations, drained by one thread
+
+    Namespaces and tags are held in sets, so the same invalidation scheduled
+    by many commits while the thread is busy (e.g. a bulk admin edit) is sent
+    to Redis once. Write responses never wait for Redis.
+    """
+
+    def __init__(self):
+        self.scheduled = 0
+        self.sent = 0
+        self._namespaces = set()
+        self._tags = set()
+        self._busy = False
+        self._cond = threading.Condition()
+        self._app = None
+        self._thread = None
+
+    def start(self, app, cache):
+        """Start the thread, or point the running one at app"""
+        self._app = app
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, args=(cache,),
+                name="cache-invalidation", daemon=True
+            )
+            self._thread.start()
+
+    def put(self, namespaces, tags):
+        with self._cond:
+            self.scheduled += len(namespaces) + len(tags)
+            self._namespaces.update(namespaces)
+            self._tags.update(tags)
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """Block until everything queued so far has been sent"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not (self._busy or self._namespaces or self._tags), timeout
+            )
+
+    def stats(self):
+        with self._cond:
+            return {
+                "scheduled": self.scheduled,
+                "sent": self.sent,
+                "pending": len(self._namespaces) + len(self._tags),
+            }
+
+    def _run(self, cache):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._namespaces or self._tags)
+                self._busy = True
+            app = self._app
+            # Let invalidations of a burst of commits pile up
+            time.sleep(app.config.get('CACHE_INVALIDATION_DELAY', 0.01))
+            with self._cond:
+                namespaces, self._namespaces = self._namespaces, set()
+                tags, self._tags = self._tags, set()
+                self.sent += len(namespaces) + len(tags)
+            try:
+                with app.app_context():
+                    for namespace in namespaces:
+                        cache.invalidate(namespace)
+                        cache.metrics.incr(namespace, "invalidations")
+                    if tags:
+                        cache.invalidate_tags(tags)
+            except Exception as e:
+                app.logger.error(f"Cache invalidation error: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Tracks Redis health so an outage costs requests nothing
+
+    closed: calls go through; CACHE_BREAKER_THRESHOLD connection failures
+    within CACHE_BREAKER_WINDOW seconds open the breaker.
+    open: calls fail fast without touching the network while a background
+    thread probes Redis every CACHE_BREAKER_RESET_TIMEOUT seconds.
+    half_open: a probe is in flight; success closes the breaker, failure
+    opens it again.
+
+    Requests served while the breaker is not closed are timed, so the cost
+    of running without a cache is visible (per worker).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold=3, window=10, reset_timeout=5):
+        self.threshold = threshold
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.trips = 0
+        self.degraded_count = 0
+        self.degraded_ms = 0.0
+        self._failures = deque()
+        self._lock = threading.Lock()
+
+    def allow(self):
+        return self.state == self.CLOSED
+
+    def record_failure(self):
+        """Count a connection failure; returns True if it opened the breaker"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state != self.CLOSED:
+                return False
+            self._failures.append(now)
+            while self._failures and self._failures[0] < now - self.window:
+                self._failures.popleft()
+            if len(self._failures) < self.threshold:
+                return False
+            self._open()
+            return True
+
+    def trip(self):
+        """Open the breaker immediately (e.g. Redis unreachable at startup)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.time()
+        self.trips += 1
+        self._failures.clear()
+
+    def probe(self, check):
+        """Move to half_open and run check(); close on success, reopen on error"""
+        with self._lock:
+            self.state = self.HALF_OPEN
+        try:
+            check()
+        except Exception:
+            with self._lock:
+                self.state = self.OPEN
+            raise
+        with self._lock:
+            self.state = self.CLOSED
+            self.opened_at = None
+
+    def record_degraded(self, seconds):
+        with self._lock:
+            self.degraded_count += 1
+            self.degraded_ms += seconds * 1000
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "opened_at": self.opened_at,
+                "trips": self.trips,
+                "recent_failures": len(self._failures),
+                "degraded_requests": self.degraded_count,
+                "degraded_avg_ms": (
+                    round(self.degraded_ms / self.degraded_count, 2)
+                    if self.degraded_count else None
+                ),
+            }
+
+
+class CacheBackend(ABC):
+    """
+    Storage interface behind cache_response and invalidate_cache
+
+    Holds what every backend shares: per-namespace metrics, the optional
+    in-process L1 tier, the post-commit invalidation queue, background
+    refreshes and reset hooks. Subclasses implement the abstract storage
+    operations (entries, generation counters, fill locks, tag sets) and the
+    raw reads behind the reports. See RedisCache and LocalCache.
+    """
+
+    # Reported by health() and the admin cache stats
+    name = None
+
+    def __init__(self):
+        self._app = None
+        # Optional in-process L1 tier, one LocalLRU per key_prefix
+        self.local = {}
+        # Background stale-while-revalidate refreshes
+        self._executor = None
+        self.metrics = CacheMetrics()
+        self.ttls = AdaptiveTTL()
+        self.invalidations = InvalidationQueue()
+        self._flusher = None
+        # Called after the whole cache was emptied (see on_reset)
+        self._reset_hooks = []
+
+    def init_app(self, app):
+        """Start the refresh pool, the invalidation queue and the metrics flusher"""
+        self._app = app
+        # A backend outlives the app it was first set up for (create_app may
+        # run again, e.g. per test): replace the pool and point the threads
+        # at the new app instead of starting them again
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('CACHE_REFRESH_WORKERS', 2),
+            thread_name_prefix="cache-refresh",
+        )
+        self.invalidations.start(app, self)
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_metrics_loop, name="cache-metrics", daemon=True
+            )
+            self._flusher.start()
+
+    @abstractmethod
+    def available(self):
+        """Whether the backend can be used right now"""
+        raise NotImplementedError
+
+    def health(self):
+        return {"backend": self.name}
+
+    def record_degraded(self, seconds):
+        """Note a request served without the cache because it was unavailable"""
+
+    def _error(self, operation, e):
+        current_app.logger.error(f"Cache {operation} error: {e}")
+
+    # -- In-process L1 tier
+
+    def _clear_local(self, namespace):
+        if namespace == '*':
+            for lru in self.local.values():
+                lru.clear()
+        elif namespace in self.local:
+            self.local[namespace].clear()
+
+    def _drop_local_tags(self, tags):
+        for lru in self.local.values():
+            lru.drop_tagged(tags)
+
+    def local_generation(self, namespace):
+        """Snapshot taken before a lookup; pass it back to local_set"""
+        lru = self.local.get(namespace)
+        return lru.generation if lru else None
+
+    def local_get(self, namespace, key):
+        """
+        Get value from the in-process tier of a namespace
+
+        Skipped while the backend is unavailable: invalidations from other
+        workers cannot arrive then.
+        """
+        lru = self.local.get(namespace)
+        return lru.get(key) if lru and self.available() else None
+
+    def local_set(self, namespace, key, value, generation):
+        """Store value in the in-process tier of a namespace"""
+        lru = self.local.get(namespace)
+        if lru:
+            lru.set(key, value, generation)
+
+    # -- Storage
+
+    @abstractmethod
+    def get(self, key):
+        """Get a JSON value, or None"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key, value, timeout=None):
+        """Store a JSON value for timeout seconds (CACHE_DEFAULT_TIMEOUT)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_many(self, keys):
+        """Get JSON values for keys in one round trip, None for each miss"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_many(self, values, timeout=None, tags=None):
+        """
+        Store a dict of JSON values in one round trip
+
+        tags optionally maps keys to entity tags to index them under (see
+        tag).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_raw(self, key):
+        """Get stored bytes, or None"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_raw(self, key, value, timeout=None):
+        """Store bytes for timeout seconds (CACHE_DEFAULT_TIMEOUT)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_entry(self, key):
+        """
+        Get a cached response entry
+
+        Returns a dict with the stored body bytes, status, content_type,
+        encoding ("gzip" or ""), etag, entity tags and filled_at, or None.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_entry_meta(self, key):
+        """Get only the etag, encoding and filled_at of an entry"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_entry(self, key, entry, timeout=None):
+        """Store a response entry (see get_entry), replacing any old value"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_pattern(self, pattern):
+        """Delete all keys matching a glob-style pattern"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def count_pattern(self, pattern):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_version(self, namespace):
+        """
+        Get the current generation of a cache namespace
+
+        Returns None when the backend is unusable, which puts cache_response
+        in degraded mode.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def acquire_lock(self, key):
+        """
+        Try to become the single filler of a cache key
+
+        Returns a token when the lock was acquired, None when another request
+        holds it, and an empty token when the backend is unusable (fill
+        without a lock). Locks expire after CACHE_LOCK_TIMEOUT seconds.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def release_lock(self, key, token):
+        raise NotImplementedError
+
+    @abstractmethod
+    def wait_for(self, key):
+        """
+        Wait up to CACHE_LOCK_WAIT seconds for another request to fill a
+        locked key. Returns the entry, or None if the lock was released
+        without a value or the wait timed out.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def tag(self, key, tags, timeout=None):
+        """
+        Index a cache key under entity tags (e.g. "series:WS123")
+
+        Tag sets live CACHE_TAG_TTL seconds, or timeout when that is shorter
+        (the entry expires sooner, like a cached 404), but are never
+        shortened below what an earlier tag call gave them.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate(self, namespace):
+        """Invalidate a namespace by bumping its generation"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate_tags(self, tags):
+        """
+        Invalidate only the entries indexed under the given entity tags
+
+        Each call takes the next tag sequence number and stamps every tag
+        with it in cache_tag_at:<tag> before its entries are read and
+        dropped (see tags_invalidated_since).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def tag_sequence(self):
+        """The sequence number of the last tag invalidation, None if unknown"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def tags_invalidated_since(self, tags, sequence):
+        """
+        The tags among tags invalidated after tag_sequence() returned sequence
+
+        A fill that read the sequence, then the database, and stored its
+        entry afterwards may hold data a write committed meanwhile: the
+        write's invalidation can have dropped the tag's entries before the
+        entry was tagged. Such fills check this after storing and delete
+        the entry. Returns every tag when it cannot tell.
+        """
+        raise NotImplementedError
+
+    def _count_tag_invalidations(self, keys):
+        """Count one invalidation for each namespace with entries among keys"""
+        for namespace in {key.split(":", 1)[0] for key in keys}:
+            self.metrics.incr(namespace, "invalidations")
+
+    @abstractmethod
+    def clear_all(self):
+        """
+        Clear all cache, then run the reset hooks
+
+        The request ranking survives so the cache can be warmed right after.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self):
+        """Keyspace totals: total_keys, hits, misses and evicted_keys"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def hot_requests(self, limit):
+        """The limit most requested cached URLs across all workers"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _store_metrics(self, counts, requests):
+        """Add drained metric counts and request counts to the shared totals"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _load_metrics(self, namespaces):
+        """Shared metric totals of each namespace, as dicts of numbers"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _sample_memory(self, sample_size):
+        """
+        Sample up to sample_size keys for memory_report
+
+        Returns (samples, complete, total_keys, memory), where samples is a
+        list of (key, bytes, ttl in milliseconds or -1) and memory holds
+        used_memory, maxmemory and maxmemory_policy.
+        """
+        raise NotImplementedError
+
+    # -- Shared behaviour
+
+    def submit_refresh(self, fn):
+        """Run a stale-while-revalidate refresh off the request thread"""
+        if not self._executor:
+            return False
+        try:
+            self._executor.submit(fn)
+            return True
+        except RuntimeError as e:
+            current_app.logger.error(f"Cache refresh submit error: {e}")
+            return False
+
+    def _flush_metrics_loop(self):
+        while True:
+            # Read on every round: init_app may have moved to another app
+            app = self._app
+            time.sleep(app.config.get('CACHE_METRICS_FLUSH_INTERVAL', 10))
+            with app.app_context():
+                self.flush_metrics()
+                if app.config.get('CACHE_ADAPTIVE_TTL', False):
+                    self.tune_ttls()
+
+    def flush_metrics(self):
+        """Add this worker's counters to the totals shared by all workers"""
+        for namespace, lru in self.local.items():
+            evictions = lru.drain_evictions()
+            if evictions:
+                self.metrics.incr(namespace, "l1_evictions", evictions)
+        counts = self.metrics.drain()
+        # Request counts are a sample for ranking; they are not kept on failure
+        requests = self.metrics.drain_requests()
+        if not counts and not requests:
+            return True
+        if not self.available():
+            self.metrics.merge(counts)
+            return False
+        try:
+            self._store_metrics(counts, requests)
+            return True
+        except Exception as e:
+            self.metrics.merge(counts)
+            self._error("METRICS FLUSH", e)
+            return False
+
+    def tune_ttls(self):
+        """Feed the shared metric totals of cached namespaces to self.ttls"""
+        if not self.available():
+            return
+        namespaces = sorted(cached_namespaces)
+        try:
+            rows = self._load_metrics(namespaces)
+        except Exception as e:
+            self._error("TTL TUNING", e)
+            return
+        self.ttls.update(dict(zip(namespaces, rows)))
+
+    def metrics_report(self, namespaces):
+        """Aggregated counters of all workers for each namespace, with rates"""
+        if not self.available():
+            return {}
+        try:
+            rows = self._load_metrics(namespaces)
+        except Exception as e:
+            self._error("METRICS REPORT", e)
+            return {}
+        report = {}
+        for namespace, values in zip(namespaces, rows):
+            counts = {field: float(value) for field, value in values.items()}
+            hits = (
+                counts.get("hits", 0)
+                + counts.get("l1_hits", 0)
+                + counts.get("not_modified", 0)
+            )
+            lookups = hits + counts.get("misses", 0)
+            fills = counts.get("fills", 0)
+            refreshes = counts.get("refreshes", 0)
+            report[namespace] = {
+                "hits": int(counts.get("hits", 0)),
+                "l1_hits": int(counts.get("l1_hits", 0)),
+                "misses": int(counts.get("misses", 0)),
+                "hit_rate": round(hits / lookups, 4) if lookups else None,
+                "stale_hits": int(counts.get("stale_hits", 0)),
+                "not_modified": int(counts.get("not_modified", 0)),
+                "fills": int(fills),
+                "avg_fill_ms": (
+                    round(counts.get("fill_ms", 0) / fills, 2) if fills else None
+                ),
+                "payload_bytes": int(counts.get("payload_bytes", 0)),
+                "avg_payload_bytes": (
+                    int(counts.get("payload_bytes", 0) / fills) if fills else None
+                ),
+                "refreshes": int(refreshes),
+                "avg_refresh_ms": (
+                    round(counts.get("refresh_ms", 0) / refreshes, 2)
+                    if refreshes else None
+                ),
+                "negative_hits": int(counts.get("negative_hits", 0)),
+                "negative_fills": int(counts.get("negative_fills", 0)),
+                "l1_evictions": int(counts.get("l1_evictions", 0)),
+                "uncached": int(counts.get("uncached", 0)),
+                "degraded": int(counts.get("degraded", 0)),
+                "invalidations": int(counts.get("invalidations", 0)),
+                "discarded_fills": int(counts.get("discarded_fills", 0)),
+            }
+        return report
+
+    def memory_report(self, sample_size=None, largest=10):
+        """
+        Estimate memory use per key prefix from a sample of the keyspace
+
+        Samples up to sample_size keys (CACHE_MEMORY_SAMPLE_SIZE) and groups
+        them by prefix (the part before the first colon). If the sample did
+        not cover the whole keyspace, counts and bytes are extrapolated by
+        total keys / sampled keys. Each prefix gets a TTL histogram and its
+        largest sampled entries.
+        """
+        if not self.available():
+            return None
+        sample_size = sample_size or current_app.config.get('CACHE_MEMORY_SAMPLE_SIZE', 10000)
+        try:
+            samples, complete, total_keys, memory = self._sample_memory(sample_size)
+        except Exception as e:
+            self._error("MEMORY REPORT", e)
+            return None
+
+        prefixes = defaultdict(
+            lambda: {"keys": 0, "bytes": 0, "ttl": Counter(), "largest": []}
+        )
+        for key, size, pttl in samples:
+            row = prefixes[key.split(':', 1)[0]]
+            row["keys"] += 1
+            row["bytes"] += size
+            row["ttl"][_ttl_bucket(pttl)] += 1
+            entry = (size, key, pttl)
+            if len(row["largest"]) < largest:
+                heapq.heappush(row["largest"], entry)
+            elif largest:
+                heapq.heappushpop(row["largest"], entry)
+
+        sampled = len(samples)
+        scale = total_keys / sampled if sampled and not complete else 1
+        sampled_bytes = sum(row["bytes"] for row in prefixes.values())
+        report = {}
+        for prefix, row in sorted(prefixes.items(), key=lambda item: -item[1]["bytes"]):
+            report[prefix] = {
+                "sampled_keys": row["keys"],
+                "sampled_bytes": row["bytes"],
+                "avg_bytes": int(row["bytes"] / row["keys"]),
+                "estimated_keys": int(row["keys"] * scale),
+                "estimated_bytes": int(row["bytes"] * scale),
+                "share": round(row["bytes"] / sampled_bytes, 4) if sampled_bytes else None,
+                "ttl": {label: row["ttl"][label] for label in TTL_LABELS},
+                "largest": [
+                    {"key": key, "bytes": size, "ttl": pttl // 1000 if pttl >= 0 else None}
+                    for size, key, pttl in sorted(row["largest"], reverse=True)
+                ],
+            }
+        return {
+            "complete": complete,
+            "sampled_keys": sampled,
+            "total_keys": total_keys,
+            "used_memory": memory.get('used_memory'),
+            "maxmemory": memory.get('maxmemory'),
+            "maxmemory_policy": memory.get('maxmemory_policy'),
+            "prefixes": report,
+        }
+
+    def queue_invalidations(self, namespaces, tags):
+        """
+        Invalidate in the background, after dropping this worker's L1 entries
+
+        The local drop keeps this worker's next read consistent with the
+        write it just committed.
+        """
+        for namespace in namespaces:
+            self._clear_local(namespace)
+        if tags:
+            self._drop_local_tags(tags)
+        self.invalidations.put(namespaces, tags)
+
+    def on_reset(self, hook):
+        """Register hook(), called after clear_all and after a reconnect"""
+        if hook not in self._reset_hooks:
+            self._reset_hooks.append(hook)
+
+    def _run_reset_hooks(self):
+        for hook in self._reset_hooks:
+            try:
+                hook()
+            except Exception as e:
+                current_app.logger.error(f"Cache reset hook error: {e}")
+
+
+class RedisCache(CacheBackend):
     """Redis cache manager"""
-    
+
+    name = "redis"
+
     def __init__(self):
+        super().__init__()
         self.redis_client = None
-    
+        # Second connection pool without response decoding, for entries that
+        # hold raw (possibly compressed) response bodies
+        self.binary_client = None
+        self._subscriber = None
+        self.breaker = CircuitBreaker()
+        self._reconnector = None
+        self._reconnect_lock = threading.Lock()
+        # Invalidations that could not reach Redis, replayed on reconnect
+        self._missed_namespaces = set()
+        self._missed_tags = set()
+
     def init_app(self, app):
-        """Initialize Redis connection"""
+        """
+        Initialize Redis connection
+
+        Clients are created even when Redis is unreachable; the breaker then
+        starts open and a background thread connects once Redis is back.
+        """
+        self.breaker = CircuitBreaker(
+            threshold=app.config.get('CACHE_BREAKER_THRESHOLD', 3),
+            window=app.config.get('CACHE_BREAKER_WINDOW', 10),
+            reset_timeout=app.config.get('CACHE_BREAKER_RESET_TIMEOUT', 5),
+        )
+        timeout = app.config.get('CACHE_SOCKET_TIMEOUT', 1.0)
+        self.redis_client = redis.from_url(
+            app.config['REDIS_URL'],
+            decode_responses=True,
+            socket_connect_timeout=timeout,
+            socket_timeout=timeout
+        )
+        self.binary_client = redis.from_url(
+            app.config['REDIS_URL'],
+            socket_connect_timeout=timeout,
+            socket_timeout=timeout
+        )
+        super().init_app(app)
+
         try:
-            self.redis_client = redis.from_url(
-                app.config['REDIS_URL'],
-                decode_responses=True,
-                socket_connect_timeout=5,
-                socket_timeout=5
-            )
             # Test connection
             self.redis_client.ping()
             app.logger.info("Redis connection established")
         except Exception as e:
             app.logger.error(f"Redis connection failed: {e}")
-            self.redis_client = None
-    
+            self.breaker.trip()
+            self._start_reconnect()
+            return
+        self._on_connect(app)
+
+    def _on_connect(self, app):
+        """Set up what needs a live connection: the L1 tier and its subscriber"""
+        if self._subscriber:
+            return
+        # The L1 tier is only safe while invalidations can be broadcast
+        self.local = {
+            prefix: LocalLRU(options.get('size', 128), options.get('ttl', 30))
+            for prefix, options in app.config.get('CACHE_L1', {}).items()
+        }
+        if self.local:
+            self._subscribe(app)
+
+    def available(self):
+        """Whether Redis calls should be attempted (breaker closed)"""
+        return self.redis_client is not None and self.breaker.allow()
+
+    def health(self):
+        """Breaker state and degraded-mode timings of this worker"""
+        return {"backend": self.name, **self.breaker.snapshot()}
+
+    def record_degraded(self, seconds):
+        self.breaker.record_degraded(seconds)
+
+    def _error(self, operation, e):
+        """Log a failed Redis call; connection problems count against the breaker"""
+        current_app.logger.error(f"Redis {operation} error: {e}")
+        if isinstance(e, (redis.ConnectionError, redis.TimeoutError)):
+            if self.breaker.record_failure():
+                current_app.logger.error("Redis circuit breaker opened")
+                self._start_reconnect()
+
+    def _start_reconnect(self):
+        with self._reconnect_lock:
+            if self._reconnector and self._reconnector.is_alive():
+                return
+            self._reconnector = threading.Thread(
+                target=self._reconnect, name="cache-reconnect", daemon=True
+            )
+            self._reconnector.start()
+
+    def _reconnect(self):
+        """Probe Redis until it answers, then close the breaker"""
+        app = self._app
+        while not self.breaker.allow():
+            time.sleep(self.breaker.reset_timeout)
+            try:
+                self.breaker.probe(self._ping)
+            except Exception as e:
+                app.logger.warning(f"Redis reconnect probe failed: {e}")
+                continue
+            app.logger.info("Redis connection re-established, circuit breaker closed")
+            with app.app_context():
+                self._on_connect(app)
+                self._replay_missed()
+                # Redis may have restarted empty
+                self._run_reset_hooks()
+
+    def _ping(self):
+        self.redis_client.ping()
+        self.binary_client.ping()
+
+    def _replay_missed(self):
+        """
+        Re-send invalidations dropped during the outage
+
+        Entries filled before the outage would otherwise outlive writes made
+        while Redis was unreachable. L1 tiers may have missed broadcasts from
+        other workers, so they are cleared too.
+        """
+        self._clear_local('*')
+        namespaces, self._missed_namespaces = self._missed_namespaces, set()
+        tags, self._missed_tags = self._missed_tags, set()
+        for namespace in namespaces:
+            self.invalidate(namespace)
+        if tags:
+            self.invalidate_tags(tags)
+
+    def _subscribe(self, app):
+        """Listen for invalidations published by other workers"""
+        def on_message(message):
+            data = message['data']
+            if data.startswith('{'):
+                self._drop_local_tags(json.loads(data)['tags'])
+            else:
+                self._clear_local(data)
+
+        def on_error(error, pubsub, thread):
+            # Messages may have been lost while disconnected
+            app.logger.error(f"Redis invalidation subscriber error: {error}")
+            self._clear_local('*')
+            time.sleep(1)
+
+        try:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: on_message})
+            self._subscriber = pubsub.run_in_thread(
+                sleep_time=1, daemon=True, exception_handler=on_error
+            )
+        except Exception as e:
+            app.logger.error(f"Redis SUBSCRIBE error: {e}")
+            self.local = {}
+
     def get(self, key):
         """Get value from cache"""
-        if not self.redis_client:
+        if not self.available():
             return None
         try:
             value = self.redis_client.get(key)
@@ -39,12 +1092,12 @@ class RedisCache:
                 return json.loads(value)
             return None
         except Exception as e:
-            current_app.logger.error(f"Redis GET error: {e}")
+            self._error("GET", e)
             return None
     
     def set(self, key, value, timeout=None):
         """Set value in cache"""
-        if not self.redis_client:
+        if not self.available():
             return False
         try:
             timeout = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
@@ -55,123 +1108,1189 @@ class RedisCache:
             )
             return True
         except Exception as e:
-            current_app.logger.error(f"Redis SET error: {e}")
+            self._error("SET", e)
             return False
     
+    def get_raw(self, key):
+        """Get stored bytes"""
+        if not self.available():
+            return None
+        try:
+            return self.binary_client.get(key)
+        except Exception as e:
+            self._error("GET", e)
+            return None
+
+    def set_raw(self, key, value, timeout=None):
+        """Store bytes"""
+        if not self.available():
+            return False
+        try:
+            timeout = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+            self.binary_client.setex(key, timeout, value)
+            return True
+        except Exception as e:
+            self._error("SET", e)
+            return False
+
+    def get_entry(self, key):
+        """Get a cached response entry with HGETALL"""
+        if not self.available():
+            return None
+        try:
+            return _decode_entry(self.binary_client.hgetall(key))
+        except Exception as e:
+            self._error("HGETALL", e)
+            return None
+
+    def get_entry_meta(self, key):
+        """Get only the etag, encoding and filled_at of an entry, leaving the body in Redis"""
+        if not self.available():
+            return None
+        try:
+            etag, encoding, filled_at = self.redis_client.hmget(key, "h", "e", "t")
+            if etag is None:
+                return None
+            return {"etag": etag, "encoding": encoding, "filled_at": float(filled_at)}
+        except Exception as e:
+            self._error("HMGET", e)
+            return None
+
+    def set_entry(self, key, entry, timeout=None):
+        """Store a response entry (see get_entry) atomically, replacing any old value"""
+        if not self.available():
+            return False
+        try:
+            timeout = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+            pipe = self.binary_client.pipeline(transaction=True)
+            pipe.delete(key)
+            pipe.hset(key, mapping={
+                "b": entry["body"],
+                "s": entry["status"],
+                "c": entry["content_type"],
+                "e": entry["encoding"],
+                "h": entry["etag"],
+                "g": json.dumps(entry["tags"]),
+                "t": entry["filled_at"],
+            })
+            pipe.expire(key, timeout)
+            pipe.execute()
+            return True
+        except Exception as e:
+            self._error("HSET", e)
+            return False
+
     def delete(self, key):
         """Delete key from cache"""
-        if not self.redis_client:
+        if not self.available():
             return False
         try:
             self.redis_client.delete(key)
             return True
         except Exception as e:
-            current_app.logger.error(f"Redis DELETE error: {e}")
+            self._error("DELETE", e)
             return False
     
+    def get_many(self, keys):
+        """MGET of JSON values"""
+        if not keys:
+            return []
+        if not self.available():
+            return [None] * len(keys)
+        try:
+            return [
+                json.loads(value) if value is not None else None
+                for value in self.redis_client.mget(keys)
+            ]
+        except Exception as e:
+            self._error("MGET", e)
+            return [None] * len(keys)
+
+    def set_many(self, values, timeout=None, tags=None):
+        """SETEX each value and index it under its tags, in one pipeline"""
+        if not values or not self.available():
+            return False
+        try:
+            timeout = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+            tag_ttl = current_app.config.get('CACHE_TAG_TTL', 7200)
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key, value in values.items():
+                pipe.setex(key, timeout, json.dumps(value))
+                for tag in (tags or {}).get(key, ()):
+                    pipe.sadd(f"cache_tag:{tag}", key)
+                    pipe.expire(f"cache_tag:{tag}", tag_ttl)
+            pipe.execute()
+            return True
+        except Exception as e:
+            self._error("SET MANY", e)
+            return False
+
+    def _scan(self, pattern):
+        """
+        Yield batches of keys matching pattern using SCAN.
+
+        Stops early (with a warning) once CACHE_INVALIDATION_BUDGET seconds
+        have elapsed so a single call can never monopolize Redis.
+        """
+        batch_size = current_app.config.get('CACHE_SCAN_BATCH_SIZE', 500)
+        budget = current_app.config.get('CACHE_INVALIDATION_BUDGET', 0.5)
+        deadline = time.monotonic() + budget
+        cursor = 0
+        while True:
+            cursor, keys = self.redis_client.scan(
+                cursor=cursor, match=pattern, count=batch_size
+            )
+            if keys:
+                yield keys
+            if cursor == 0:
+                return
+            if time.monotonic() > deadline:
+                current_app.logger.warning(
+                    f"Redis SCAN budget exhausted for pattern: {pattern}"
+                )
+                return
+
     def delete_pattern(self, pattern):
-        """Delete all keys matching pattern"""
-        if not self.redis_client:
+        """
+        Delete all keys matching pattern
+
+        Walks the keyspace incrementally with SCAN and removes matches with
+        UNLINK (freed in a background thread by Redis). Each UNLINK batch is
+        pipelined together with the next SCAN page, so a call costs one round
+        trip per page and is bounded by CACHE_INVALIDATION_BUDGET. Keys left
+        behind when the budget runs out still expire through their TTL.
+        """
+        if not self.available():
             return False
         try:
-            keys = self.redis_client.keys(pattern)
+            batch_size = current_app.config.get('CACHE_SCAN_BATCH_SIZE', 500)
+            budget = current_app.config.get('CACHE_INVALIDATION_BUDGET', 0.5)
+            deadline = time.monotonic() + budget
+            cursor = 0
+            pending = []
+            while True:
+                pipe = self.redis_client.pipeline(transaction=False)
+                if pending:
+                    pipe.unlink(*pending)
+                pipe.scan(cursor=cursor, match=pattern, count=batch_size)
+                cursor, pending = pipe.execute()[-1]
+                if cursor == 0 or time.monotonic() > deadline:
+                    break
+            if pending:
+                self.redis_client.unlink(*pending)
+            if cursor != 0:
+                current_app.logger.warning(
+                    f"Redis DELETE PATTERN budget exhausted for pattern: {pattern}"
+                )
+            return True
+        except Exception as e:
+            self._error("DELETE PATTERN", e)
+            return False
+
+    def count_pattern(self, pattern):
+        """Count keys matching pattern without blocking Redis (see _scan)"""
+        if not self.available():
+            return 0
+        try:
+            return sum(len(keys) for keys in self._scan(pattern))
+        except Exception as e:
+            self._error("COUNT PATTERN", e)
+            return 0
+
+    def _sample_memory(self, sample_size):
+        """
+        SCAN up to sample_size keys, pipelining MEMORY USAGE and PTTL per page
+
+        Stops after CACHE_MEMORY_SCAN_BUDGET seconds.
+        """
+        config = current_app.config
+        batch_size = config.get('CACHE_SCAN_BATCH_SIZE', 500)
+        deadline = time.monotonic() + config.get('CACHE_MEMORY_SCAN_BUDGET', 2.0)
+        samples = []
+        cursor = 0
+        truncated = False
+        while True:
+            cursor, keys = self.redis_client.scan(cursor=cursor, count=batch_size)
+            if len(keys) > sample_size - len(samples):
+                keys = keys[:sample_size - len(samples)]
+                truncated = True
             if keys:
-                self.redis_client.delete(*keys)
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.memory_usage(key)
+                    pipe.pttl(key)
+                results = pipe.execute()
+                for key, size, pttl in zip(keys, results[::2], results[1::2]):
+                    # Expired or evicted since the SCAN
+                    if size is not None:
+                        samples.append((key, size, pttl))
+            if cursor == 0 or len(samples) >= sample_size or time.monotonic() > deadline:
+                break
+        complete = cursor == 0 and not truncated
+        return samples, complete, self.redis_client.dbsize(), self.redis_client.info('memory')
+
+    def stats(self):
+        """DBSIZE and the global INFO stats counters"""
+        info = self.redis_client.info('stats')
+        return {
+            "total_keys": self.redis_client.dbsize(),
+            "hits": info.get('keyspace_hits', 0),
+            "misses": info.get('keyspace_misses', 0),
+            "evicted_keys": info.get('evicted_keys', 0),
+        }
+
+    def get_version(self, namespace):
+        """
+        Get the current generation of a cache namespace
+
+        Missing counters are seeded from the clock (milliseconds) rather than
+        0, so a counter lost to FLUSHDB or LRU eviction can never roll back
+        onto a generation whose entries are still in Redis.
+        """
+        if not self.available():
+            return None
+        try:
+            key = f"cache_version:{namespace}"
+            version = self.redis_client.get(key)
+            if version is None:
+                self.redis_client.set(key, int(time.time() * 1000), nx=True)
+                version = self.redis_client.get(key)
+            return version
+        except Exception as e:
+            self._error("GET VERSION", e)
+            return None
+
+    def acquire_lock(self, key):
+        """
+        Try to become the single filler of a cache key
+
+        Returns a token when the lock was acquired, None when another request
+        holds it, and an empty token when Redis is unusable (fill without a
+        lock). The lock expires after CACHE_LOCK_TIMEOUT seconds so a crashed
+        filler can never wedge the key.
+        """
+        if not self.available():
+            return ""
+        try:
+            token = uuid.uuid4().hex
+            timeout = current_app.config.get('CACHE_LOCK_TIMEOUT', 10)
+            if self.redis_client.set(f"lock:{key}", token, nx=True, px=int(timeout * 1000)):
+                return token
+            return None
+        except Exception as e:
+            self._error("LOCK", e)
+            return ""
+
+    def release_lock(self, key, token):
+        """Release a fill lock acquired with acquire_lock"""
+        if not token or not self.available():
+            return False
+        try:
+            self.redis_client.eval(RELEASE_LOCK_SCRIPT, 1, f"lock:{key}", token)
             return True
         except Exception as e:
-            current_app.logger.error(f"Redis DELETE PATTERN error: {e}")
+            self._error("UNLOCK", e)
             return False
-    
+
+    def wait_for(self, key):
+        """
+        Wait for another request to fill a locked key
+
+        Polls until the entry appears, the lock is released without a value
+        (e.g. the filler got an error response) or CACHE_LOCK_WAIT seconds
+        pass. Returns the cached entry or None.
+        """
+        if not self.available():
+            return None
+        try:
+            wait = current_app.config.get('CACHE_LOCK_WAIT', 2.0)
+            interval = current_app.config.get('CACHE_LOCK_POLL_INTERVAL', 0.05)
+            deadline = time.monotonic() + wait
+            while time.monotonic() < deadline:
+                time.sleep(interval)
+                pipe = self.binary_client.pipeline(transaction=False)
+                pipe.hgetall(key)
+                pipe.exists(f"lock:{key}")
+                value, locked = pipe.execute()
+                if value:
+                    return _decode_entry(value)
+                if not locked:
+                    return None
+            return None
+        except Exception as e:
+            self._error("WAIT", e)
+            return None
+
+    def _store_metrics(self, counts, requests):
+        """Add counters to the cache_metrics:<namespace> hashes in one pipeline"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for namespace, fields in counts.items():
+            for field, amount in fields.items():
+                if isinstance(amount, float):
+                    pipe.hincrbyfloat(f"cache_metrics:{namespace}", field, amount)
+                else:
+                    pipe.hincrby(f"cache_metrics:{namespace}", field, amount)
+        if requests:
+            tracked = current_app.config.get('CACHE_HOT_REQUESTS_TRACKED', 1000)
+            for target, amount in requests.items():
+                pipe.zincrby(HOT_REQUESTS_KEY, amount, target)
+            pipe.zremrangebyrank(HOT_REQUESTS_KEY, 0, -tracked - 1)
+        pipe.execute()
+
+    def _load_metrics(self, namespaces):
+        """One pipelined HGETALL per namespace; the keyspace is never scanned"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for namespace in namespaces:
+            pipe.hgetall(f"cache_metrics:{namespace}")
+        return pipe.execute()
+
+    def hot_requests(self, limit):
+        """Top of the cache_hot_requests sorted set"""
+        if limit <= 0 or not self.available():
+            return []
+        try:
+            return self.redis_client.zrevrange(HOT_REQUESTS_KEY, 0, limit - 1)
+        except Exception as e:
+            self._error("HOT REQUESTS", e)
+            return []
+
+    def invalidate(self, namespace):
+        """
+        Invalidate a namespace in Redis and in every worker's L1 tier
+
+        The generation bump and the broadcast share one round trip.
+        """
+        self._clear_local(namespace)
+        if not self.available():
+            self._missed_namespaces.add(namespace)
+            return False
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.incr(f"cache_version:{namespace}")
+            pipe.publish(INVALIDATION_CHANNEL, namespace)
+            pipe.execute()
+            return True
+        except Exception as e:
+            self._error("INVALIDATE", e)
+            self._missed_namespaces.add(namespace)
+            return False
+
+    def tag(self, key, tags, timeout=None):
+        """
+        Index a cache key under entity tags (e.g. "series:WS123")
+
+        Each tag is a Redis set of the keys whose content depends on that
+        entity; see invalidate_tags. Sets outlive the entries they index
+        (CACHE_TAG_TTL) so an entry can never outlive its index. NX sets
+        the TTL of a new set and GT only ever extends it, so tagging a
+        short-lived entry cannot cut short the index of a longer one.
+        """
+        if not tags or not self.available():
+            return False
+        try:
+            tag_ttl = current_app.config.get('CACHE_TAG_TTL', 7200)
+            if timeout is not None:
+                tag_ttl = min(tag_ttl, timeout)
+            pipe = self.redis_client.pipeline(transaction=False)
+            for tag in tags:
+                pipe.sadd(f"cache_tag:{tag}", key)
+                pipe.expire(f"cache_tag:{tag}", tag_ttl, nx=True)
+                pipe.expire(f"cache_tag:{tag}", tag_ttl, gt=True)
+            pipe.execute()
+            return True
+        except Exception as e:
+            self._error("TAG", e)
+            return False
+
+    def invalidate_tags(self, tags):
+        """
+        Invalidate only the entries indexed under the given entity tags
+
+        Costs one round trip to read the tag sets and one to UNLINK their
+        members, independent of the size of the namespaces involved. Every
+        worker drops matching L1 entries.
+        """
+        tags = list(tags)
+        if not tags:
+            return True
+        self._drop_local_tags(tags)
+        if not self.available():
+            self._missed_tags.update(tags)
+            return False
+        try:
+            tag_keys = [f"cache_tag:{tag}" for tag in tags]
+            stamp_ttl = current_app.config.get('CACHE_TAG_STAMP_TTL', 300)
+            sequence = self.redis_client.incr(TAG_SEQUENCE_KEY)
+            pipe = self.redis_client.pipeline(transaction=False)
+            # Stamped before the members are read, see tags_invalidated_since
+            for tag in tags:
+                pipe.set(f"cache_tag_at:{tag}", sequence, ex=stamp_ttl)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            members = set()
+            for tag_members in pipe.execute()[len(tags):]:
+                members.update(tag_members)
+            self._count_tag_invalidations(members)
+            keys = list(members | set(tag_keys))
+            batch_size = current_app.config.get('CACHE_SCAN_BATCH_SIZE', 500)
+            pipe = self.redis_client.pipeline(transaction=False)
+            for i in range(0, len(keys), batch_size):
+                pipe.unlink(*keys[i:i + batch_size])
+            pipe.publish(INVALIDATION_CHANNEL, json.dumps({"tags": tags}))
+            pipe.execute()
+            return True
+        except Exception as e:
+            self._error("INVALIDATE TAGS", e)
+            self._missed_tags.update(tags)
+            return False
+
+    def tag_sequence(self):
+        if not self.available():
+            return None
+        try:
+            return int(self.redis_client.get(TAG_SEQUENCE_KEY) or 0)
+        except Exception as e:
+            self._error("GET TAG SEQUENCE", e)
+            return None
+
+    def tags_invalidated_since(self, tags, sequence):
+        tags = list(tags)
+        if not tags:
+            return set()
+        if sequence is None or not self.available():
+            return set(tags)
+        try:
+            stamps = self.redis_client.mget([f"cache_tag_at:{tag}" for tag in tags])
+        except Exception as e:
+            self._error("MGET TAG STAMPS", e)
+            return set(tags)
+        return {
+            tag for tag, stamp in zip(tags, stamps)
+            if stamp is not None and int(stamp) > sequence
+        }
+
     def clear_all(self):
-        """Clear all cache"""
-        if not self.redis_client:
+        """FLUSHDB, keeping the cache_hot_requests ranking and tag sequence"""
+        self._clear_local('*')
+        if not self.available():
             return False
         try:
+            hot = self.redis_client.zrange(HOT_REQUESTS_KEY, 0, -1, withscores=True)
+            sequence = self.redis_client.get(TAG_SEQUENCE_KEY)
             self.redis_client.flushdb()
-            return True
+            pipe = self.redis_client.pipeline(transaction=False)
+            if hot:
+                pipe.zadd(HOT_REQUESTS_KEY, dict(hot))
+            # Fills in flight compare against it, so it must never go back
+            if sequence:
+                pipe.set(TAG_SEQUENCE_KEY, sequence)
+            pipe.publish(INVALIDATION_CHANNEL, '*')
+            pipe.execute()
         except Exception as e:
-            current_app.logger.error(f"Redis FLUSHDB error: {e}")
+            self._error("FLUSHDB", e)
             return False
+        self._run_reset_hooks()
+        return True
+
+
+class Cache:
+    """
+    The cache backend named by CACHE_BACKEND, as a Flask extension
+
+    "redis" (the default) uses RedisCache; "local" keeps everything in
+    process (see LocalCache). Attribute access is forwarded to the backend
+    created by init_app, so modules can import the global cache before the
+    app is configured.
+    """
+
+    def __init__(self):
+        self.backend = RedisCache()
+
+    def init_app(self, app):
+        name = app.config.get('CACHE_BACKEND', 'redis')
+        if name == 'local':
+            from app.utils.cache_local import LocalCache
+            backend_class = LocalCache
+        elif name == 'redis':
+            backend_class = RedisCache
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND: {name}")
+        if type(self.backend) is not backend_class:
+            self.backend = backend_class()
+        self.backend.init_app(app)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
 
 
 # Global cache instance
-cache = RedisCache()
+cache = Cache()
+
+# Namespaces registered by cache_response, reported by the admin cache stats
+cached_namespaces = set()
+
+# Namespaces that writes invalidate, through invalidate_cache,
+# invalidate_namespaces or entity tags; see AdaptiveTTL
+invalidation_paths = set()
+
+
+def _build_entry(response):
+    """
+    Snapshot a response as a cache entry, compressing large bodies
+
+    The strong ETag is a digest of the uncompressed body.
+    """
+    body = response.get_data()
+    etag = hashlib.sha1(body).hexdigest()
+    encoding = ""
+    if len(body) >= current_app.config.get('CACHE_COMPRESS_THRESHOLD', 1024):
+        body = gzip.compress(body, compresslevel=current_app.config.get('CACHE_COMPRESS_LEVEL', 6))
+        encoding = "gzip"
+    return {
+        "body": body,
+        "status": response.status_code,
+        "content_type": response.content_type,
+        "encoding": encoding,
+        "etag": etag,
+        "filled_at": time.time(),
+    }
+
+
+def _etag_matches(etag):
+    """Whether If-None-Match names either encoding of an entry's ETag"""
+    if_none_match = request.if_none_match
+    return bool(if_none_match) and (
+        if_none_match.contains(etag) or if_none_match.contains(f"{etag}-gzip")
+    )
+
+
+def _sends_encoded(encoding):
+    """Whether a stored body in this encoding goes to the client as is"""
+    return bool(encoding) and encoding in request.accept_encodings
+
+
+def _not_modified(etag, encoding):
+    response = Response(status=304)
+    response.set_etag(f"{etag}-{encoding}" if _sends_encoded(encoding) else etag)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def _entry_response(entry):
+    """
+    Build a response from a cache entry without re-serializing it
+
+    Compressed bodies are sent as stored to clients that accept gzip and
+    only inflated for the ones that do not. The gzip representation gets its
+    own strong ETag (suffixed "-gzip"), as the bytes differ.
+    """
+    if _etag_matches(entry["etag"]):
+        return _not_modified(entry["etag"], entry["encoding"])
+
+    body = entry["body"]
+    etag = entry["etag"]
+    headers = {}
+    if _sends_encoded(entry["encoding"]):
+        headers["Content-Encoding"] = entry["encoding"]
+        etag = f"{etag}-{entry['encoding']}"
+    elif entry["encoding"]:
+        body = gzip.decompress(body)
+    response = Response(
+        body, status=entry["status"], content_type=entry["content_type"], headers=headers
+    )
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def page_size(value):
+    """
+    A requested per_page, rounded up to the nearest of CACHE_PER_PAGE_SIZES
+
+    Sizes above the largest are clamped to it. Views read per_page with
+    request.args.get("per_page", default, type=page_size) and canonical_query
+    keys on the same value, so per_page=21 is served and cached as
+    per_page=24. Raises ValueError on a non-integer, so args.get falls back
+    to the default.
+    """
+    value = int(value)
+    sizes = sorted(current_app.config.get('CACHE_PER_PAGE_SIZES', (10, 20, 24, 50, 100, 1000)))
+    return next((size for size in sizes if size >= value), sizes[-1])
 
 
-def cache_response(timeout=None, key_prefix='view'):
+def canonical_query(args, query_args=None):
+    """
+    Build the canonical query-string part of a cache key
+
+    Variants of the same request map to one key: arguments are sorted,
+    empty values and values equal to the view's default are dropped, integer
+    arguments are parsed (so page=01 is page=1, and an unparsable value falls
+    back to the default like request.args.get(..., type=int) does), and
+    values longer than CACHE_KEY_MAX_ARG_LENGTH are replaced by their SHA-1.
+    Only the first value of a repeated argument counts, as with args.get.
+
+    query_args maps each argument the view reads to its default; other
+    arguments (cache busters, typos) are ignored. Without it every non-empty
+    argument is kept. per_page is rounded with page_size, as the views do.
+    """
+    max_length = current_app.config.get('CACHE_KEY_MAX_ARG_LENGTH', 64)
+    items = []
+    for name in sorted(args):
+        if query_args is not None and name not in query_args:
+            continue
+        default = query_args.get(name) if query_args is not None else None
+        value = args.get(name)
+        if isinstance(default, int) or name in ('page', 'per_page'):
+            try:
+                value = page_size(value) if name == 'per_page' else int(value)
+            except ValueError:
+                if default is not None:
+                    continue
+            else:
+                if value == default:
+                    continue
+                value = str(value)
+        if value == '' or value == default:
+            continue
+        if len(value) > max_length:
+            value = 'sha1-' + hashlib.sha1(value.encode('utf-8')).hexdigest()
+        items.append(f"{name}={quote(value, safe='')}")
+    return '&'.join(items)
+
+
+def _record_request(query):
+    """Count the request towards the warm list (see CacheMetrics.record_request)"""
+    # Hashed values cannot be replayed, so such URLs are not ranked
+    if not g.get("cache_warming") and "=sha1-" not in query:
+        cache.metrics.record_request(
+            f"{request.path}?{query}" if query else request.path,
+            current_app.config.get('CACHE_HOT_REQUESTS_TRACKED', 1000),
+        )
+
+
+def _store_result(response, cache_key, ttl, key_prefix, local_key, local_generation, tags,
+                  fill_seconds, negative=None, tag_sequence=None):
+    """
+    Cache a view response in Redis and the L1 tier if it is a 200
+
+    negative is an optional (timeout, tags) pair: 404s are then cached too,
+    for that many seconds and under those tags. tag_sequence is
+    cache.tag_sequence() from before the view ran. A local_key of None
+    keeps the entry out of the L1 tier. Returns the entry built from the
+    response, or None if it was not cacheable.
+    """
+    tag_timeout = None
+    if response.status_code == 200:
+        entry_tags = sorted(tags(response.get_json())) if tags else []
+    elif response.status_code == 404 and negative:
+        ttl, entry_tags = negative
+        # The index of a short-lived 404 need not outlive it
+        tag_timeout = ttl
+        cache.metrics.incr(key_prefix, "negative_fills")
+    else:
+        return
+    entry = _build_entry(response)
+    cache.metrics.incr(key_prefix, "fills")
+    cache.metrics.incr(key_prefix, "fill_ms", fill_seconds * 1000)
+    cache.metrics.incr(key_prefix, "payload_bytes", len(entry["body"]))
+    entry["tags"] = entry_tags
+    cache.set_entry(cache_key, entry, ttl)
+    cache.tag(cache_key, entry["tags"], tag_timeout)
+    # A write that committed while the view ran may have dropped its tags
+    # before the entry was tagged; the entry could hold the old data
+    if entry_tags and cache.tags_invalidated_since(entry_tags, tag_sequence):
+        cache.delete(cache_key)
+        cache.metrics.incr(key_prefix, "discarded_fills")
+        return entry
+    if local_key is not None:
+        cache.local_set(key_prefix, local_key, entry, local_generation)
+    return entry
+
+
+def _request_key(key_prefix, query_args, vary_on_role=False):
+    """
+    Key of the current request within a cached view's namespace
+
+    The request path and canonical query (see canonical_query), prefixed
+    with the caller's role for vary_on_role views. Returns None, counted as
+    "uncached", when the request is to be served without the cache.
+    """
+    query = canonical_query(request.args, query_args)
+    scope = ""
+    if vary_on_role:
+        role = g.get("current_role")
+        if role is None:
+            cache.metrics.incr(key_prefix, "uncached")
+            g.cache_status = "uncached"
+            return None
+        scope = f"role={quote(role, safe='')}:"
+    # Role-scoped URLs are not ranked: the warmer cannot request them
+    else:
+        _record_request(query)
+    return f"{request.path}:{scope}{query}"
+
+
+def _local_hit(key_prefix, local_key):
+    """
+    Entry of the request in the L1 tier, or None
+
+    The L1 tier is keyed without the generation so a hit needs no Redis
+    round trip; invalidations clear it explicitly instead.
+    """
+    entry = cache.local_get(key_prefix, local_key)
+    if entry is not None:
+        current_app.logger.debug(f"Cache L1 HIT: {key_prefix}:{local_key}")
+        cache.metrics.incr(key_prefix, "l1_hits")
+        g.cache_status = "hit"
+    return entry
+
+
+def _serve_degraded(key_prefix, started, view, args, kwargs):
+    """Degraded mode: the backend is unusable, serve straight from the DB"""
+    cache.metrics.incr(key_prefix, "degraded")
+    g.cache_status = "degraded"
+    try:
+        return view(*args, **kwargs)
+    finally:
+        cache.record_degraded(time.perf_counter() - started)
+
+
+def _view_ttls(key_prefix, timeout, stale_timeout, adaptive=True):
+    """(soft TTL, hard TTL) of a cached view's entries, see AdaptiveTTL"""
+    fresh_for = cache.ttls.ttl(
+        key_prefix,
+        timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300),
+        adaptive,
+    )
+    return fresh_for, fresh_for + (stale_timeout or 0)
+
+
+def _read_or_lock(key_prefix, cache_key):
+    """
+    Read the entry of cache_key, or become the single request filling it
+
+    Returns (entry, lock_token). On a miss only one request per key gets
+    the fill lock; concurrent misses wait briefly for its result instead of
+    all hitting the DB (see acquire_lock and wait_for). The caller releases
+    the token once it has filled the key.
+    """
+    entry = cache.get_entry(cache_key)
+    lock_token = None
+    if entry is None:
+        lock_token = cache.acquire_lock(cache_key)
+        if lock_token is None:
+            entry = cache.wait_for(cache_key)
+    if entry is None:
+        current_app.logger.debug(f"Cache MISS: {cache_key}")
+        cache.metrics.incr(key_prefix, "misses")
+        g.cache_status = "miss"
+    else:
+        current_app.logger.debug(f"Cache HIT: {cache_key}")
+        cache.metrics.incr(key_prefix, "hits")
+        g.cache_status = "hit"
+    return entry, lock_token
+
+
+def _refresh_if_stale(key_prefix, cache_key, entry, fresh_for, stale_timeout, fill):
+    """
+    Whether a hit is past its soft TTL, refreshing it if so
+
+    The entry is still served while one request (holding the fill lock)
+    calls fill() in a background thread to recompute and store it.
+    """
+    if not stale_timeout or time.time() - entry["filled_at"] <= fresh_for:
+        return False
+    cache.metrics.incr(key_prefix, "stale_hits")
+    g.cache_status = "stale"
+    token = cache.acquire_lock(cache_key)
+    if token:
+        @copy_current_request_context
+        def refresh():
+            started = time.perf_counter()
+            try:
+                fill()
+            except Exception as e:
+                current_app.logger.error(f"Cache refresh error: {e}")
+            finally:
+                cache.release_lock(cache_key, token)
+                cache.metrics.incr(key_prefix, "refreshes")
+                cache.metrics.incr(
+                    key_prefix, "refresh_ms", (time.perf_counter() - started) * 1000
+                )
+
+        if not cache.submit_refresh(refresh):
+            cache.release_lock(cache_key, token)
+    return True
+
+
+def cache_response(timeout=None, key_prefix='view', stale_timeout=None, tags=None,
+                   query_args=None, negative_timeout=None, negative_tag=None,
+                   vary_on_role=False, adaptive=True):
     """
     Decorator to cache API responses
 
+    Entries hold the final response bytes (gzip-compressed above
+    CACHE_COMPRESS_THRESHOLD) with their status, content type and a strong
+    ETag, so a hit is returned without decoding or re-encoding JSON, and a
+    request whose If-None-Match matches gets a 304 without the body ever
+    leaving Redis.
+
+    Lookups go through the L1 tier (if configured for key_prefix), then
+    Redis. On a miss only one request per key recomputes the response while
+    concurrent requests wait briefly for its result (see acquire_lock).
+    The outcome ("hit", "stale", "miss", "uncached" or "degraded") is left
+    in g.cache_status.
+
+    With stale_timeout, an entry older than timeout (the soft TTL) is still
+    returned immediately for up to stale_timeout more seconds (the hard TTL
+    is their sum) while one request refreshes it in a background thread.
+
+    With CACHE_ADAPTIVE_TTL, timeout is the base that AdaptiveTTL lengthens
+    or shortens for key_prefix from its read and invalidation rates. Pass
+    adaptive=False for views whose freshness rests on timeout alone (data
+    changed by triggers or other processes).
+
+    tags is an optional callable taking the response JSON (with the request
+    still available) and returning the entity tags the entry depends on, so
+    writes can drop just those entries with invalidate_entities.
+
+    query_args maps the query arguments the view reads to their defaults
+    and is used to build canonical keys (see canonical_query).
+
+    With negative_timeout, 404 responses are cached for that many seconds,
+    so lookups of missing IDs stop reaching the database. negative_tag is
+    formatted with the view arguments (e.g. "series:{series_id}") and tags
+    the 404, so creating that entity drops it through invalidate_entities.
+
+    With vary_on_role, the key includes the caller's role (g.current_role),
+    so all users with one role share an entry. The decorator must sit below
+    the auth check that sets the role, such as admin_required; without a role
+    the response is served uncached.
+
     Usage:
-        @cache_response(timeout=300, key_prefix='series')
+        @cache_response(timeout=300, key_prefix='series', stale_timeout=600,
+                        query_args={'page': 1, 'per_page': 20, 'search': ''})
         def get_series():
             return series_data
     """
+    cached_namespaces.add(key_prefix)
+    if tags or negative_tag:
+        invalidation_paths.add(key_prefix)
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            started = time.perf_counter()
+            local_key = _request_key(key_prefix, query_args, vary_on_role)
+            if local_key is None:
+                return f(*args, **kwargs)
+
+            local_generation = cache.local_generation(key_prefix)
+            entry = _local_hit(key_prefix, local_key)
+            if entry is not None:
+                return _entry_response(entry)
+
+            # Build cache key from the namespace generation, request path
+            # and query parameters
+            version = cache.get_version(key_prefix)
+            if version is None:
+                return _serve_degraded(key_prefix, started, f, args, kwargs)
+            cache_key = f"{key_prefix}:v{version}:{local_key}"
+            fresh_for, ttl = _view_ttls(key_prefix, timeout, stale_timeout, adaptive)
+            negative = None
+            if negative_timeout:
+                negative = (
+                    negative_timeout,
+                    [negative_tag.format(**kwargs)] if negative_tag else [],
+                )
+
+            def fill():
+                """Run the view and cache its response; returns (entry, response)"""
+                fill_started = time.perf_counter()
+                sequence = cache.tag_sequence()
+                response = current_app.make_response(f(*args, **kwargs))
+                entry = _store_result(
+                    response, cache_key, ttl, key_prefix, local_key,
+                    local_generation, tags, time.perf_counter() - fill_started,
+                    negative, sequence
+                )
+                return entry, response
+
+            # Revalidation: answer from the ETag alone while the entry is fresh
+            if request.if_none_match:
+                meta = cache.get_entry_meta(cache_key)
+                if (
+                    meta is not None
+                    and _etag_matches(meta["etag"])
+                    and time.time() - meta["filled_at"] <= fresh_for
+                ):
+                    cache.metrics.incr(key_prefix, "not_modified")
+                    g.cache_status = "hit"
+                    return _not_modified(meta["etag"], meta["encoding"])
+
+            entry, lock_token = _read_or_lock(key_prefix, cache_key)
+            if entry is not None:
+                if entry["status"] == 404:
+                    cache.metrics.incr(key_prefix, "negative_hits")
+                if not _refresh_if_stale(
+                    key_prefix, cache_key, entry, fresh_for, stale_timeout, fill
+                ):
+                    cache.local_set(key_prefix, local_key, entry, local_generation)
+                return _entry_response(entry)
+
+            try:
+                entry, response = fill()
+            finally:
+                cache.release_lock(cache_key, lock_token)
+            # Served from the entry so a miss negotiates gzip and sends the
+            # same Vary and ETag headers as a hit
+            return _entry_response(entry) if entry else response
+
+        # Read by benchmarks/replay_cache_keys.py and the cache warmer
+        decorated_function.cache_key_prefix = key_prefix
+        decorated_function.cache_query_args = query_args
+        decorated_function.cache_timeout = timeout
+        decorated_function.cache_vary_on_role = vary_on_role
+        return decorated_function
+    return decorator
+
+
+def cached_cards(kind, ids, load, timeout=None):
+    """
+    Documents of the entities in ids, in order, from per-entity cards
+
+    Cards are stored once per entity as "<kind>_card:<id>", however many
+    cached listings show it. All cards are fetched in one get_many round
+    trip and load(missing_ids) is called once for the rest, returning
+    {id: document}. Filled cards are tagged "<kind>:<id>", so
+    invalidate_entities drops exactly the card of the entity a write
+    touched. IDs that load does not return (deleted since a listing was
+    cached) are left out.
+    """
+    if not ids:
+        return []
+    namespace = f"{kind}_card"
+    cached_namespaces.add(namespace)
+    invalidation_paths.add(namespace)
+    keys = [f"{namespace}:{entity_id}" for entity_id in ids]
+    docs = dict(zip(ids, cache.get_many(keys)))
+    missing = [entity_id for entity_id, doc in docs.items() if doc is None]
+    cache.metrics.incr(namespace, "hits", len(docs) - len(missing))
+    if missing:
+        cache.metrics.incr(namespace, "misses", len(missing))
+        sequence = cache.tag_sequence()
+        started = time.perf_counter()
+        loaded = load(missing)
+        cache.metrics.incr(namespace, "fills", len(loaded))
+        cache.metrics.incr(namespace, "fill_ms", (time.perf_counter() - started) * 1000)
+        cache.set_many(
+            {f"{namespace}:{entity_id}": doc for entity_id, doc in loaded.items()},
+            timeout,
+            tags={f"{namespace}:{entity_id}": [f"{kind}:{entity_id}"] for entity_id in loaded},
+        )
+        # Cards of entities written while they loaded may be stale, see
+        # tags_invalidated_since; they are served this once but not kept
+        entity_tags = {f"{kind}:{entity_id}": entity_id for entity_id in loaded}
+        for tag in cache.tags_invalidated_since(entity_tags, sequence):
+            cache.delete(f"{namespace}:{entity_tags[tag]}")
+            cache.metrics.incr(namespace, "discarded_fills")
+        docs.update(loaded)
+    return [docs[entity_id] for entity_id in ids if docs.get(entity_id) is not None]
+
+
+def _entry_json(entry):
+    """The JSON document held by a cache entry"""
+    body = entry["body"]
+    return json.loads(gzip.decompress(body) if entry["encoding"] else body)
+
+
+def cache_listing(timeout=None, key_prefix='view', query_args=None, field='items', cards=None,
+                  stale_timeout=None, tags=None, adaptive=True):
+    """
+    Decorator to cache a listing as its ordered IDs, hydrated from cards
+
+    The view returns a dict holding the page's entity "ids" and any other
+    JSON fields (totals, page numbers), or an error response, which is
+    passed through. The dict is cached under key_prefix's generation with
+    the same canonical keys as cache_response, and every request builds
+    the response as {field: cards(ids), **other_fields} (see cached_cards).
+    Entity documents are thus shared by all pages, searches and filters that
+    show them; a write to one entity drops its card, and only writes that
+    change which entities a listing holds or their order need to bump
+    key_prefix.
+
+    The ID lists get the fill lock, stale_timeout and adaptive TTLs of
+    cache_response. The L1 tier (if configured for key_prefix) holds the
+    hydrated pages, tagged with tags(response JSON) so that a write to any
+    entity shown drops them; an L1 hit is served without a Redis round
+    trip. Responses carry a strong ETag, negotiate gzip and answer
+    If-None-Match with a 304 like cache_response entries.
+
+    Usage:
+        @cache_listing(timeout=300, key_prefix='series', field='series',
+                       cards=series_cards, query_args={'page': 1},
+                       tags=series_list_tags)
+        def get_series():
+            return {"ids": [...], "total": 42}
+    """
+    cached_namespaces.add(key_prefix)
+
     def decorator(f):
+        def hydrate(listing):
+            data = dict(listing)
+            return {field: cards(data.pop("ids")), **data}
+
+        def run(*args, **kwargs):
+            listing = f(*args, **kwargs)
+            return jsonify(hydrate(listing)) if isinstance(listing, dict) else listing
+
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            from flask import Response
-
-            # Build cache key from request path and query parameters
-            cache_key = f"{key_prefix}:{request.path}:{request.query_string.decode('utf-8')}"
-
-            # Try to get from cache
-            cached_data = cache.get(cache_key)
-            if cached_data is not None:
-                current_app.logger.debug(f"Cache HIT: {cache_key}")
-                # Return cached data as Flask response
-                response_data, status_code = cached_data
-                from flask import jsonify
-                return jsonify(response_data), status_code
-
-            # Execute function and cache result
-            current_app.logger.debug(f"Cache MISS: {cache_key}")
-            result = f(*args, **kwargs)
-
-            # Handle Flask Response objects
-            if isinstance(result, Response):
-                # Extract data from Response
-                if result.status_code == 200:
-                    data = result.get_json()
-                    cache.set(cache_key, (data, result.status_code), timeout)
-                return result
-            elif isinstance(result, tuple):
-                # Handle (response, status_code) tuple
-                response, status_code = result
-                if isinstance(response, Response) and status_code == 200:
-                    data = response.get_json()
-                    cache.set(cache_key, (data, status_code), timeout)
-                return result
+            started = time.perf_counter()
+            local_key = _request_key(key_prefix, query_args)
+            if local_key is None:
+                return run(*args, **kwargs)
+
+            local_generation = cache.local_generation(key_prefix)
+            page = _local_hit(key_prefix, local_key)
+            if page is not None:
+                return _entry_response(page)
+
+            version = cache.get_version(key_prefix)
+            if version is None:
+                return _serve_degraded(key_prefix, started, run, args, kwargs)
+            cache_key = f"{key_prefix}:v{version}:{local_key}"
+            fresh_for, ttl = _view_ttls(key_prefix, timeout, stale_timeout, adaptive)
+
+            def fill():
+                """Run the view and cache its ID list; returns (entry, listing)"""
+                fill_started = time.perf_counter()
+                listing = f(*args, **kwargs)
+                if not isinstance(listing, dict):
+                    return None, listing
+                entry = _store_result(
+                    jsonify(listing), cache_key, ttl, key_prefix, None, None, None,
+                    time.perf_counter() - fill_started
+                )
+                return entry, listing
+
+            entry, lock_token = _read_or_lock(key_prefix, cache_key)
+            stale = False
+            if entry is not None:
+                listing = _entry_json(entry)
+                stale = _refresh_if_stale(
+                    key_prefix, cache_key, entry, fresh_for, stale_timeout, fill
+                )
             else:
-                # Direct data return
-                cache.set(cache_key, (result, 200), timeout)
-                return result
+                try:
+                    entry, listing = fill()
+                finally:
+                    cache.release_lock(cache_key, lock_token)
+                if entry is None:
+                    return listing
+
+            data = hydrate(listing)
+            page = _build_entry(jsonify(data))
+            page["tags"] = sorted(tags(data)) if tags else []
+            if not stale:
+                cache.local_set(key_prefix, local_key, page, local_generation)
+            return _entry_response(page)
 
+        # Read by benchmarks/replay_cache_keys.py and the cache warmer
+        decorated_function.cache_key_prefix = key_prefix
+        decorated_function.cache_query_args = query_args
+        decorated_function.cache_timeout = timeout
+        decorated_function.cache_vary_on_role = False
         return decorated_function
     return decorator
 
 
-def invalidate_cache(patterns):
+# Session.info key holding the invalidations of the open transaction
+PENDING_INVALIDATIONS = "cache_invalidations"
+
+
+def defer_invalidation(namespaces=(), tags=(), session=None):
     """
-    Decorator to invalidate cache patterns after modification
-    
+    Attach invalidations to a transaction, applied only if it commits
+
+    namespaces are cache namespaces to bump and tags entity tags to drop
+    (see invalidate_namespaces and invalidate_entities). session defaults
+    to db.session; flush listeners pass the session they were called with.
+    This is the one place that writes PENDING_INVALIDATIONS.
+    """
+    if session is None:
+        from app import db
+        session = db.session
+    pending = session.info.setdefault(PENDING_INVALIDATIONS, (set(), set()))
+    invalidation_paths.update(namespaces)
+    pending[0].update(namespaces)
+    pending[1].update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_committed_invalidations(session):
+    pending = session.info.pop(PENDING_INVALIDATIONS, None)
+    if pending and (pending[0] or pending[1]):
+        cache.queue_invalidations(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_invalidations(session):
+    session.info.pop(PENDING_INVALIDATIONS, None)
+
+
+def invalidate_cache(namespaces):
+    """
+    Decorator to invalidate cache namespaces when the view's changes commit
+
+    The namespaces are attached to the view's database transaction and only
+    invalidated if it commits, so a 400/403 or a rolled back write leaves
+    the cache alone. Invalidation then runs on a background queue (see
+    InvalidationQueue) and the response does not wait for it.
+
+    Each namespace (a cache_response key_prefix) is invalidated by bumping
+    its generation counter, which costs one INCR regardless of how many
+    entries it holds. Entries of older generations are never read again and
+    age out through their TTL or LRU eviction. The bump is broadcast so every
+    worker drops its L1 entries for the namespace.
+
     Usage:
-        @invalidate_cache(['series:*', 'view:/api/series*'])
+        @invalidate_cache(['series', 'series_detail'])
         def create_series():
             return new_series
     """
+    invalidation_paths.update(namespaces)
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Execute function first
-            result = f(*args, **kwargs)
-            
-            # Invalidate cache patterns
-            for pattern in patterns:
-                cache.delete_pattern(pattern)
-                current_app.logger.debug(f"Cache invalidated: {pattern}")
-            
-            return result
-        
+            invalidate_namespaces(*namespaces)
+            return f(*args, **kwargs)
+
         return decorated_function
     return decorator
+
+
+def invalidate_namespaces(*namespaces):
+    """
+    Invalidate whole cache namespaces once the current transaction commits
+
+    For writes that only sometimes affect a namespace; see invalidate_cache.
+    """
+    defer_invalidation(namespaces=namespaces)
+
+
+def invalidate_entities(*tags):
+    """
+    Invalidate the cached responses that depend on specific entities
+
+    Call before committing with tags such as "series:WS123"; once the
+    transaction commits, only entries that declared those tags through
+    cache_response(tags=...) are dropped, so one write no longer empties
+    whole namespaces.
+
+    Usage:
+        invalidate_entities(f"series:{series.webseries_id}")
+        db.session.commit()
+    """
+    defer_invalidation(tags=tags)
@@ -0,0 +1,53 @@
+"""
+Response cache commands: flask --app run cache <command>
+"""
+import click
+from flask.cli import AppGroup
+from app.utils.cache import cache, TTL_LABELS
+from app.utils.cache_warmer import warmer
+
+cache_cli = AppGroup("cache", help="Response cache maintenance.")
+
+
+@cache_cli.command("warm")
+@click.argument("urls", nargs=-1)
+def warm_command(urls):
+    """Fill the cache for URLS, or for the configured and most requested URLs."""
+    report = warmer.warm(list(urls) or None)
+    # Counters are otherwise flushed periodically, after this process exits
+    cache.flush_metrics()
+    click.echo(
+        f"Warmed {report['urls']} URLs in {report['seconds']}s: "
+        f"{report['filled']} filled, {report['cached']} already cached, "
+        f"{report['failed']} failed, {report['skipped']} skipped"
+    )
+
+
+@cache_cli.command("memory")
+@click.option("--sample", type=int, default=None, help="Keys to sample (CACHE_MEMORY_SAMPLE_SIZE).")
+@click.option("--largest", type=int, default=5, help="Largest entries listed per prefix.")
+def memory_command(sample, largest):
+    """Estimate Redis memory use per key prefix."""
+    report = cache.memory_report(sample, largest)
+    if report is None:
+        raise click.ClickException("Redis is not available")
+
+    click.echo(
+        f"Sampled {report['sampled_keys']} of {report['total_keys']} keys"
+        f"{'' if report['complete'] else ' (estimated)'}; used_memory "
+        f"{report['used_memory']} bytes, maxmemory {report['maxmemory']} "
+        f"({report['maxmemory_policy']})"
+    )
+    click.echo(
+        f"{'prefix':<24} {'keys':>8} {'bytes':>12} {'avg':>8} {'share':>6}  "
+        + " ".join(f"{label:>6}" for label in TTL_LABELS)
+    )
+    for prefix, row in report["prefixes"].items():
+        click.echo(
+            f"{prefix:<24} {row['estimated_keys']:>8} {row['estimated_bytes']:>12} "
+            f"{row['avg_bytes']:>8} {100 * (row['share'] or 0):>5.1f}%  "
+            + " ".join(f"{row['ttl'][label]:>6}" for label in TTL_LABELS)
+        )
+    for prefix, row in report["prefixes"].items():
+        for entry in row["largest"]:
+            click.echo(f"  {entry['bytes']:>10}  ttl={entry['ttl']}  {entry['key']}")
@@ -0,0 +1,321 @@
+"""
+In-process cache backend
+"""
+import fnmatch
+import json
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from flask import current_app
+from app.utils.cache import CacheBackend
+
+
+class LocalCache(CacheBackend):
+    """
+    Cache backend holding everything in the worker's memory
+
+    Entries, generation counters, tag sets and fill locks live in one LRU
+    dict bounded by CACHE_LOCAL_MAX_ENTRIES, with the same TTL and
+    invalidation semantics as RedisCache. Nothing is shared between
+    processes: it suits single-worker deployments, the TestingConfig app and
+    benchmarks, which then exercise cache_response without a Redis server.
+    With several gunicorn workers each keeps its own copy and invalidations
+    stay within the worker that committed the write.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        super().__init__()
+        # key -> (value, monotonic expiry or None)
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        # Notified whenever an entry is stored or a fill lock released
+        self._changed = threading.Condition(self._lock)
+        self.max_entries = 10000
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._metric_counts = defaultdict(Counter)
+        self._request_counts = Counter()
+        # Tag invalidation sequence, kept out of _data so clears keep it
+        self._tag_sequence = 0
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.max_entries = app.config.get('CACHE_LOCAL_MAX_ENTRIES', 10000)
+
+    def available(self):
+        return True
+
+    # Callers of the underscore helpers hold self._lock
+
+    def _read(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _lookup(self, key):
+        """_read, counted as a keyspace hit or miss"""
+        value = self._read(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _write(self, key, value, timeout=None):
+        self._data[key] = (value, time.monotonic() + timeout if timeout else None)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _ttl_ms(self, key):
+        expires_at = self._data[key][1]
+        if expires_at is None:
+            return -1
+        return max(0, int((expires_at - time.monotonic()) * 1000))
+
+    def _matching(self, pattern):
+        return [key for key in self._data if fnmatch.fnmatchcase(key, pattern)]
+
+    def get(self, key):
+        with self._lock:
+            value = self._lookup(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, timeout=None):
+        timeout = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        with self._lock:
+            self._write(key, json.dumps(value), timeout)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+        return True
+
+    def get_many(self, keys):
+        with self._lock:
+            values = [self._lookup(key) for key in keys]
+        return [json.loads(value) if value is not None else None for value in values]
+
+    def set_many(self, values, timeout=None, tags=None):
+        timeout = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        with self._lock:
+            for key, value in values.items():
+                self._write(key, json.dumps(value), timeout)
+        for key, key_tags in (tags or {}).items():
+            self.tag(key, key_tags)
+        return True
+
+    def get_raw(self, key):
+        with self._lock:
+            return self._lookup(key)
+
+    def set_raw(self, key, value, timeout=None):
+        timeout = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        with self._lock:
+            self._write(key, bytes(value), timeout)
+        return True
+
+    def get_entry(self, key):
+        with self._lock:
+            entry = self._lookup(key)
+        return dict(entry) if entry is not None else None
+
+    def get_entry_meta(self, key):
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is None:
+            return None
+        return {
+            "etag": entry["etag"],
+            "encoding": entry["encoding"],
+            "filled_at": entry["filled_at"],
+        }
+
+    def set_entry(self, key, entry, timeout=None):
+        timeout = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        with self._changed:
+            self._write(key, dict(entry, tags=list(entry["tags"])), timeout)
+            self._changed.notify_all()
+        return True
+
+    def delete_pattern(self, pattern):
+        with self._lock:
+            for key in self._matching(pattern):
+                del self._data[key]
+        return True
+
+    def count_pattern(self, pattern):
+        with self._lock:
+            return len(self._matching(pattern))
+
+    def get_version(self, namespace):
+        """Seeded from the clock like RedisCache, so evictions never roll back"""
+        key = f"cache_version:{namespace}"
+        with self._lock:
+            version = self._read(key)
+            if version is None:
+                version = int(time.time() * 1000)
+                self._write(key, version)
+        return str(version)
+
+    def acquire_lock(self, key):
+        timeout = current_app.config.get('CACHE_LOCK_TIMEOUT', 10)
+        with self._lock:
+            if self._read(f"lock:{key}") is not None:
+                return None
+            token = uuid.uuid4().hex
+            self._write(f"lock:{key}", token, timeout)
+            return token
+
+    def release_lock(self, key, token):
+        if not token:
+            return False
+        with self._changed:
+            if self._read(f"lock:{key}") == token:
+                del self._data[f"lock:{key}"]
+                self._changed.notify_all()
+        return True
+
+    def wait_for(self, key):
+        wait = current_app.config.get('CACHE_LOCK_WAIT', 2.0)
+        with self._changed:
+            self._changed.wait_for(
+                lambda: self._read(key) is not None or self._read(f"lock:{key}") is None,
+                wait,
+            )
+            entry = self._lookup(key)
+        return dict(entry) if entry is not None else None
+
+    def tag(self, key, tags, timeout=None):
+        if not tags:
+            return False
+        tag_ttl = current_app.config.get('CACHE_TAG_TTL', 7200)
+        if timeout is not None:
+            tag_ttl = min(tag_ttl, timeout)
+        with self._lock:
+            for tag in tags:
+                members = self._read(f"cache_tag:{tag}")
+                ttl = tag_ttl
+                if members is None:
+                    members = set()
+                else:
+                    # Never shorten a set another entry still needs
+                    ttl = max(ttl, self._ttl_ms(f"cache_tag:{tag}") / 1000)
+                members.add(key)
+                self._write(f"cache_tag:{tag}", members, ttl)
+        return True
+
+    def invalidate(self, namespace):
+        self._clear_local(namespace)
+        key = f"cache_version:{namespace}"
+        with self._lock:
+            version = self._read(key)
+            self._write(key, (version or int(time.time() * 1000)) + 1)
+        return True
+
+    def invalidate_tags(self, tags):
+        tags = list(tags)
+        if not tags:
+            return True
+        self._drop_local_tags(tags)
+        stamp_ttl = current_app.config.get('CACHE_TAG_STAMP_TTL', 300)
+        with self._lock:
+            self._tag_sequence += 1
+            members = set()
+            for tag in tags:
+                self._write(f"cache_tag_at:{tag}", self._tag_sequence, stamp_ttl)
+                members.update(self._read(f"cache_tag:{tag}") or ())
+                self._data.pop(f"cache_tag:{tag}", None)
+            for key in members:
+                self._data.pop(key, None)
+        self._count_tag_invalidations(members)
+        return True
+
+    def tag_sequence(self):
+        with self._lock:
+            return self._tag_sequence
+
+    def tags_invalidated_since(self, tags, sequence):
+        tags = list(tags)
+        if sequence is None:
+            return set(tags)
+        with self._lock:
+            stamps = [self._read(f"cache_tag_at:{tag}") for tag in tags]
+        return {
+            tag for tag, stamp in zip(tags, stamps)
+            if stamp is not None and stamp > sequence
+        }
+
+    def clear_all(self):
+        self._clear_local('*')
+        with self._lock:
+            self._data.clear()
+            self._metric_counts.clear()
+        self._run_reset_hooks()
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "total_keys": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted_keys": self.evictions,
+            }
+
+    def hot_requests(self, limit):
+        if limit <= 0:
+            return []
+        with self._lock:
+            return [target for target, _ in self._request_counts.most_common(limit)]
+
+    def _store_metrics(self, counts, requests):
+        tracked = current_app.config.get('CACHE_HOT_REQUESTS_TRACKED', 1000)
+        with self._lock:
+            for namespace, fields in counts.items():
+                self._metric_counts[namespace].update(fields)
+            self._request_counts.update(requests)
+            if len(self._request_counts) > tracked:
+                self._request_counts = Counter(
+                    dict(self._request_counts.most_common(tracked))
+                )
+
+    def _load_metrics(self, namespaces):
+        with self._lock:
+            return [dict(self._metric_counts.get(namespace, {})) for namespace in namespaces]
+
+    def _sample_memory(self, sample_size):
+        """Sizes count keys and payloads (bodies, members, values), not overhead"""
+        with self._lock:
+            keys = [key for key in list(self._data) if self._read(key) is not None]
+            samples = []
+            for key in keys[:sample_size]:
+                value = self._data[key][0]
+                if isinstance(value, dict):
+                    size = len(value["body"])
+                elif isinstance(value, set):
+                    size = sum(len(member) for member in value)
+                elif isinstance(value, bytes):
+                    size = len(value)
+                else:
+                    size = len(str(value))
+                samples.append((key, len(key) + size, self._ttl_ms(key)))
+        complete = len(samples) == len(keys)
+        memory = {
+            "used_memory": sum(size for _, size, _ in samples) if complete else None,
+            "maxmemory": None,
+            "maxmemory_policy": f"lru ({self.max_entries} keys)",
+        }
+        return samples, complete, len(keys), memory
@@ -0,0 +1,162 @@
+"""
+Cache warming for hot endpoints
+
+After a deploy, an admin cache clear or a Redis restart every cached view
+starts cold and the first visitors of the home page and browse rows all
+reach MySQL at once. The warmer replays the configured CACHE_WARM_URLS, the
+detail pages of the most reviewed series and the most requested URLs
+learned by cache_response through the cached views themselves, so entries
+are built exactly as a real request would build them.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+from flask import current_app, g
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+from app import db
+from app.models.series_rating_summary import SeriesRatingSummary
+from app.utils.cache import cache, canonical_query
+
+
+def _cached_view(view):
+    """
+    The cache_response layer of a view function, or None if it is not cached
+
+    Auth decorators such as admin_required sit above it and are skipped:
+    the warmer runs server-side and builds the same entry any caller would.
+    """
+    if not hasattr(view, "cache_key_prefix"):
+        return None
+    # functools.wraps copies cache_key_prefix onto outer decorators too
+    while hasattr(getattr(view, "__wrapped__", None), "cache_key_prefix"):
+        view = view.__wrapped__
+    return view
+
+
+class CacheWarmer:
+    """Replays hot URLs into the response cache with bounded concurrency"""
+
+    def __init__(self):
+        # One background run per worker at a time
+        self._running = threading.Lock()
+
+    def init_app(self, app):
+        cache.on_reset(self.warm_in_background)
+
+    def targets(self):
+        """Configured URLs, then the most reviewed series, then learned URLs"""
+        config = current_app.config
+        urls = list(config.get("CACHE_WARM_URLS", ()))
+        urls += [
+            f"/api/series/{series_id}"
+            for series_id in self._top_series(config.get("CACHE_WARM_TOP_SERIES", 20))
+        ]
+        urls += cache.hot_requests(config.get("CACHE_WARM_LEARNED", 50))
+        return urls
+
+    def _top_series(self, limit):
+        if limit <= 0:
+            return []
+        # One row per series, kept current by every feedback write; no need
+        # to group and count the whole feedback table
+        rows = (
+            db.session.query(SeriesRatingSummary.webseries_id)
+            .filter(SeriesRatingSummary.review_count > 0)
+            .order_by(SeriesRatingSummary.review_count.desc())
+            .limit(limit)
+            .all()
+        )
+        return [row[0] for row in rows]
+
+    def resolve(self, urls):
+        """
+        Match URLs to their cached views
+
+        Returns (jobs, skipped) where each job is a (view, url, view_args)
+        tuple. URLs sharing a cache key are warmed once; URLs that are not
+        cached GET routes, or are cached per role, are skipped.
+        """
+        adapter = current_app.url_map.bind("localhost")
+        jobs, seen, skipped = [], set(), 0
+        for url in urls:
+            parts = urlsplit(url)
+            try:
+                endpoint, view_args = adapter.match(parts.path, method="GET")
+            except HTTPException:
+                skipped += 1
+                continue
+            view = _cached_view(current_app.view_functions[endpoint])
+            if view is None or view.cache_vary_on_role:
+                skipped += 1
+                continue
+            args = MultiDict(parse_qsl(parts.query, keep_blank_values=True))
+            key = (view.cache_key_prefix, parts.path, canonical_query(args, view.cache_query_args))
+            if key not in seen:
+                seen.add(key)
+                jobs.append((view, url, view_args))
+        return jobs, skipped
+
+    def warm(self, urls=None):
+        """
+        Fill the cache for urls (default: targets())
+
+        Runs up to CACHE_WARM_CONCURRENCY views at once and returns a report
+        with the URLs tried, how many were filled, already cached or failed,
+        and the time taken.
+        """
+        app = current_app._get_current_object()
+        started = time.perf_counter()
+        report = {"urls": 0, "filled": 0, "cached": 0, "failed": 0, "skipped": 0}
+        if not cache.available():
+            report["seconds"] = 0.0
+            return report
+
+        jobs, report["skipped"] = self.resolve(self.targets() if urls is None else urls)
+        report["urls"] = len(jobs)
+        workers = max(1, app.config.get("CACHE_WARM_CONCURRENCY", 4))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cache-warm") as pool:
+            for outcome in pool.map(lambda job: self._warm_one(app, *job), jobs):
+                report[outcome] += 1
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        return report
+
+    def _warm_one(self, app, view, url, view_args):
+        with app.test_request_context(url):
+            # Keeps the warmer's own requests out of the learned ranking
+            g.cache_warming = True
+            try:
+                response = app.make_response(view(**view_args))
+            except Exception as e:
+                app.logger.error(f"Cache warm error for {url}: {e}")
+                return "failed"
+            status = g.get("cache_status")
+        if status in ("hit", "stale"):
+            return "cached"
+        if status == "miss" and response.status_code == 200:
+            return "filled"
+        return "failed"
+
+    def warm_in_background(self):
+        """Warm from a daemon thread; registered as a cache reset hook"""
+        app = current_app._get_current_object()
+        if not app.config.get("CACHE_WARM_ON_RESET", True):
+            return
+
+        def run():
+            if not self._running.acquire(blocking=False):
+                return
+            try:
+                with app.app_context():
+                    report = self.warm()
+                app.logger.info(f"Cache warmed: {report}")
+            except Exception as e:
+                app.logger.error(f"Cache warming failed: {e}")
+            finally:
+                self._running.release()
+
+        threading.Thread(target=run, name="cache-warmer", daemon=True).start()
+
+
+warmer = CacheWarmer()
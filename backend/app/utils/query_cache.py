@@ -0,0 +1,295 @@
+"""
+ORM query result cache
+
+Lookups such as the Producer and ProductionHouse reads of their write
+routes run outside cache_response. This module hooks the session's
+do_orm_execute event so that primary-key lookups (Session.get,
+Query.get, filter_by on the whole primary key) of the tables listed in
+CACHE_QUERY_TABLES are answered from the cache backend, without changing
+the routes that issue them. Other statements always go to the database.
+Rows holding credential columns (UNCACHEABLE_COLUMNS) are never stored,
+whatever the configuration.
+
+A row is stored as JSON, its column values keyed by attribute, under
+"query:<table>:v<generation>:<primary key>"; missing rows are stored too.
+On a hit the row is rebuilt as a detached instance and merged into the
+session without a SELECT. A lookup costs two round trips, one for the
+table's generation and one for the row, against one SELECT by primary
+key. A flush that inserts, updates or deletes rows of a cached table bumps
+that table's generation when the transaction commits, through the same
+queue as invalidate_namespaces, and until then the session reads the
+table from the database. Textual INSERT, UPDATE, DELETE and REPLACE
+statements run through the session bump the cached tables they name, and
+CALLs bump every cached table.
+
+Writes the session never sees (other processes, triggers on other tables,
+statements on raw engine connections) are only picked up when entries
+expire. Code making such writes to a cached table must call
+invalidate_namespaces("query:<table>") in a session that commits. Locking
+reads (with_for_update) of a cached table must opt out with
+execution_options(query_cache=False).
+"""
+import datetime
+import json
+import re
+import time
+from decimal import Decimal
+from flask import current_app, has_app_context
+from sqlalchemy import Column, Table, event, inspect
+from sqlalchemy.orm import Session, loading, make_transient_to_detached
+from sqlalchemy.sql import Select, operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList, TextClause
+from app.utils.cache import cache, cached_namespaces, defer_invalidation
+
+# Metrics namespace and key prefix of cached query results
+QUERY_NAMESPACE = "query"
+
+# Session.info key holding the cached tables written by the open transaction
+WRITTEN_TABLES = "query_cache_written"
+
+# Columns whose values must never be copied into the shared cache
+UNCACHEABLE_COLUMNS = {"password_hash"}
+
+# Textual statements that write to the tables they name, and procedure calls
+_TEXT_WRITE = re.compile(r"^\s*(insert|update|delete|replace)\b", re.IGNORECASE)
+_TEXT_CALL = re.compile(r"^\s*call\b", re.IGNORECASE)
+
+# Column types stored as JSON, with how each is read back
+_JSON_TYPES = {
+    str: None,
+    int: None,
+    float: None,
+    bool: None,
+    datetime.datetime: datetime.datetime.fromisoformat,
+    datetime.date: datetime.date.fromisoformat,
+    datetime.time: datetime.time.fromisoformat,
+    Decimal: Decimal,
+}
+
+cached_namespaces.add(QUERY_NAMESPACE)
+
+# Python types of the column attributes of each mapper, None if one cannot
+# be stored as JSON
+_mapper_types = {}
+
+# An empty result of an entity lookup per mapper, taken from the first
+# lookup that reached the database; hits fill it with the rebuilt instance
+_empty_results = {}
+
+
+def _cached_tables():
+    if not has_app_context():
+        return {}
+    return current_app.config.get("CACHE_QUERY_TABLES") or {}
+
+
+def _statement_tables(statement):
+    return {element.name for element in visitors.iterate(statement) if isinstance(element, Table)}
+
+
+def _text_written_tables(sql, cached):
+    """Cached tables a textual statement may write, empty for reads"""
+    if _TEXT_CALL.match(sql):
+        return set(cached)
+    if not _TEXT_WRITE.match(sql):
+        return set()
+    return {
+        table for table in cached
+        if re.search(rf"\b{re.escape(table)}\b", sql, re.IGNORECASE)
+    }
+
+
+def _changed_tables(session):
+    """Tables of the session's new, modified and deleted objects"""
+    tables = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        tables.update(table.name for table in instance.__mapper__.tables)
+    return tables
+
+
+def _mark_written(session, tables):
+    """Bypass the tables for the rest of the transaction, bump them at commit"""
+    if not tables:
+        return
+    session.info.setdefault(WRITTEN_TABLES, set()).update(tables)
+    defer_invalidation(
+        namespaces=[f"{QUERY_NAMESPACE}:{table}" for table in tables], session=session
+    )
+
+
+def _column_types(mapper):
+    """{attribute: python type} of mapper's columns, None if not all fit JSON"""
+    if mapper not in _mapper_types:
+        types = {}
+        for attr in mapper.column_attrs:
+            try:
+                python_type = attr.columns[0].type.python_type
+            except NotImplementedError:
+                python_type = None
+            if python_type not in _JSON_TYPES:
+                types = None
+                break
+            types[attr.key] = python_type
+        _mapper_types[mapper] = types
+    return _mapper_types[mapper]
+
+
+def _primary_key_lookup(orm_context):
+    """
+    (mapper, primary key) of a SELECT of one entity by its primary key
+
+    The WHERE clause must compare every primary key column with a value
+    and nothing else. Returns None for any other statement.
+    """
+    statement = orm_context.statement
+    descriptions = statement.column_descriptions
+    if len(descriptions) != 1 or descriptions[0]["aliased"]:
+        return None
+    entity = descriptions[0]["entity"]
+    if entity is None or descriptions[0]["expr"] is not entity:
+        return None
+    mapper = inspect(entity)
+    where = statement.whereclause
+    if where is None:
+        return None
+    if isinstance(where, BooleanClauseList) and where.operator is operators.and_:
+        clauses = list(where.clauses)
+    else:
+        clauses = [where]
+    parameters = orm_context.parameters if isinstance(orm_context.parameters, dict) else {}
+    values = {}
+    for clause in clauses:
+        if not (
+            isinstance(clause, BinaryExpression)
+            and clause.operator is operators.eq
+            and isinstance(clause.left, Column)
+            and isinstance(clause.right, BindParameter)
+        ):
+            return None
+        values[clause.left.name] = parameters.get(clause.right.key, clause.right.effective_value)
+    names = [column.name for column in mapper.primary_key]
+    if values.keys() != set(names) or any(values[name] is None for name in names):
+        return None
+    return mapper, tuple(values[name] for name in names)
+
+
+def _dump_row(instance, types):
+    """JSON document of the loaded column values of instance"""
+    loaded = inspect(instance).dict
+    row = {}
+    for key in types:
+        if key in loaded:
+            value = loaded[key]
+            if isinstance(value, (datetime.date, datetime.time)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            row[key] = value
+    return row
+
+
+def _load_row(mapper, row, types):
+    """Detached instance holding a row stored by _dump_row"""
+    values = {}
+    for key, value in row.items():
+        parse = _JSON_TYPES[types[key]]
+        values[key] = parse(value) if parse and value is not None else value
+    instance = mapper.class_(**values)
+    make_transient_to_detached(instance)
+    return instance
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _execute_cached(orm_context):
+    cached = _cached_tables()
+    if not cached:
+        return None
+    statement = orm_context.statement
+
+    if isinstance(statement, TextClause):
+        _mark_written(orm_context.session, _text_written_tables(statement.text, cached))
+        return None
+
+    if orm_context.is_update or orm_context.is_delete or orm_context.is_insert:
+        _mark_written(orm_context.session, _statement_tables(statement) & cached.keys())
+        return None
+
+    # Refreshes of loaded objects always go to the database
+    if (
+        not orm_context.is_select
+        or not isinstance(statement, Select)
+        or orm_context.is_column_load
+        or orm_context.is_relationship_load
+        or orm_context.execution_options.get("populate_existing")
+        or not orm_context.execution_options.get("query_cache", True)
+    ):
+        return None
+
+    tables = _statement_tables(statement)
+    if len(tables) != 1 or not tables <= cached.keys():
+        return None
+    lookup = _primary_key_lookup(orm_context)
+    if lookup is None:
+        return None
+    mapper, primary_key = lookup
+    table = next(iter(tables))
+    if any(column.name in UNCACHEABLE_COLUMNS for column in statement.selected_columns):
+        cache.metrics.incr(QUERY_NAMESPACE, "refused")
+        return None
+    types = _column_types(mapper)
+    if types is None:
+        cache.metrics.incr(QUERY_NAMESPACE, "refused")
+        return None
+    # Cached rows would overwrite the session's unflushed changes on merge,
+    # and an instance already in the session is being refreshed
+    session = orm_context.session
+    if (
+        tables & (session.info.get(WRITTEN_TABLES, set()) | _changed_tables(session))
+        or mapper.identity_key_from_primary_key(primary_key) in session.identity_map
+    ):
+        cache.metrics.incr(QUERY_NAMESPACE, "uncached")
+        return None
+
+    version = cache.get_version(f"{QUERY_NAMESPACE}:{table}")
+    if version is None:
+        cache.metrics.incr(QUERY_NAMESPACE, "degraded")
+        return None
+    key = f"{QUERY_NAMESPACE}:{table}:v{version}:{json.dumps(primary_key, default=str)}"
+
+    empty = _empty_results.get(mapper)
+    document = cache.get(key) if empty is not None else None
+    if document is not None:
+        cache.metrics.incr(QUERY_NAMESPACE, "hits")
+        rows = []
+        if document["row"] is not None:
+            rows.append((_load_row(mapper, document["row"], types),))
+        frozen = empty.with_new_rows(rows)
+        return loading.merge_frozen_result(session, statement, frozen, load=False)()
+
+    started = time.perf_counter()
+    frozen = orm_context.invoke_statement().freeze()
+    cache.metrics.incr(QUERY_NAMESPACE, "misses")
+    cache.metrics.incr(QUERY_NAMESPACE, "fills")
+    cache.metrics.incr(QUERY_NAMESPACE, "fill_ms", (time.perf_counter() - started) * 1000)
+    _empty_results.setdefault(mapper, frozen.with_new_rows([]))
+    instances = frozen().scalars().all()
+    cache.set(
+        key,
+        {"row": _dump_row(instances[0], types) if instances else None},
+        cached[table],
+    )
+    return frozen()
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_tables(session, flush_context):
+    cached = _cached_tables()
+    if not cached:
+        return
+    _mark_written(session, _changed_tables(session) & cached.keys())
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _end_written_tables(session):
+    session.info.pop(WRITTEN_TABLES, None)
@@ -0,0 +1,37 @@
+"""
+Rating summary commands: flask --app run ratings <command>
+"""
+import click
+from flask.cli import AppGroup
+from app import db
+from app.models.series_rating_summary import SeriesRatingSummary
+from app.utils.cache import cache
+
+ratings_cli = AppGroup("ratings", help="Series rating summary maintenance.")
+
+
+@ratings_cli.command("rebuild")
+@click.argument("series_ids", nargs=-1)
+def rebuild_command(series_ids):
+    """Recompute rating summaries from feedback, for SERIES_IDS or every series."""
+    changed = SeriesRatingSummary.rebuild(list(series_ids) or None)
+    db.session.commit()
+    # Cached ratings of the corrected series are dropped by a background queue
+    cache.invalidations.wait_idle(5)
+    click.echo(f"Rebuilt rating summaries: {len(changed)} corrected")
+    for series_id in changed:
+        click.echo(f"  {series_id}")
+
+
+@ratings_cli.command("check")
+@click.argument("series_ids", nargs=-1)
+def check_command(series_ids):
+    """Compare rating summaries with feedback; exits with status 1 on drift."""
+    drifted = SeriesRatingSummary.drift(list(series_ids) or None)
+    if not drifted:
+        click.echo("Rating summaries match feedback")
+        return
+    click.echo(f"{len(drifted)} rating summaries differ from feedback:")
+    for row in drifted:
+        click.echo(f"  {row['webseries_id']}: stored {row['stored']}, expected {row['expected']}")
+    raise SystemExit(1)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cached response formats for GET /api/production-houses/<id>
+
+Compares the previous cache format (json.dumps of the (data, status) tuple,
+json.loads + jsonify on every hit) with the current one (final response bytes,
+gzip-compressed above CACHE_COMPRESS_THRESHOLD, returned untouched on a hit).
+
+Runs against the in-memory SQLite TestingConfig app, no Redis needed. Stored
+sizes are the value bytes Redis would hold for each entry. Whole requests
+are also timed through cache_response on the local cache backend, which
+TestingConfig selects.
+
+    python benchmarks/bench_response_cache.py [num_series] [iterations]
+"""
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify
+from app import create_app, db
+from app.models import ProductionHouse, WebSeries, Episode
+from app.utils.cache import cache, _build_entry, _entry_response
+
+
+def seed(num_series):
+    house = ProductionHouse(
+        house_id="PHBENCH",
+        name="Benchmark Studios",
+        year_established="1999",
+        street="1 Main St",
+        city="Springfield",
+        state="IL",
+        nationality="USA",
+    )
+    db.session.add(house)
+    for i in range(num_series):
+        series_id = f"WS{i:08d}"
+        db.session.add(
+            WebSeries(
+                webseries_id=series_id,
+                title=f"Benchmark Series {i}",
+                type=("Drama", "Comedy", "Thriller")[i % 3],
+                house_id=house.house_id,
+            )
+        )
+        for n in range(3):
+            db.session.add(
+                Episode(
+                    episode_id=f"EP{i:05d}{n:03d}",
+                    episode_number=str(n + 1),
+                    title=f"Episode {n + 1}",
+                    webseries_id=series_id,
+                )
+            )
+    db.session.commit()
+    return house
+
+
+def cpu_time(fn, iterations):
+    """Mean CPU time of fn in microseconds"""
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - started) / iterations * 1e6
+
+
+def wall_time(fn, iterations):
+    """Mean wall-clock time of fn in microseconds"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    num_series = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        house = seed(num_series)
+        payload = {"production_house": house.to_dict(include_series=True)}
+
+    path = f"/api/production-houses/{house.house_id}"
+    with app.test_request_context(path, headers={"Accept-Encoding": "gzip"}):
+        response = jsonify(payload)
+
+        # Previous format
+        stored_old = json.dumps((response.get_json(), 200))
+        old_fill = cpu_time(lambda: json.dumps((response.get_json(), 200)), iterations)
+        old_hit = cpu_time(
+            lambda: jsonify(json.loads(stored_old)[0]).get_data(), iterations
+        )
+
+        # Current format
+        entry = _build_entry(response)
+        stored_new = len(entry["body"]) + len(entry["content_type"]) + 32
+        new_fill = cpu_time(lambda: _build_entry(response), iterations)
+        new_hit_gzip = cpu_time(lambda: _entry_response(entry).get_data(), iterations)
+
+    with app.test_request_context(path):
+        new_hit_plain = cpu_time(lambda: _entry_response(entry).get_data(), iterations)
+
+    # Whole requests through cache_response on the local backend
+    client = app.test_client()
+
+    def miss():
+        cache.invalidate("production_house_detail")
+        client.get(path)
+
+    request_miss = wall_time(miss, max(1, iterations // 20))
+    request_hit = wall_time(lambda: client.get(path), iterations)
+
+    print("=" * 60)
+    print(f"production_house_detail, {num_series} series, {iterations} iterations")
+    print("=" * 60)
+    print(f"Response body:              {len(response.get_data()):>10,} bytes")
+    print(f"Stored (old, JSON tuple):   {len(stored_old):>10,} bytes")
+    print(f"Stored (new, {entry['encoding'] or 'raw'} bytes):   {stored_new:>10,} bytes")
+    print(f"Redis memory saved:         {1 - stored_new / len(stored_old):>10.1%}")
+    print("-" * 60)
+    print(f"Fill CPU (old):             {old_fill:>10.1f} us")
+    print(f"Fill CPU (new):             {new_fill:>10.1f} us")
+    print(f"Hit CPU (old):              {old_hit:>10.1f} us")
+    print(f"Hit CPU (new, gzip client): {new_hit_gzip:>10.1f} us")
+    print(f"Hit CPU (new, identity):    {new_hit_plain:>10.1f} us")
+    print("-" * 60)
+    print(f"Request ({cache.name}, miss):      {request_miss:>10.1f} us")
+    print(f"Request ({cache.name}, hit):       {request_hit:>10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Replay an access log against the response cache key scheme
+
+For every GET to a cached view, computes the key the raw query string used
+to produce and the canonical key cache_response builds now, and reports per
+namespace how many requests would have found a live entry under each
+scheme. An entry lives for the view's timeout from the request that filled
+it; invalidations are ignored, so the difference between the two columns is
+what key normalization alone buys.
+
+Reads nginx "main" format logs (see nginx.conf). Lines holding just a
+request path are also accepted and replayed with no expiry. No Redis or
+database is needed.
+
+    python benchmarks/replay_cache_keys.py /var/log/nginx/access.log
+"""
+import os
+import re
+import sys
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+from app import create_app
+from app.utils.cache import canonical_query
+
+LOG_LINE = re.compile(
+    r'\[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<target>\S+) HTTP/[\d.]+"'
+)
+
+
+def read_requests(lines):
+    """Yield (timestamp, path, query) for each GET request in the log"""
+    for line in lines:
+        line = line.strip()
+        match = LOG_LINE.search(line)
+        if match:
+            if match.group("method") != "GET":
+                continue
+            timestamp = datetime.strptime(
+                match.group("time"), "%d/%b/%Y:%H:%M:%S %z"
+            ).timestamp()
+            target = match.group("target")
+        elif line.startswith("/"):
+            timestamp, target = None, line
+        else:
+            continue
+        parts = urlsplit(target)
+        yield timestamp, parts.path, parts.query
+
+
+class KeySpace:
+    """Fill times of simulated entries; counts a hit if one is still live"""
+
+    def __init__(self):
+        self.filled = {}
+
+    def lookup(self, key, timestamp, ttl):
+        filled_at = self.filled.get(key)
+        if filled_at is not None and (timestamp is None or timestamp - filled_at < ttl):
+            return True
+        self.filled[key] = timestamp
+        return False
+
+
+def replay(app, requests):
+    adapter = app.url_map.bind("localhost")
+    default_ttl = app.config.get("CACHE_DEFAULT_TIMEOUT", 300)
+    stats = defaultdict(lambda: {"requests": 0, "raw_hits": 0, "hits": 0})
+    raw_keys, keys = KeySpace(), KeySpace()
+
+    for timestamp, path, query in requests:
+        try:
+            endpoint, _ = adapter.match(path, method="GET")
+        except HTTPException:
+            continue
+        view = app.view_functions[endpoint]
+        prefix = getattr(view, "cache_key_prefix", None)
+        if prefix is None:
+            continue
+        ttl = view.cache_timeout or default_ttl
+
+        row = stats[prefix]
+        row["requests"] += 1
+        row["raw_hits"] += raw_keys.lookup(f"{prefix}:{path}:{query}", timestamp, ttl)
+
+        args = MultiDict(parse_qsl(query, keep_blank_values=True))
+        canonical = canonical_query(args, view.cache_query_args)
+        row["hits"] += keys.lookup(f"{prefix}:{path}:{canonical}", timestamp, ttl)
+
+    return stats, len(raw_keys.filled), len(keys.filled)
+
+
+def main(path):
+    app = create_app("testing")
+    with open(path, encoding="utf-8", errors="replace") as log, app.app_context():
+        stats, raw_key_count, key_count = replay(app, read_requests(log))
+
+    print(f"{'namespace':<24} {'requests':>9} {'raw hit %':>10} {'canonical hit %':>16}")
+    totals = {"requests": 0, "raw_hits": 0, "hits": 0}
+    for prefix in sorted(stats):
+        row = stats[prefix]
+        for field in totals:
+            totals[field] += row[field]
+        print(
+            f"{prefix:<24} {row['requests']:>9} "
+            f"{100 * row['raw_hits'] / row['requests']:>9.1f}% "
+            f"{100 * row['hits'] / row['requests']:>15.1f}%"
+        )
+    if totals["requests"]:
+        print(
+            f"{'total':<24} {totals['requests']:>9} "
+            f"{100 * totals['raw_hits'] / totals['requests']:>9.1f}% "
+            f"{100 * totals['hits'] / totals['requests']:>15.1f}%"
+        )
+    print(f"distinct keys: {raw_key_count} raw, {key_count} canonical")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    main(sys.argv[1])
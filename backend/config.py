@@ -38,7 +38,72 @@ class Config:
 
     # Redis Configuration
     REDIS_URL = os.environ.get("REDIS_URL") or "redis://localhost:6379/0"
+    # "redis", or "local" to cache in process (single worker, no Redis)
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND") or "redis"
+    CACHE_LOCAL_MAX_ENTRIES = 10000  # Keys held by the local backend (LRU)
     CACHE_DEFAULT_TIMEOUT = 300  # 5 minutes default cache timeout
+    CACHE_SOCKET_TIMEOUT = 1.0  # Seconds per Redis connect/command
+    CACHE_BREAKER_THRESHOLD = 3  # Connection failures that open the breaker...
+    CACHE_BREAKER_WINDOW = 10  # ...within this many seconds
+    CACHE_BREAKER_RESET_TIMEOUT = 5  # Seconds between reconnection probes
+    CACHE_COMPRESS_THRESHOLD = 1024  # Gzip cached bodies at least this large
+    CACHE_COMPRESS_LEVEL = 6
+    # Page sizes the frontend requests; other per_page values are rounded up to one
+    CACHE_PER_PAGE_SIZES = (10, 20, 24, 50, 100, 1000)
+    CACHE_KEY_MAX_ARG_LENGTH = 64  # Longer query values are hashed in keys
+    CACHE_TAG_TTL = 7200  # Entity tag index lifetime, above any entry TTL
+    # Seconds a tag invalidation's sequence stamp is kept, above any fill's
+    # duration, so fills that read the database before it are not stored after it
+    CACHE_TAG_STAMP_TTL = 300
+    CACHE_SCAN_BATCH_SIZE = 500  # Keys per SCAN/UNLINK batch
+    CACHE_INVALIDATION_BUDGET = 0.5  # Max seconds spent per pattern scan
+    CACHE_INVALIDATION_DELAY = 0.01  # Seconds to coalesce queued invalidations
+    CACHE_LOCK_TIMEOUT = 10  # Seconds before an abandoned fill lock expires
+    CACHE_LOCK_WAIT = 2.0  # Seconds a request waits for another to fill
+    CACHE_LOCK_POLL_INTERVAL = 0.05
+    CACHE_REFRESH_WORKERS = 2  # Threads for stale-while-revalidate refreshes
+    CACHE_METRICS_FLUSH_INTERVAL = 10  # Seconds between per-worker metric flushes
+    CACHE_MEMORY_SAMPLE_SIZE = 10000  # Keys sampled by the memory report
+    CACHE_MEMORY_SCAN_BUDGET = 2.0  # Max seconds the memory report scans
+    CACHE_HOT_REQUESTS_TRACKED = 1000  # Distinct URLs ranked for warming
+    # Adapt each key prefix's TTL to how often it is read and invalidated,
+    # within CACHE_ADAPTIVE_TTL_BOUNDS times the timeout its views declare
+    CACHE_ADAPTIVE_TTL = False
+    CACHE_ADAPTIVE_TTL_BOUNDS = (0.25, 4.0)
+    CACHE_ADAPTIVE_TTL_WINDOW = 900  # Seconds of metrics the rates cover
+    CACHE_ADAPTIVE_TTL_MIN_READS = 100  # Reads in the window before adapting
+    CACHE_ADAPTIVE_TTL_FACTOR = 1.0  # TTL per second between generation bumps
+    # Warmed by `flask cache warm` (run after deploys), after admin cache
+    # clears and after Redis reconnects: the home page, browse rows and
+    # countries, then the most reviewed series and most requested URLs
+    CACHE_WARM_URLS = (
+        "/api/series?per_page=20",
+        "/api/series?per_page=24",
+        "/api/series?per_page=24&type=Drama",
+        "/api/series?per_page=24&type=Comedy",
+        "/api/series?per_page=24&type=Action",
+        "/api/series?per_page=24&type=Thriller",
+        "/api/series?per_page=24&type=Sci-Fi",
+        "/api/series?per_page=24&type=Romance",
+        "/api/admin/countries",
+    )
+    CACHE_WARM_TOP_SERIES = 20
+    CACHE_WARM_LEARNED = 50
+    CACHE_WARM_CONCURRENCY = 4  # Views rendered at once while warming
+    CACHE_WARM_ON_RESET = True
+    # In-process L1 tier per key_prefix (entries, seconds), kept coherent
+    # across workers through Redis pub/sub
+    CACHE_L1 = {
+        "series": {"size": 128, "ttl": 30},
+        "series_detail": {"size": 512, "ttl": 30},
+        "country": {"size": 4, "ttl": 300},
+    }
+    # ORM query results cached per table (seconds); see app/utils/query_cache.py.
+    # viewer_account is left out: its rows carry password hashes
+    CACHE_QUERY_TABLES = {
+        "producer": 300,
+        "production_house": 300,
+    }
 
 
 class DevelopmentConfig(Config):
@@ -54,6 +119,7 @@ class ProductionConfig(Config):
     DEBUG = False
     SQLALCHEMY_ECHO = False
     BCRYPT_LOG_ROUNDS = 14
+    CACHE_ADAPTIVE_TTL = True
 
 
 class TestingConfig(Config):
@@ -61,6 +127,8 @@ class TestingConfig(Config):
 
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    CACHE_BACKEND = "local"
+    CACHE_WARM_ON_RESET = False
 
 
 # Configuration dictionary
@@ -5,7 +5,7 @@ from app.utils.cache import cache
 app = create_app('production')
 
 with app.app_context():
-    if cache.redis_client:
+    if cache.available():
         print("✓ Redis connected")
         cache.set("test_key", {"message": "Hello from Redis"}, 60)
         result = cache.get("test_key")
@@ -0,0 +1,67 @@
+"""
+Shared Test Fixtures
+An app on an in-memory database seeded with one production house, and a
+recorder of the SQL statements it runs
+"""
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import ProductionHouse
+from app.utils.cache import cache
+
+
+@pytest.fixture
+def app():
+    """Testing app inside its app context, with house PH001 "Test Studios" """
+    app = create_app("testing")
+    with app.app_context():
+        db.create_all()
+        cache.clear_all()
+        db.session.add(
+            ProductionHouse(
+                house_id="PH001",
+                name="Test Studios",
+                year_established="1999",
+                street="1 Main St",
+                city="Springfield",
+                state="IL",
+                nationality="USA",
+            )
+        )
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def statements(app):
+    """SQL of every statement sent to the database, in order; clear to count"""
+    recorded = []
+
+    def record(conn, cursor, statement, *args):
+        recorded.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def page_statements(app, statements):
+    """
+    GET a URL with a cold cache and session; returns its JSON and the number
+    of statements it ran
+    """
+    client = app.test_client()
+
+    def get(url):
+        cache.clear_all()
+        db.session.remove()
+        statements.clear()
+        response = client.get(url)
+        assert response.status_code == 200
+        return response.get_json(), len(statements)
+
+    return get
@@ -0,0 +1,105 @@
+"""
+Admin Cache Endpoints Test
+Reads the cache reports of the admin API on the in-process backend
+"""
+
+from datetime import date
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import db
+from app.models import ViewerAccount, WebSeries
+from app.utils.cache import cache
+
+
+def add_account(account_id, account_type):
+    db.session.add(
+        ViewerAccount(
+            account_id=account_id,
+            first_name="Test",
+            last_name=account_type,
+            email=f"{account_id}@example.com",
+            password_hash="x",
+            street="1 Main St",
+            city="Springfield",
+            state="IL",
+            open_date=date(2024, 1, 1),
+            monthly_service_charge=0,
+            account_type=account_type,
+        )
+    )
+    return {"Authorization": f"Bearer {create_access_token(identity=account_id)}"}
+
+
+@pytest.fixture
+def admin(app):
+    """Authorization headers of admin AD001; also adds series WS001 "Pilot" """
+    headers = add_account("AD001", "Admin")
+    db.session.add(
+        WebSeries(webseries_id="WS001", title="Pilot", type="Drama", house_id="PH001")
+    )
+    db.session.commit()
+    # Start from an empty cache once the commit's invalidations have landed
+    assert cache.invalidations.wait_idle(2)
+    cache.clear_all()
+    cache.metrics.drain()
+    return headers
+
+
+def test_cache_stats(app, admin):
+    """Counters of every worker are reported per key prefix, with rates"""
+    client = app.test_client()
+    customer = add_account("CU001", "Customer")
+    db.session.commit()
+    assert client.get("/api/admin/cache/stats", headers=customer).status_code == 403
+
+    client.get("/api/series/WS001")
+    client.get("/api/series/WS001")
+    client.get("/api/series/WS404")
+    response = client.get("/api/admin/cache/stats", headers=admin)
+    assert response.status_code == 200
+    stats = response.get_json()
+    assert (stats["status"], stats["backend"]) == ("connected", "local")
+    assert stats["breaker"] == {"backend": "local"}
+
+    detail = stats["prefixes"]["series_detail"]
+    assert (detail["hits"], detail["misses"], detail["fills"]) == (1, 2, 2)
+    assert detail["hit_rate"] == round(1 / 3, 4)
+    assert detail["negative_fills"] == 1
+    assert detail["avg_fill_ms"] > 0 and detail["avg_payload_bytes"] > 0
+    # Prefixes nothing has read yet are listed with empty counters
+    assert stats["prefixes"]["episode"]["hit_rate"] is None
+    # Without adaptive TTLs a prefix keeps the timeout its view declares
+    ttl = stats["ttls"]["prefixes"]["series_detail"]
+    assert ttl["declared_ttl"] == ttl["ttl"] == 600
+
+
+def test_cache_memory(app, admin):
+    """Keys are grouped by prefix with sizes, TTL buckets and the largest entries"""
+    client = app.test_client()
+    client.get("/api/series/WS001")
+    client.get("/api/series/WS404")
+
+    response = client.get("/api/admin/cache/memory?largest=1", headers=admin)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report["complete"]
+    assert report["sampled_keys"] == report["total_keys"] == cache.stats()["total_keys"]
+    prefixes = report["prefixes"]
+    assert report["used_memory"] == sum(row["sampled_bytes"] for row in prefixes.values())
+    assert round(sum(row["share"] for row in prefixes.values()), 2) == 1
+
+    detail = prefixes["series_detail"]
+    assert detail["sampled_keys"] == detail["estimated_keys"] == 2
+    # The 404 expires within a minute, the series within ten
+    assert detail["ttl"] == {"none": 0, "<1m": 1, "1-5m": 0, "5-15m": 1, "15-60m": 0, ">1h": 0}
+    [largest] = detail["largest"]
+    assert largest["key"].startswith("series_detail:") and "WS001" in largest["key"]
+    assert largest["bytes"] >= detail["avg_bytes"]
+
+    # A partial sample is scaled up to the whole keyspace
+    report = client.get("/api/admin/cache/memory?sample=1", headers=admin).get_json()
+    assert not report["complete"] and report["sampled_keys"] == 1
+    [row] = report["prefixes"].values()
+    assert row["estimated_keys"] == report["total_keys"]
@@ -0,0 +1,291 @@
+"""
+Local Cache Backend Test
+Runs cached views through cache_response on the in-process backend
+"""
+
+import threading
+import time
+
+import pytest
+
+from app import create_app, db
+from app.models import WebSeries
+from app.utils.cache import (
+    AdaptiveTTL,
+    CacheBackend,
+    LocalLRU,
+    cache,
+    cache_response,
+    cached_cards,
+    invalidate_entities,
+    invalidate_namespaces,
+)
+
+
+@pytest.fixture
+def app(app):
+    """The shared app with series WS001 "Pilot" """
+    db.session.add(
+        WebSeries(webseries_id="WS001", title="Pilot", type="Drama", house_id="PH001")
+    )
+    db.session.commit()
+    # Let the commit's invalidations land before the test reads the cache
+    assert cache.invalidations.wait_idle(2)
+    return app
+
+
+def test_local_backend_caches_responses(app):
+    """Hits, 304s, negative entries and tag invalidation without Redis"""
+    client = app.test_client()
+    assert cache.name == "local"
+
+    cache.clear_all()
+    first = client.get("/api/series/WS001")
+    assert first.status_code == 200
+    assert cache.count_pattern("series_detail:*") == 1
+    # The miss carries the same Vary and ETag as the hits that follow
+    assert "Accept-Encoding" in first.vary
+    assert client.get("/api/series/WS001").headers["ETag"] == first.headers["ETag"]
+
+    # Same entry for an equivalent query string, and a 304 for its ETag
+    assert client.get("/api/series/WS001?_=1").get_data() == first.get_data()
+    revalidated = client.get(
+        "/api/series/WS001", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert revalidated.status_code == 304
+
+    # Missing IDs are cached as 404s under the ID's tag
+    assert client.get("/api/series/WS404").status_code == 404
+    assert cache.count_pattern("series_detail:*") == 2
+    # Their tag set lives no longer than they do, but a short-lived entry
+    # never cuts short the set of a longer one
+    assert cache._ttl_ms("cache_tag:series:WS404") <= 60 * 1000
+    cache.tag("short", ["series:WS001"], 60)
+    assert cache._ttl_ms("cache_tag:series:WS001") > 600 * 1000
+
+    # A committed write drops only the entries tagged with its entity
+    series = db.session.get(WebSeries, "WS001")
+    series.title = "Renamed"
+    invalidate_entities("series:WS001")
+    db.session.commit()
+    assert cache.invalidations.wait_idle(2)
+    assert cache.count_pattern("series_detail:*") == 1
+    assert client.get("/api/series/WS001").get_json()["series"]["title"] == "Renamed"
+
+
+def test_backend_reinitialized(app):
+    """A second app reuses the backend, its threads and one refresh pool"""
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    backend, executor = cache.backend, cache.backend._executor
+    second = create_app("testing")
+    assert cache.backend is backend
+    assert executor._shutdown and backend._executor is not executor
+    assert backend._app is backend.invalidations._app is second
+
+    # Invalidations now run in the second app's context
+    version = cache.get_version("series")
+    cache.queue_invalidations({"series"}, set())
+    assert cache.invalidations.wait_idle(2)
+    assert cache.get_version("series") != version
+
+
+def test_invalidations_wait_for_commit(app):
+    """A rolled-back write leaves the cache alone, a committed one invalidates it"""
+    client = app.test_client()
+    cache.clear_all()
+    assert client.get("/api/series/WS001").status_code == 200
+    version = cache.get_version("series")
+    scheduled = cache.invalidations.stats()["scheduled"]
+
+    def write():
+        db.session.get(WebSeries, "WS001").title = "Renamed"
+        invalidate_namespaces("series")
+        invalidate_entities("series:WS001")
+
+    write()
+    db.session.rollback()
+    assert cache.invalidations.wait_idle(2)
+    assert cache.invalidations.stats()["scheduled"] == scheduled
+    assert cache.get_version("series") == version
+    assert cache.count_pattern("series_detail:*") == 1
+
+    # The next transaction does not inherit the rolled-back invalidations
+    db.session.commit()
+    assert cache.invalidations.stats()["scheduled"] == scheduled
+
+    write()
+    db.session.commit()
+    assert cache.invalidations.wait_idle(2)
+    assert cache.invalidations.stats()["scheduled"] > scheduled
+    assert cache.get_version("series") != version
+    assert cache.count_pattern("series_detail:*") == 0
+    assert client.get("/api/series/WS001").get_json()["series"]["title"] == "Renamed"
+
+
+def test_local_backend_expiry(app):
+    """Values expire after their timeout"""
+    cache.set("greeting", {"message": "hello"}, 1)
+    assert cache.get("greeting") == {"message": "hello"}
+    time.sleep(1.1)
+    assert cache.get("greeting") is None
+
+
+def test_series_listing_cards(app):
+    """Series pages cache their IDs and share one card per series"""
+    client = app.test_client()
+
+    cache.clear_all()
+    first = client.get("/api/series?per_page=24")
+    assert first.get_json()["series"] == [
+        db.session.get(WebSeries, "WS001").to_dict()
+    ]
+    assert cache.count_pattern("series_card:*") == 1
+
+    # A filtered page reuses the card
+    assert client.get("/api/series?type=Drama").get_json()["total"] == 1
+    assert cache.count_pattern("series_card:*") == 1
+    assert client.get(
+        "/api/series?per_page=24", headers={"If-None-Match": first.headers["ETag"]}
+    ).status_code == 304
+
+    # Odd page sizes are served from the entry of the next allowed size
+    cache.metrics.drain()
+    assert client.get("/api/series?per_page=21").get_data() == first.get_data()
+    assert cache.metrics.drain()["series"]["hits"] == 1
+
+    # An entity write drops the card but keeps the cached ID lists
+    series = db.session.get(WebSeries, "WS001")
+    series.num_episodes = 3
+    invalidate_entities("series:WS001")
+    db.session.commit()
+    assert cache.invalidations.wait_idle(2)
+    assert cache.count_pattern("series_card:*") == 0
+    assert client.get("/api/series?per_page=24").status_code == 200
+    assert cache.count_pattern("series_card:*") == 1
+
+    # The L1 tier holds hydrated pages until a series they show is written
+    cache.local["series"] = LocalLRU(16, 30)
+    try:
+        client.get("/api/series?per_page=24")
+        client.get("/api/series?per_page=24")
+        assert cache.metrics.drain()["series"]["l1_hits"] == 1
+        series.title = "Renamed"
+        invalidate_entities("series:WS001")
+        db.session.commit()
+        assert cache.invalidations.wait_idle(2)
+        page = client.get("/api/series?per_page=24").get_json()
+        assert page["series"][0]["title"] == "Renamed"
+    finally:
+        del cache.local["series"]
+
+
+def test_fill_raced_by_invalidation(app):
+    """Entries filled while their entity was invalidated are not kept"""
+    writes = []
+
+    @cache_response(timeout=60, key_prefix="raced", query_args={}, tags=lambda data: ["thing:1"])
+    def raced():
+        # A write commits and is invalidated while the first fill runs
+        if not writes:
+            writes.append(1)
+            cache.invalidate_tags(["thing:1"])
+        return {"version": len(writes)}
+
+    app.add_url_rule("/raced", "raced", raced)
+    client = app.test_client()
+    cache.clear_all()
+    assert client.get("/raced").get_json() == {"version": 1}
+    assert cache.count_pattern("raced:*") == 0
+    assert client.get("/raced").get_json() == {"version": 1}
+    assert cache.count_pattern("raced:*") == 1
+
+    def load(ids):
+        cache.invalidate_tags(["thing:2"])
+        return {entity_id: {"id": entity_id} for entity_id in ids}
+
+    # Only the card of the entity written during the load is dropped
+    assert cached_cards("thing", [1, 2], load) == [{"id": 1}, {"id": 2}]
+    assert cache.get_many(["thing_card:1", "thing_card:2"]) == [{"id": 1}, None]
+
+
+def test_concurrent_misses_fill_once(app):
+    """Concurrent misses on one key run the view once and share its result"""
+    calls = []
+    filling = threading.Event()
+
+    @cache_response(timeout=60, key_prefix="single_flight", query_args={})
+    def slow():
+        calls.append(1)
+        filling.set()
+        # Long enough for the other requests to find the key locked
+        time.sleep(0.2)
+        return {"calls": len(calls)}
+
+    app.add_url_rule("/single-flight", "single_flight", slow)
+    cache.clear_all()
+    cache.metrics.drain()
+    results = []
+
+    def get():
+        results.append(app.test_client().get("/single-flight").get_json())
+
+    first = threading.Thread(target=get)
+    first.start()
+    assert filling.wait(2)
+    waiters = [threading.Thread(target=get) for _ in range(4)]
+    for thread in waiters:
+        thread.start()
+    for thread in [first, *waiters]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"calls": 1}] * 5
+    counts = cache.metrics.drain()["single_flight"]
+    assert (counts["misses"], counts["hits"], counts["fills"]) == (1, 4, 1)
+
+
+def test_adaptive_ttl(app):
+    """Churny namespaces get shorter TTLs, quiet ones longer, within bounds"""
+    app.config.update(CACHE_ADAPTIVE_TTL=True, CACHE_ADAPTIVE_TTL_MIN_READS=10)
+    ttls = AdaptiveTTL()
+    assert ttls.ttl("series", 300) == 300
+
+    ttls.update({"series": {"hits": 0}, "country": {"hits": 0}}, now=0)
+    ttls.update(
+        {
+            "series": {"hits": 500, "misses": 50, "invalidations": 6},
+            "country": {"hits": 40},
+        },
+        now=600,
+    )
+    # One bump every 100 seconds; none at all
+    assert ttls.ttl("series", 300) == 100
+    assert ttls.ttl("country", 3600) == 3600 * 4
+
+    # Below the lower bound, and back to declared TTLs after a reset
+    ttls.update({"series": {"hits": 600, "invalidations": 600}}, now=800)
+    assert ttls.ttl("series", 300) == 75
+    ttls.update({"series": {"hits": 1}}, now=900)
+    assert ttls.ttl("series", 300) == 300
+
+    # Quiet namespaces that no write invalidates are never lengthened,
+    # and opted-out views keep their declared TTL
+    ttls.update({"quiet_view": {"hits": 0}, "admin_stats": {"hits": 0}}, now=0)
+    ttls.update(
+        {
+            "quiet_view": {"hits": 50},
+            "admin_stats": {"hits": 50, "invalidations": 60},
+        },
+        now=600,
+    )
+    assert ttls.ttl("quiet_view", 120) == 120
+    assert ttls.ttl("admin_stats", 120, adaptive=False) == 120
+    assert ttls.ttl("no_writes", 60) == 60
+
+    # Tag invalidations count for the namespaces whose entries they drop
+    key = "feedback:v1:/api/feedback:"
+    cache.set_many({key: {}}, tags={key: ["feedback:FB1"]})
+    cache.invalidate_tags(["feedback:FB1"])
+    assert cache.metrics.drain()["feedback"]["invalidations"] == 1
@@ -0,0 +1,45 @@
+"""
+Cache Key Normalization Test
+Tests canonical_query against query-string variants of the same request
+"""
+
+from werkzeug.datastructures import MultiDict
+
+from app.utils.cache import canonical_query
+
+SERIES_ARGS = {"page": 1, "per_page": 20, "search": "", "type": ""}
+
+
+def key(query):
+    return canonical_query(MultiDict(query), SERIES_ARGS)
+
+
+def test_canonical_query(app):
+    """Equivalent query strings share a key, different ones do not"""
+    # Order, defaults, empty values and unknown arguments do not matter
+    assert key([("per_page", "24")]) == "per_page=24"
+    assert key([("page", "1"), ("per_page", "24")]) == "per_page=24"
+    assert key([("per_page", "24"), ("page", "01"), ("search", "")]) == "per_page=24"
+    assert key([("per_page", "24"), ("type", ""), ("_", "1697")]) == "per_page=24"
+    assert key([]) == key([("page", "1"), ("per_page", "20")]) == ""
+
+    # Unparsable integers fall back to the default, like args.get(type=int)
+    assert key([("page", "abc")]) == ""
+
+    # Arguments that change the result stay, sorted
+    assert key([("type", "Drama"), ("page", "2")]) == "page=2&type=Drama"
+    assert key([("search", "a b&c")]) == "search=a%20b%26c"
+
+    # Long search terms are hashed
+    long_key = key([("search", "x" * 200)])
+    assert long_key.startswith("search=sha1-") and len(long_key) < 60
+
+    # Page sizes are rounded up to one of CACHE_PER_PAGE_SIZES
+    assert key([("per_page", "21")]) == "per_page=24"
+    assert key([("per_page", "33")]) == "per_page=50"
+    assert key([("per_page", "19")]) == ""
+    assert key([("per_page", "0")]) == "per_page=10"
+    assert key([("per_page", "5000")]) == "per_page=1000"
+
+    # Without a spec every non-empty argument is kept
+    assert canonical_query(MultiDict([("b", "2"), ("a", "1"), ("c", "")])) == "a=1&b=2"
@@ -0,0 +1,56 @@
+"""
+Cache Warmer Test
+Tests how warm targets are matched to cached views
+"""
+
+from app import db
+from app.models import SeriesRatingSummary, WebSeries
+from app.utils.cache_warmer import warmer
+
+
+def test_resolve_targets(app):
+    """Equivalent URLs are warmed once, unknown and per-role ones are skipped"""
+    jobs, skipped = warmer.resolve([
+        "/api/series?per_page=20",
+        "/api/series?page=1&per_page=20&search=",
+        "/api/series?per_page=24&type=Drama",
+        "/api/series/WS001",
+        "/api/admin/countries",
+        "/api/series?per_page=23&type=Drama",
+        "/api/admin/users",
+        "/api/health",
+        "/api/missing",
+    ])
+    assert [url for _, url, _ in jobs] == [
+        "/api/series?per_page=20",
+        "/api/series?per_page=24&type=Drama",
+        "/api/series/WS001",
+        "/api/admin/countries",
+    ]
+    assert skipped == 3
+
+    # Views are called below auth decorators, with their URL arguments
+    view, _, view_args = jobs[2]
+    assert view.cache_key_prefix == "series_detail"
+    assert view_args == {"series_id": "WS001"}
+    assert jobs[3][0].__wrapped__.__name__ == "get_all_countries"
+
+
+def test_top_series(statements):
+    """The most reviewed series come from the rating summaries alone"""
+    reviews = {"WS001": 2, "WS002": 5, "WS003": 0}
+    for series_id in reviews:
+        db.session.add(
+            WebSeries(webseries_id=series_id, title=series_id, type="Drama", house_id="PH001")
+        )
+    db.session.commit()
+    # New series start with an empty summary
+    for series_id, count in reviews.items():
+        db.session.get(SeriesRatingSummary, series_id).review_count = count
+    db.session.commit()
+
+    statements.clear()
+    assert warmer._top_series(5) == ["WS002", "WS001"]
+    assert warmer._top_series(1) == ["WS002"]
+    assert len(statements) == 2
+    assert not any("feedback" in statement for statement in statements)
@@ -0,0 +1,109 @@
+"""
+Circuit Breaker Test
+Steps the Redis breaker through its states on a fake clock
+"""
+
+import time
+
+import pytest
+import redis
+
+from app import db
+from app.models import WebSeries
+from app.utils import cache as cache_module
+from app.utils.cache import CircuitBreaker, RedisCache, cache
+
+
+class FakeClock:
+    """The time module, with a monotonic clock that only moves when told"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def fail():
+    raise redis.ConnectionError("down")
+
+
+def test_opens_after_threshold(clock):
+    """THRESHOLD failures within WINDOW seconds open the breaker"""
+    breaker = CircuitBreaker(threshold=3, window=10, reset_timeout=5)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    # Failures older than the window are forgotten
+    clock.now += 11
+    assert not breaker.record_failure()
+    assert breaker.allow()
+
+    clock.now += 1
+    assert not breaker.record_failure()
+    assert breaker.record_failure()
+    assert not breaker.allow()
+    snapshot = breaker.snapshot()
+    assert (snapshot["state"], snapshot["trips"], snapshot["recent_failures"]) == ("open", 1, 0)
+
+    # Failures while open are not counted again
+    assert not breaker.record_failure()
+    assert breaker.snapshot()["trips"] == 1
+
+
+def test_half_open_probe(clock):
+    """A probe half-opens the breaker, closing it on success only"""
+    breaker = CircuitBreaker()
+    breaker.trip()
+    states = []
+
+    def check():
+        states.append(breaker.state)
+        fail()
+
+    with pytest.raises(redis.ConnectionError):
+        breaker.probe(check)
+    assert states == ["half_open"]
+    assert breaker.state == "open" and not breaker.allow()
+
+    breaker.probe(lambda: None)
+    assert breaker.allow()
+    assert breaker.snapshot()["opened_at"] is None
+
+    # Closed again, it counts failures from scratch
+    assert not breaker.record_failure()
+    assert breaker.allow()
+
+
+def test_serves_while_degraded(app):
+    """With the breaker open views are served from the DB, and timed"""
+    db.session.add(
+        WebSeries(webseries_id="WS001", title="Pilot", type="Drama", house_id="PH001")
+    )
+    db.session.commit()
+    backend = RedisCache()
+    # Never connected to: an open breaker keeps every call off the network
+    backend.redis_client = redis.Redis.from_url("redis://localhost:1/0")
+    backend.breaker.trip()
+    local = cache.backend
+    cache.backend = backend
+    try:
+        client = app.test_client()
+        for _ in range(2):
+            response = client.get("/api/series/WS001")
+            assert response.status_code == 200
+            assert response.get_json()["series"]["title"] == "Pilot"
+        assert backend.health()["state"] == "open"
+        assert backend.health()["degraded_requests"] == 2
+        assert backend.metrics.drain()["series_detail"]["degraded"] == 2
+    finally:
+        cache.backend = local
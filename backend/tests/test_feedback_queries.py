@@ -0,0 +1,59 @@
+"""
+Feedback Listing Query Test
+Counts the SQL statements of feedback pages as they grow
+"""
+
+from datetime import date
+
+from app import db
+from app.models import Feedback, ViewerAccount, WebSeries
+
+
+def add_reviews(first, count):
+    for n in range(first, first + count):
+        db.session.add(
+            ViewerAccount(
+                account_id=f"VA{n:03d}",
+                first_name="Test",
+                last_name=f"Viewer {n}",
+                email=f"VA{n:03d}@example.com",
+                password_hash="x",
+                street="1 Main St",
+                city="Springfield",
+                state="IL",
+                open_date=date.today(),
+                monthly_service_charge=0,
+            )
+        )
+        db.session.add(
+            Feedback(
+                feedback_id=f"FB{n:03d}",
+                rating=n % 5 + 1,
+                feedback_text="Test",
+                feedback_date=date.today(),
+                account_id=f"VA{n:03d}",
+                webseries_id="WS001",
+            )
+        )
+    db.session.commit()
+
+
+def test_feedback_queries(page_statements):
+    """Viewers are joined into the page query, so the count does not grow with the page"""
+    db.session.add(
+        WebSeries(webseries_id="WS001", title="Pilot", type="Drama", house_id="PH001")
+    )
+    add_reviews(1, 5)
+
+    data, small = page_statements("/api/feedback?per_page=50&webseries_id=WS001")
+    assert len(data["feedback"]) == 5
+    assert data["feedback"][0]["viewer_account"]["email"] == "VA001@example.com"
+
+    add_reviews(6, 25)
+    data, large = page_statements("/api/feedback?per_page=50&webseries_id=WS001")
+    assert len(data["feedback"]) == 30
+    assert large == small
+
+    data, count = page_statements("/api/feedback/FB007")
+    assert data["feedback"]["viewer_account"]["last_name"] == "Viewer 7"
+    assert count == 1
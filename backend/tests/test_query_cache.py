@@ -0,0 +1,68 @@
+"""
+ORM Query Cache Test
+Counts the SQL statements of repeated lookups on cached tables
+"""
+
+from datetime import datetime
+
+from app import db
+from app.models import ProductionHouse, ViewerAccount, WebSeries
+from app.utils.cache import cache
+
+
+def test_query_cache(app, statements):
+    """Repeated lookups skip the database until a write to the table commits"""
+
+    def lookup():
+        db.session.remove()
+        statements.clear()
+        house = db.session.get(ProductionHouse, "PH001")
+        return house.name, len(statements)
+
+    assert lookup() == ("Test Studios", 1)
+    assert lookup() == ("Test Studios", 0)
+    assert isinstance(db.session.get(ProductionHouse, "PH001").created_at, datetime)
+
+    # Missing rows are cached too; other queries always reach the database
+    db.session.remove()
+    statements.clear()
+    assert db.session.get(ProductionHouse, "PH404") is None
+    assert db.session.get(ProductionHouse, "PH404") is None
+    ProductionHouse.query.filter_by(name="Test Studios").all()
+    ProductionHouse.query.filter_by(name="Test Studios").all()
+    assert len(statements) == 3
+
+    # Tables not listed in CACHE_QUERY_TABLES are always read
+    statements.clear()
+    WebSeries.query.count()
+    WebSeries.query.count()
+    assert len(statements) == 2
+
+    # Within the writing transaction the table is read from the database,
+    # and after commit the old result is never returned
+    house = db.session.get(ProductionHouse, "PH001")
+    house.name = "Renamed Studios"
+    db.session.flush()
+    statements.clear()
+    assert ProductionHouse.query.filter_by(name="Renamed Studios").count() == 1
+    assert len(statements) == 1
+    db.session.commit()
+    assert cache.invalidations.wait_idle(2)
+    assert lookup() == ("Renamed Studios", 1)
+    assert lookup() == ("Renamed Studios", 0)
+
+    # Textual writes through the session bump the tables they name
+    db.session.execute(
+        db.text("UPDATE production_house SET name = 'Raw Studios' WHERE house_id = 'PH001'")
+    )
+    db.session.commit()
+    assert cache.invalidations.wait_idle(2)
+    assert lookup() == ("Raw Studios", 1)
+
+    # Rows with credential columns never reach the cache
+    app.config["CACHE_QUERY_TABLES"] = {"viewer_account": 60}
+    db.session.remove()
+    statements.clear()
+    db.session.get(ViewerAccount, "VA001")
+    db.session.get(ViewerAccount, "VA001")
+    assert len(statements) == 2
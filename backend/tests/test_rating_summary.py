@@ -0,0 +1,83 @@
+"""
+Rating Summary Test
+Checks that series rating summaries follow feedback writes
+"""
+
+from datetime import date
+
+from app import db
+from app.models import (
+    Feedback,
+    SeriesRatingSummary,
+    ViewerAccount,
+    WebSeries,
+)
+
+
+def add_viewer(account_id):
+    db.session.add(
+        ViewerAccount(
+            account_id=account_id,
+            first_name="Test",
+            last_name="Viewer",
+            email=f"{account_id}@example.com",
+            password_hash="x",
+            street="1 Main St",
+            city="Springfield",
+            state="IL",
+            open_date=date.today(),
+            monthly_service_charge=0,
+        )
+    )
+
+
+def add_feedback(feedback_id, account_id, rating):
+    db.session.add(
+        Feedback(
+            feedback_id=feedback_id,
+            rating=rating,
+            feedback_text="Test",
+            feedback_date=date.today(),
+            account_id=account_id,
+            webseries_id="WS001",
+        )
+    )
+
+
+def test_rating_summary(app):
+    """Inserts, rating changes and deletes (also by cascade) are folded in"""
+    db.session.add(
+        WebSeries(webseries_id="WS001", title="Pilot", type="Drama", house_id="PH001")
+    )
+    add_viewer("VA001")
+    add_viewer("VA002")
+    db.session.commit()
+    summary = db.session.get(SeriesRatingSummary, "WS001")
+    assert summary.review_count == 0 and summary.average is None
+
+    add_feedback("FB001", "VA001", 4)
+    add_feedback("FB002", "VA002", 2)
+    db.session.commit()
+    db.session.refresh(summary)
+    assert (summary.review_count, summary.rating_sum, summary.average) == (2, 6, 3.0)
+    assert db.session.get(WebSeries, "WS001").to_dict()["rating"] == 3.0
+
+    db.session.get(Feedback, "FB001").rating = 5
+    db.session.commit()
+    db.session.refresh(summary)
+    assert summary.to_dict()["histogram"] == {1: 0, 2: 1, 3: 0, 4: 0, 5: 1}
+
+    # Deleting a viewer deletes their feedback through the ORM cascade
+    db.session.delete(db.session.get(ViewerAccount, "VA002"))
+    db.session.commit()
+    db.session.refresh(summary)
+    assert (summary.review_count, summary.average) == (1, 5.0)
+    assert SeriesRatingSummary.drift() == []
+
+    # Drift is reported and repaired by a rebuild
+    summary.review_count = 7
+    db.session.commit()
+    assert [row["webseries_id"] for row in SeriesRatingSummary.drift()] == ["WS001"]
+    assert SeriesRatingSummary.rebuild() == ["WS001"]
+    db.session.commit()
+    assert SeriesRatingSummary.drift() == []
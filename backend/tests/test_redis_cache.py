@@ -0,0 +1,72 @@
+"""
+Redis Cache Test
+Runs RedisCache key walks against an in-memory stand-in for the client
+"""
+
+import fnmatch
+
+from app.utils.cache import RedisCache, cache
+
+
+class ScanningClient:
+    """The SCAN, UNLINK and pipeline subset of a redis client, over a dict"""
+
+    def __init__(self, keys):
+        self.data = dict.fromkeys(keys, "1")
+        self.scans = 0
+
+    def scan(self, cursor=0, match="*", count=10):
+        # Like Redis, a walk sees every key that exists throughout it
+        if cursor == 0:
+            self._walk = sorted(self.data)
+        self.scans += 1
+        page = self._walk[cursor:cursor + count]
+        cursor = 0 if cursor + count >= len(self._walk) else cursor + count
+        return cursor, [key for key in page if fnmatch.fnmatchcase(key, match)]
+
+    def unlink(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction=True):
+        return Pipeline(self)
+
+
+class Pipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((getattr(self.client, name), args, kwargs))
+        return queue
+
+    def execute(self):
+        return [call(*args, **kwargs) for call, args, kwargs in self.calls]
+
+
+def test_delete_pattern_only_matching(app):
+    """SCAN and UNLINK over many pages remove exactly the matching keys"""
+    app.config["CACHE_SCAN_BATCH_SIZE"] = 3
+    series = [f"series:v1:/api/series:page={page}" for page in range(10)]
+    others = [
+        "series_detail:v1:/api/series/WS001:",
+        "series_card:WS001",
+        "cache_version:series",
+        "cache_tag:series:WS001",
+        "episodes:v1:/api/episodes:",
+    ]
+    client = ScanningClient(series + others)
+    backend = RedisCache()
+    backend.redis_client = client
+
+    assert backend.delete_pattern("series:*")
+    assert sorted(client.data) == sorted(others)
+    assert client.scans == 5
+
+    # The same walk on the in-process backend
+    for key in series + others:
+        cache.set(key, 1)
+    cache.delete_pattern("series:*")
+    assert [cache.get(key) for key in series] == [None] * len(series)
+    assert [cache.get(key) for key in others] == [1] * len(others)
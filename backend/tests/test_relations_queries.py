@@ -0,0 +1,63 @@
+"""
+Relations Listing Query Test
+Counts the SQL statements of relation pages that embed names of other entities
+"""
+
+from datetime import date
+
+from app import db
+from app.models import (
+    Producer,
+    ProducerAffiliation,
+    SubtitleLanguage,
+    WebSeries,
+)
+
+
+def add_rows(first, count):
+    for n in range(first, first + count):
+        db.session.add(
+            WebSeries(webseries_id=f"WS{n:03d}", title=f"Series {n}", type="Drama", house_id="PH001")
+        )
+        db.session.add(
+            SubtitleLanguage(
+                subtitle_language_id=f"SL{n:03d}", language_name="French", webseries_id=f"WS{n:03d}"
+            )
+        )
+        db.session.add(
+            Producer(
+                producer_id=f"PR{n:03d}",
+                first_name="Test",
+                last_name=f"Producer {n}",
+                phone=5550100,
+                street="1 Main St",
+                city="Springfield",
+                state="IL",
+                email=f"PR{n:03d}@example.com",
+                nationality="USA",
+            )
+        )
+        db.session.add(
+            ProducerAffiliation(
+                producer_id=f"PR{n:03d}", house_id="PH001", start_date=date.today()
+            )
+        )
+    db.session.commit()
+
+
+def test_relations_queries(page_statements):
+    """Names are joined into the page query, so the count does not grow with the page"""
+    add_rows(1, 3)
+
+    subtitles, small_subtitles = page_statements("/api/relations/subtitle-languages")
+    assert subtitles["subtitle_languages"][0]["series_title"] == "Series 1"
+    affiliations, small_affiliations = page_statements("/api/relations/producer-affiliations")
+    assert affiliations["affiliations"][0]["producer_name"] == "Test Producer 1"
+    assert affiliations["affiliations"][0]["house_name"] == "Test Studios"
+
+    add_rows(4, 20)
+    subtitles, large_subtitles = page_statements("/api/relations/subtitle-languages")
+    assert len(subtitles["subtitle_languages"]) == 23
+    affiliations, large_affiliations = page_statements("/api/relations/producer-affiliations")
+    assert len(affiliations["affiliations"]) == 23
+    assert (large_subtitles, large_affiliations) == (small_subtitles, small_affiliations)
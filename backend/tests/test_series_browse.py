@@ -0,0 +1,124 @@
+"""
+Series Browse Test
+Checks that browse rows follow writes to the series tables and can be filtered
+"""
+
+from datetime import date
+
+from app import db
+from app.models import (
+    Country,
+    Episode,
+    Feedback,
+    ProductionHouse,
+    SeriesBrowse,
+    SubtitleLanguage,
+    ViewerAccount,
+    WebSeries,
+    WebSeriesRelease,
+)
+from app.utils.cache import cache
+
+
+def test_series_browse(app, statements):
+    """Inserts, renames and deletes in any source table rewrite the browse rows"""
+    db.session.add(Country(country_name="Canada"))
+    db.session.add(
+        ViewerAccount(
+            account_id="VA001",
+            first_name="Test",
+            last_name="Viewer",
+            email="VA001@example.com",
+            password_hash="x",
+            street="1 Main St",
+            city="Springfield",
+            state="IL",
+            open_date=date.today(),
+            monthly_service_charge=0,
+        )
+    )
+    db.session.add(
+        WebSeries(webseries_id="WS001", title="Pilot", type="Drama", house_id="PH001")
+    )
+    db.session.add(
+        WebSeries(webseries_id="WS002", title="Another", type="Comedy", house_id="PH001")
+    )
+    db.session.commit()
+    assert db.session.get(SeriesBrowse, "WS001").to_dict()["num_episodes"] == 0
+
+    db.session.add(Episode(episode_id="EP001", episode_number="1", webseries_id="WS001"))
+    db.session.add(Episode(episode_id="EP002", episode_number="2", webseries_id="WS001"))
+    db.session.add(
+        SubtitleLanguage(subtitle_language_id="SL001", language_name="French", webseries_id="WS001")
+    )
+    db.session.add(
+        WebSeriesRelease(webseries_id="WS001", country_name="Canada", release_date=date.today())
+    )
+    db.session.add(
+        Feedback(
+            feedback_id="FB001",
+            rating=4,
+            feedback_text="Test",
+            feedback_date=date.today(),
+            account_id="VA001",
+            webseries_id="WS001",
+        )
+    )
+    db.session.commit()
+    row = db.session.get(SeriesBrowse, "WS001").to_dict()
+    assert (row["num_episodes"], row["review_count"], row["rating"]) == (2, 1, 4.0)
+    assert row["subtitle_languages"] == ["French"]
+    assert row["release_countries"] == ["Canada"]
+
+    db.session.get(ProductionHouse, "PH001").name = "Renamed Studios"
+    db.session.delete(db.session.get(Episode, "EP002"))
+    db.session.commit()
+    db.session.expire_all()
+    assert {row.house_name for row in SeriesBrowse.query} == {"Renamed Studios"}
+    assert db.session.get(SeriesBrowse, "WS001").num_episodes == 1
+    assert SeriesBrowse.drift() == []
+
+    client = app.test_client()
+    cache.invalidations.wait_idle(2)
+    response = client.get("/api/series/browse?language=French&min_episodes=1")
+    assert [s["webseries_id"] for s in response.get_json()["series"]] == ["WS001"]
+    response = client.get("/api/series/browse?sort=rating&order=desc")
+    assert [s["webseries_id"] for s in response.get_json()["series"]] == ["WS001", "WS002"]
+    assert client.get("/api/series/browse?sort=nope").status_code == 400
+
+    # A review updates the row in place and drops only the cached pages that
+    # show the series or filter or sort on its rating or review count
+    client.get("/api/series/browse?type=Comedy")
+    client.get("/api/series/browse?sort=reviews")
+    assert cache.count_pattern("series_browse:*") == 4
+    db.session.add(
+        Feedback(
+            feedback_id="FB002",
+            rating=2,
+            feedback_text="Test",
+            feedback_date=date.today(),
+            account_id="VA001",
+            webseries_id="WS001",
+        )
+    )
+    statements.clear()
+    db.session.commit()
+    assert [sql.split()[0] for sql in statements if "series_browse" in sql] == ["SELECT", "UPDATE"]
+    cache.invalidations.wait_idle(2)
+    assert cache.count_pattern("series_browse:*") == 1
+    response = client.get("/api/series/browse?sort=rating&order=desc")
+    assert response.get_json()["series"][0]["rating"] == 3.0
+
+    db.session.delete(db.session.get(WebSeries, "WS002"))
+    db.session.commit()
+    cache.invalidations.wait_idle(2)
+    response = client.get("/api/series/browse?sort=rating&order=desc")
+    assert [s["webseries_id"] for s in response.get_json()["series"]] == ["WS001"]
+
+    # Drift is reported and repaired by a rebuild
+    db.session.get(SeriesBrowse, "WS001").title = "Wrong"
+    db.session.commit()
+    assert [row["webseries_id"] for row in SeriesBrowse.drift()] == ["WS001"]
+    assert SeriesBrowse.rebuild() == ["WS001"]
+    db.session.commit()
+    assert SeriesBrowse.drift() == []
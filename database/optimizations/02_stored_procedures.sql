@@ -265,16 +265,16 @@ CREATE PROCEDURE sp_get_top_rated_series(
     IN p_limit INT
 )
 BEGIN
+    -- Reads the maintained summaries instead of grouping all feedback
     SELECT
         ws.webseries_id,
         ws.title,
         ws.type,
-        COUNT(f.feedback_id) as review_count,
-        AVG(f.rating) as avg_rating
-    FROM web_series ws
-    INNER JOIN feedback f ON ws.webseries_id = f.webseries_id
-    GROUP BY ws.webseries_id, ws.title, ws.type
-    HAVING COUNT(f.feedback_id) >= p_min_reviews
+        rs.review_count,
+        rs.rating_sum / rs.review_count as avg_rating
+    FROM series_rating_summary rs
+    INNER JOIN web_series ws ON ws.webseries_id = rs.webseries_id
+    WHERE rs.review_count >= GREATEST(p_min_reviews, 1)
     ORDER BY avg_rating DESC, review_count DESC
     LIMIT p_limit;
 END//
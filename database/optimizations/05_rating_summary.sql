@@ -0,0 +1,62 @@
+-- ============================================================================
+-- Series Rating Summary
+-- Purpose: Per-series review count, rating sum and star histogram, so series
+--          ratings, sp_get_top_rated_series and the admin average rating no
+--          longer aggregate the feedback table
+-- Date: 2026-10-17
+-- ============================================================================
+
+USE news_db;
+
+-- ============================================================================
+-- 1. SUMMARY TABLE (also in schema/mysql_schema.sql for new installs)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS series_rating_summary (
+    webseries_id VARCHAR(10) NOT NULL COMMENT 'Web series ID',
+    review_count INT NOT NULL DEFAULT 0 COMMENT 'Number of feedback rows',
+    rating_sum INT NOT NULL DEFAULT 0 COMMENT 'Sum of feedback ratings',
+    stars_1 INT NOT NULL DEFAULT 0 COMMENT 'Feedback rated 1',
+    stars_2 INT NOT NULL DEFAULT 0 COMMENT 'Feedback rated 2',
+    stars_3 INT NOT NULL DEFAULT 0 COMMENT 'Feedback rated 3',
+    stars_4 INT NOT NULL DEFAULT 0 COMMENT 'Feedback rated 4',
+    stars_5 INT NOT NULL DEFAULT 0 COMMENT 'Feedback rated 5',
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Record update timestamp',
+    PRIMARY KEY (webseries_id),
+    CONSTRAINT fk_rating_summary_series FOREIGN KEY (webseries_id)
+        REFERENCES web_series(webseries_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================================================
+-- 2. POPULATE FROM EXISTING FEEDBACK
+-- ============================================================================
+
+REPLACE INTO series_rating_summary (
+    webseries_id, review_count, rating_sum,
+    stars_1, stars_2, stars_3, stars_4, stars_5
+)
+SELECT
+    ws.webseries_id,
+    COUNT(f.feedback_id),
+    COALESCE(SUM(f.rating), 0),
+    COALESCE(SUM(f.rating = 1), 0),
+    COALESCE(SUM(f.rating = 2), 0),
+    COALESCE(SUM(f.rating = 3), 0),
+    COALESCE(SUM(f.rating = 4), 0),
+    COALESCE(SUM(f.rating = 5), 0)
+FROM web_series ws
+LEFT JOIN feedback f ON ws.webseries_id = f.webseries_id
+GROUP BY ws.webseries_id;
+
+/*
+The application keeps the summaries in step with feedback inside each
+write's transaction (app/models/series_rating_summary.py), including
+feedback deleted with its viewer account. Feedback written outside the
+application (manual SQL) is not folded in.
+
+Equivalent commands:
+    flask --app run ratings rebuild     -- recompute all (or given) series
+    flask --app run ratings check       -- list drifted series, exit 1 if any
+
+sp_get_top_rated_series (02_stored_procedures.sql) reads this table.
+*/
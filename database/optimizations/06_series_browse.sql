@@ -0,0 +1,88 @@
+-- ============================================================================
+-- Series Browse Table
+-- Purpose: One row per series with title, type, house name, episode count,
+--          rating, subtitle languages and release countries, so catalog
+--          browse and search pages filter and sort a single indexed table
+--          instead of joining six
+-- Date: 2026-10-17
+-- ============================================================================
+
+USE news_db;
+
+-- ============================================================================
+-- 1. BROWSE TABLE (also in schema/mysql_schema.sql for new installs)
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS series_browse (
+    webseries_id VARCHAR(10) NOT NULL COMMENT 'Web series ID',
+    title VARCHAR(64) NOT NULL COMMENT 'Series title',
+    type VARCHAR(15) NOT NULL COMMENT 'Series type',
+    house_id VARCHAR(10) NOT NULL COMMENT 'Production house ID',
+    house_name VARCHAR(64) NOT NULL COMMENT 'Production house name',
+    num_episodes INT NOT NULL DEFAULT 0 COMMENT 'Number of episode rows',
+    review_count INT NOT NULL DEFAULT 0 COMMENT 'Number of feedback rows',
+    average_rating DOUBLE NULL COMMENT 'Average rating to one decimal, NULL without feedback',
+    subtitle_languages TEXT NOT NULL COMMENT 'Subtitle languages, comma-wrapped (,English,French,)',
+    release_countries TEXT NOT NULL COMMENT 'Release countries, comma-wrapped',
+    created_at DATETIME NULL COMMENT 'Series creation timestamp',
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Record update timestamp',
+    PRIMARY KEY (webseries_id),
+    INDEX ix_series_browse_title (title),
+    INDEX ix_series_browse_type (type),
+    INDEX ix_series_browse_house_id (house_id),
+    INDEX ix_series_browse_house_name (house_name),
+    INDEX ix_series_browse_num_episodes (num_episodes),
+    INDEX ix_series_browse_review_count (review_count),
+    INDEX ix_series_browse_average_rating (average_rating),
+    INDEX ix_series_browse_created_at (created_at),
+    CONSTRAINT fk_series_browse_series FOREIGN KEY (webseries_id)
+        REFERENCES web_series(webseries_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================================================
+-- 2. POPULATE FROM THE SERIES TABLES (after 05_rating_summary.sql)
+-- ============================================================================
+
+-- GROUP_CONCAT stops at 1024 bytes by default and silently cuts the lists;
+-- the TEXT columns take up to 64 KB
+SET SESSION group_concat_max_len = 65535;
+
+REPLACE INTO series_browse (
+    webseries_id, title, type, house_id, house_name, num_episodes,
+    review_count, average_rating, subtitle_languages, release_countries,
+    created_at
+)
+SELECT
+    ws.webseries_id,
+    ws.title,
+    ws.type,
+    ws.house_id,
+    ph.name,
+    (SELECT COUNT(*) FROM episode e WHERE e.webseries_id = ws.webseries_id),
+    COALESCE(rs.review_count, 0),
+    IF(rs.review_count > 0, ROUND(rs.rating_sum / rs.review_count, 1), NULL),
+    COALESCE((
+        SELECT CONCAT(',', GROUP_CONCAT(DISTINCT sl.language_name ORDER BY sl.language_name SEPARATOR ','), ',')
+        FROM subtitle_language sl WHERE sl.webseries_id = ws.webseries_id
+    ), ''),
+    COALESCE((
+        SELECT CONCAT(',', GROUP_CONCAT(DISTINCT r.country_name ORDER BY r.country_name SEPARATOR ','), ',')
+        FROM web_series_release r WHERE r.webseries_id = ws.webseries_id
+    ), ''),
+    ws.created_at
+FROM web_series ws
+JOIN production_house ph ON ws.house_id = ph.house_id
+LEFT JOIN series_rating_summary rs ON ws.webseries_id = rs.webseries_id;
+
+/*
+The application rewrites a series' row inside the transaction of every
+write to web_series, episode, feedback, subtitle_language,
+web_series_release or a production house name (app/models/series_browse.py).
+Writes made outside the application (manual SQL) are not reflected.
+
+Equivalent commands:
+    flask --app run browse rebuild      -- recompute every row
+    flask --app run browse check        -- list drifted series, exit 1 if any
+
+GET /api/series/browse filters and sorts this table.
+*/
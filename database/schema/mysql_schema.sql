@@ -167,6 +167,27 @@ CREATE TABLE feedback (
     CONSTRAINT chk_feedback_rating CHECK (rating BETWEEN 1 AND 5)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- ============================================================================
+-- Table: series_rating_summary
+-- Description: Review count, rating sum and per-star histogram per web series,
+--              maintained by the application with every feedback write
+--              (rebuild with `flask --app run ratings rebuild`)
+-- ============================================================================
+CREATE TABLE series_rating_summary (
+    webseries_id VARCHAR(10) NOT NULL COMMENT 'Web series ID',
+    review_count INT NOT NULL DEFAULT 0 COMMENT 'Number of feedback rows',
+    rating_sum INT NOT NULL DEFAULT 0 COMMENT 'Sum of feedback ratings',
+    stars_1 INT NOT NULL DEFAULT 0 COMMENT 'Feedback rated 1',
+    stars_2 INT NOT NULL DEFAULT 0 COMMENT 'Feedback rated 2',
+    stars_3 INT NOT NULL DEFAULT 0 COMMENT 'Feedback rated 3',
+    stars_4 INT NOT NULL DEFAULT 0 COMMENT 'Feedback rated 4',
+    stars_5 INT NOT NULL DEFAULT 0 COMMENT 'Feedback rated 5',
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Record update timestamp',
+    PRIMARY KEY (webseries_id),
+    CONSTRAINT fk_rating_summary_series FOREIGN KEY (webseries_id)
+        REFERENCES web_series(webseries_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- ============================================================================
 -- Table: series_contract
 -- Description: Contractual agreements for web series
@@ -257,6 +278,39 @@ CREATE TABLE web_series_release (
         REFERENCES country(country_name) ON DELETE RESTRICT
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- ============================================================================
+-- Table: series_browse
+-- Description: One row per web series with its house name, episode count,
+--              rating, subtitle languages and release countries, maintained
+--              by the application with every write to those tables
+--              (rebuild with `flask --app run browse rebuild`)
+-- ============================================================================
+CREATE TABLE series_browse (
+    webseries_id VARCHAR(10) NOT NULL COMMENT 'Web series ID',
+    title VARCHAR(64) NOT NULL COMMENT 'Series title',
+    type VARCHAR(15) NOT NULL COMMENT 'Series type',
+    house_id VARCHAR(10) NOT NULL COMMENT 'Production house ID',
+    house_name VARCHAR(64) NOT NULL COMMENT 'Production house name',
+    num_episodes INT NOT NULL DEFAULT 0 COMMENT 'Number of episode rows',
+    review_count INT NOT NULL DEFAULT 0 COMMENT 'Number of feedback rows',
+    average_rating DOUBLE NULL COMMENT 'Average rating to one decimal, NULL without feedback',
+    subtitle_languages TEXT NOT NULL COMMENT 'Subtitle languages, comma-wrapped (,English,French,)',
+    release_countries TEXT NOT NULL COMMENT 'Release countries, comma-wrapped',
+    created_at DATETIME NULL COMMENT 'Series creation timestamp',
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Record update timestamp',
+    PRIMARY KEY (webseries_id),
+    INDEX ix_series_browse_title (title),
+    INDEX ix_series_browse_type (type),
+    INDEX ix_series_browse_house_id (house_id),
+    INDEX ix_series_browse_house_name (house_name),
+    INDEX ix_series_browse_num_episodes (num_episodes),
+    INDEX ix_series_browse_review_count (review_count),
+    INDEX ix_series_browse_average_rating (average_rating),
+    INDEX ix_series_browse_created_at (created_at),
+    CONSTRAINT fk_series_browse_series FOREIGN KEY (webseries_id)
+        REFERENCES web_series(webseries_id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- ============================================================================
 -- END OF SCHEMA
 -- ============================================================================